@@ -0,0 +1,77 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+from api import db
+from api.metrics import ADMISSION_CAPACITY, ADMISSION_DECISIONS, ADMISSION_QUEUED
+from api.queue import transcription_workers
+from api.settings import (
+    ADMISSION_CAPACITY_SECONDS,
+    ADMISSION_DEGRADE_CHAIN,
+    ADMISSION_MODEL_CAPACITY,
+    ADMISSION_UNKNOWN_MEDIA_SECONDS,
+    ETA_DEFAULT_REALTIME_FACTOR,
+    ETA_HISTORY_JOBS,
+)
+
+# Modèles déjà exposés dans les jauges (remis à 0 quand leur file se vide)
+_gauge_models = set(ADMISSION_MODEL_CAPACITY)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, model_name: str, retry_after: int) -> None:
+        super().__init__(f"Capacité atteinte pour le modèle {model_name}")
+        self.model_name = model_name
+        self.retry_after = retry_after
+
+
+def capacity_seconds(model_name: str) -> Optional[float]:
+    return ADMISSION_MODEL_CAPACITY.get(model_name, ADMISSION_CAPACITY_SECONDS) or None
+
+
+def realtime_factor(model_name: Optional[str]) -> float:
+    return db.realtime_factor(model_name, ETA_HISTORY_JOBS) or ETA_DEFAULT_REALTIME_FACTOR
+
+
+def refresh_gauges(backlog: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    if backlog is None:
+        backlog = db.queued_media_seconds(ADMISSION_UNKNOWN_MEDIA_SECONDS)
+    _gauge_models.update(name for name in backlog if name)
+    for model_name in _gauge_models:
+        ADMISSION_QUEUED.labels(model_name).set(backlog.get(model_name, 0.0))
+        ADMISSION_CAPACITY.labels(model_name).set(capacity_seconds(model_name) or 0)
+    return backlog
+
+
+def _fits(model_name: str, request_seconds: float, backlog: Dict[str, float]) -> bool:
+    # Une file vide accepte toujours un job, même plus long que la capacité
+    limit = capacity_seconds(model_name)
+    queued = backlog.get(model_name, 0.0)
+    return limit is None or queued == 0 or queued + request_seconds <= limit
+
+
+def admit(
+    model_name: str,
+    media_seconds: List[Optional[float]],
+    allow_degrade: bool = False,
+    job_ids: Sequence[str] = (),
+) -> str:
+    # Modèle retenu pour un lot de médias ; AdmissionRejected au-delà de la capacité
+    # (Retry-After = temps estimé pour écouler l'excédent). À appeler dans la même
+    # db.transaction() que le passage en "queued" : BEGIN IMMEDIATE sérialise la
+    # vérification et la réservation entre requêtes et entre processus API.
+    request_seconds = sum(seconds or ADMISSION_UNKNOWN_MEDIA_SECONDS for seconds in media_seconds)
+    backlog = db.queued_media_seconds(ADMISSION_UNKNOWN_MEDIA_SECONDS, exclude=job_ids)
+    candidates = [model_name]
+    if allow_degrade and model_name in ADMISSION_DEGRADE_CHAIN:
+        candidates += ADMISSION_DEGRADE_CHAIN[ADMISSION_DEGRADE_CHAIN.index(model_name) + 1:]
+    for candidate in candidates:
+        if _fits(candidate, request_seconds, backlog):
+            backlog[candidate] = backlog.get(candidate, 0.0) + request_seconds
+            refresh_gauges(backlog)
+            ADMISSION_DECISIONS.labels(model_name, "accepted" if candidate == model_name else "degraded").inc()
+            return candidate
+    refresh_gauges(backlog)
+    ADMISSION_DECISIONS.labels(model_name, "rejected").inc()
+    excess = backlog.get(model_name, 0.0) + request_seconds - capacity_seconds(model_name)
+    retry_after = math.ceil(excess * realtime_factor(model_name) / transcription_workers())
+    raise AdmissionRejected(model_name, max(1, retry_after))
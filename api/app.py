@@ -1,17 +1,66 @@
+import asyncio
+import base64
+import binascii
+import io
+import json
 import logging
+import os
+import pstats
+import random
+import tempfile
 import time
 import uuid
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from fastapi import FastAPI, File, Form, Header, Request, UploadFile, HTTPException, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, PlainTextResponse, StreamingResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from api import db
-from api.models import RunRequest, JobStatus
-from api.queue import get_queue
-from api.settings import ALLOWED_EXTENSIONS, DEFAULT_MODEL
-from api.storage import upload_path
+from api.admission import AdmissionRejected, admit, realtime_factor, refresh_gauges
+from api.events import TERMINAL_EVENTS, publish_status, read_partials
+from api.metrics import REQUEST_COUNT, REQUEST_LATENCY
+from api.models import BatchRunRequest, RunRequest, JobStatus
+from api.queue import (
+    enqueue_runs,
+    enqueue_stages,
+    get_queue,
+    get_redis,
+    priority_key,
+    priority_tier,
+    tier_queue,
+    transcription_workers,
+)
+from api.settings import (
+    ALLOWED_EXTENSIONS,
+    BATCH_REQUEST_MAX_JOBS,
+    DEFAULT_MODEL,
+    LONG_POLL_MAX_SECONDS,
+    MAX_UPLOAD_BYTES,
+    PIPELINE_MODE,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOP_FUNCTIONS,
+    SSE_BLOCK_MS,
+    STATUS_CACHE_MAX_ENTRIES,
+    STATUS_CACHE_TTL_SECONDS,
+    STATUS_PUBSUB,
+)
+from api.status import StatusHub
+from api.storage import (
+    UploadFormError,
+    UploadTooLargeError,
+    export_path,
+    load_transcript,
+    profile_path,
+    receive_upload,
+    save_upload,
+    transcript_model,
+    upload_path,
+)
+from transcription.audio import probe_media
+from transcription.exports import EXPORTERS, export_text
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,37 +70,106 @@ logger = logging.getLogger("transcription_api")
 
 app = FastAPI(title="Subtitle Application")
 
-REQUEST_COUNT = Counter(
-    "api_requests_total", "Total API requests", ["endpoint", "status"]
-)
-REQUEST_LATENCY = Histogram(
-    "api_request_latency_seconds", "API request latency", ["endpoint"]
-)
-
 
 def track_request(endpoint: str, start: float, status_code: int) -> None:
     REQUEST_COUNT.labels(endpoint=endpoint, status=str(status_code)).inc()
     REQUEST_LATENCY.labels(endpoint=endpoint).observe(time.time() - start)
 
 
+status_hub = StatusHub(STATUS_CACHE_MAX_ENTRIES, STATUS_CACHE_TTL_SECONDS)
+
+
 @app.on_event("startup")
 def startup() -> None:
     db.init_db()
 
 
-@app.post("/upload")
-async def upload(file: UploadFile = File(...)) -> JSONResponse:
+@app.on_event("startup")
+async def start_status_hub() -> None:
+    if STATUS_PUBSUB:
+        status_hub.start(get_redis)
+
+
+@app.on_event("shutdown")
+def stop_status_hub() -> None:
+    status_hub.stop()
+
+
+def _probe_media(path: Path) -> Dict[str, Any]:
+    # Durée et codecs stockés sur le job (ordonnancement, ETA) ; un fichier que
+    # ffprobe ne sait pas lire reste accepté, sans durée connue
+    try:
+        media = probe_media(path)
+    except Exception:
+        logger.warning("Sondage du média impossible: %s", path.name)
+        return {}
+    return {
+        "media_duration_seconds": media["duration"],
+        "audio_codec": media["audio_codec"],
+        "video_codec": media["video_codec"],
+    }
+
+
+def _rejected(exc: AdmissionRejected, **detail: Any) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={"message": "Capacité de traitement atteinte, réessayer plus tard", **detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# Corps lu en flux par receive_upload (pas de paramètre UploadFile) : schéma
+# du formulaire déclaré à la main pour la documentation OpenAPI
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@app.post("/upload", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload(request: Request) -> JSONResponse:
     start = time.time()
     try:
-        suffix = Path(file.filename).suffix.lower()
-        if suffix not in ALLOWED_EXTENSIONS:
-            raise HTTPException(status_code=400, detail="Format de fichier non supporté")
+        content_length = int(request.headers.get("content-length") or 0)
+        if content_length > MAX_UPLOAD_BYTES + 64 * 1024:
+            # Rejet anticipé, avant de lire le corps
+            raise HTTPException(status_code=413, detail="Fichier trop volumineux")
         job_id = str(uuid.uuid4())
-        destination = upload_path(job_id, file.filename)
-        with destination.open("wb") as buffer:
-            buffer.write(await file.read())
-        db.create_job(job_id, file.filename, str(destination))
-        db.add_event(job_id, "uploaded")
+
+        def destination_for(filename: str) -> Path:
+            if Path(filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+                raise HTTPException(status_code=400, detail="Format de fichier non supporté")
+            return upload_path(job_id, filename)
+
+        try:
+            filename, destination, size_bytes, content_hash = await receive_upload(
+                request, destination_for, max_bytes=MAX_UPLOAD_BYTES
+            )
+        except UploadTooLargeError as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        except UploadFormError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        media = await run_in_threadpool(_probe_media, destination)
+        with db.transaction():
+            db.create_job(
+                job_id,
+                filename,
+                str(destination),
+                content_hash=content_hash,
+                size_bytes=size_bytes,
+                **media,
+            )
+            db.add_event(job_id, "uploaded")
         response = JSONResponse({"job_id": job_id})
         track_request("/upload", start, response.status_code)
         return response
@@ -60,6 +178,53 @@ async def upload(file: UploadFile = File(...)) -> JSONResponse:
         raise
 
 
+JOBS_PAGE_MAX = 200
+
+
+def _encode_cursor(job: Dict[str, Any]) -> str:
+    raw = json.dumps([job["created_at"], job["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    return str(created_at), str(job_id)
+
+
+@app.get("/jobs")
+def jobs_list(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    output_type: Optional[str] = None,
+    model_name: Optional[str] = None,
+    include_text: bool = False,
+) -> JSONResponse:
+    # Historique paginé par curseur ; result_text complet seulement si include_text
+    start = time.time()
+    limit = max(1, min(limit, JOBS_PAGE_MAX))
+    try:
+        after = _decode_cursor(cursor) if cursor else None
+    except HTTPException:
+        track_request("/jobs", start, 400)
+        raise
+    jobs = db.list_jobs(
+        limit=limit + 1,
+        after=after,
+        status=status,
+        output_type=output_type,
+        model_name=model_name,
+        include_text=include_text,
+    )
+    next_cursor = _encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    response = JSONResponse({"jobs": jobs[:limit], "next_cursor": next_cursor})
+    track_request("/jobs", start, response.status_code)
+    return response
+
+
 @app.post("/jobs/{job_id}/run")
 def run_job(job_id: str, payload: RunRequest) -> JSONResponse:
     start = time.time()
@@ -68,32 +233,325 @@ def run_job(job_id: str, payload: RunRequest) -> JSONResponse:
         track_request("/jobs/{job_id}/run", start, 404)
         raise HTTPException(status_code=404, detail="Job introuvable")
     output_type = payload.output_type
-    model_name = payload.model_name or DEFAULT_MODEL
-    queue = get_queue()
-    queue.enqueue("worker.tasks.process_job", job_id, output_type, model_name)
-    db.update_job(job_id, status="queued", output_type=output_type, model_name=model_name)
-    db.add_event(job_id, "queued")
-    response = JSONResponse({"job_id": job_id, "status": "queued"})
+    # File du palier correspondant à la durée du média (plus court d'abord)
+    tier = priority_tier(job.get("media_duration_seconds"))
+    try:
+        # Au-delà de la capacité : 429, ou modèle plus rapide si le client l'accepte.
+        # Passage en "queued" dans la même transaction, avant la mise en file : un
+        # worker rapide ne peut pas voir son statut réécrit en "queued".
+        with db.transaction():
+            model_name = admit(
+                payload.model_name or DEFAULT_MODEL,
+                [job.get("media_duration_seconds")],
+                payload.allow_degrade,
+                job_ids=[job_id],
+            )
+            db.transition_job(
+                job_id,
+                "queued",
+                output_type=output_type,
+                model_name=model_name,
+                priority_key=priority_key(tier, time.time()),
+            )
+    except AdmissionRejected as exc:
+        track_request("/jobs/{job_id}/run", start, 429)
+        raise _rejected(exc, model_name=exc.model_name)
+    # Profilage à la demande, ou tiré au sort pour une fraction des jobs
+    profile = payload.profile or random.random() < PROFILE_SAMPLE_RATE
+    try:
+        if PIPELINE_MODE == "stages":
+            enqueue_stages(
+                job_id,
+                output_type,
+                model_name,
+                profile=profile,
+                transcribed=transcript_model(job_id) == model_name,
+                tier=tier,
+            )
+        else:
+            queue = get_queue(tier_queue("transcription", tier))
+            queue.enqueue("worker.tasks.process_job", job_id, output_type, model_name, profile=profile)
+    except Exception as exc:
+        # Job déjà "queued" en base : sans mise en file, il libère sa capacité
+        logger.exception("Mise en file impossible", extra={"job_id": job_id})
+        db.transition_job(job_id, "failed", error=f"Mise en file impossible: {exc}")
+        status_hub.notify(job_id)
+        track_request("/jobs/{job_id}/run", start, 503)
+        raise HTTPException(status_code=503, detail="File de traitement indisponible")
+    status_hub.notify(job_id)
+    try:
+        publish_status(get_redis(), job_id, "queued")
+    except Exception:
+        logger.warning("Notification de statut impossible", extra={"job_id": job_id})
+    response = JSONResponse({"job_id": job_id, "status": "queued", "model_name": model_name})
     track_request("/jobs/{job_id}/run", start, response.status_code)
     return response
 
 
+def _batch_runs(
+    jobs: List[Dict[str, Any]], output_type: str, model_name: str, profile: bool
+) -> List[Dict[str, Any]]:
+    return [
+        {
+            "job_id": job["id"],
+            "output_type": output_type,
+            "model_name": model_name,
+            "profile": profile or random.random() < PROFILE_SAMPLE_RATE,
+            "transcribed": PIPELINE_MODE == "stages" and transcript_model(job["id"]) == model_name,
+            "tier": priority_tier(job.get("media_duration_seconds")),
+        }
+        for job in jobs
+    ]
+
+
+def _queue_runs(runs: List[Dict[str, Any]]) -> None:
+    queued_at = time.time()
+    with db.transaction():
+        for run in runs:
+            db.transition_job(
+                run["job_id"],
+                "queued",
+                output_type=run["output_type"],
+                model_name=run["model_name"],
+                priority_key=priority_key(run["tier"], queued_at),
+            )
+
+
+def _submit_runs(runs: List[Dict[str, Any]]) -> None:
+    # Les jobs sont déjà "queued" en base : une seule mise en file groupée, et en
+    # cas d'échec Redis tout le lot passe en "failed"
+    try:
+        enqueue_runs(runs)
+    except Exception as exc:
+        logger.exception("Mise en file groupée impossible")
+        with db.transaction():
+            for run in runs:
+                db.transition_job(run["job_id"], "failed", error=f"Mise en file impossible: {exc}")
+        for run in runs:
+            status_hub.notify(run["job_id"])
+        raise HTTPException(status_code=503, detail="File de traitement indisponible")
+    try:
+        redis_conn = get_redis()
+        for run in runs:
+            status_hub.notify(run["job_id"])
+            publish_status(redis_conn, run["job_id"], "queued")
+    except Exception:
+        logger.warning("Notification de statut impossible")
+
+
+@app.post("/jobs/batch")
+async def batch_upload(
+    files: List[UploadFile] = File(...),
+    output_type: Optional[str] = Form(None),
+    model_name: Optional[str] = Form(None),
+    profile: bool = Form(False),
+    allow_degrade: bool = Form(False),
+) -> JSONResponse:
+    # Upload de plusieurs fichiers en une requête : lignes créées dans une seule
+    # transaction et, si output_type est fourni, jobs lancés dans un seul pipeline Redis
+    start = time.time()
+    try:
+        if len(files) > BATCH_REQUEST_MAX_JOBS:
+            raise HTTPException(status_code=400, detail=f"Trop de fichiers (max {BATCH_REQUEST_MAX_JOBS})")
+        for file in files:
+            if Path(file.filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+                raise HTTPException(status_code=400, detail=f"Format de fichier non supporté: {file.filename}")
+        saved = []
+        try:
+            for file in files:
+                job_id = str(uuid.uuid4())
+                destination = upload_path(job_id, file.filename)
+                size_bytes, content_hash = await save_upload(file, destination)
+                saved.append((job_id, file.filename, destination, size_bytes, content_hash))
+        except UploadTooLargeError as exc:
+            # Tout ou rien : les fichiers déjà copiés du lot sont supprimés
+            for _, _, destination, _, _ in saved:
+                destination.unlink(missing_ok=True)
+            raise HTTPException(status_code=413, detail=str(exc))
+        medias = [await run_in_threadpool(_probe_media, destination) for _, _, destination, _, _ in saved]
+        model_name = model_name or DEFAULT_MODEL
+        jobs = [{"id": job_id, **media} for (job_id, *_), media in zip(saved, medias)]
+        rejected = None
+        runs = []
+        with db.transaction():
+            for (job_id, filename, destination, size_bytes, content_hash), media in zip(saved, medias):
+                db.create_job(
+                    job_id,
+                    filename,
+                    str(destination),
+                    content_hash=content_hash,
+                    size_bytes=size_bytes,
+                    **media,
+                )
+                db.add_event(job_id, "uploaded")
+            if output_type:
+                # Admission et passage en "queued" dans la même transaction
+                try:
+                    media_seconds = [media.get("media_duration_seconds") for media in medias]
+                    model_name = admit(model_name, media_seconds, allow_degrade)
+                except AdmissionRejected as exc:
+                    # Les fichiers restent enregistrés ("uploaded") : relance via /jobs/run
+                    rejected = exc
+                else:
+                    runs = _batch_runs(jobs, output_type, model_name, profile)
+                    _queue_runs(runs)
+        job_ids = [job["id"] for job in jobs]
+        if rejected:
+            raise _rejected(rejected, model_name=rejected.model_name, job_ids=job_ids)
+        if runs:
+            await run_in_threadpool(_submit_runs, runs)
+        status = "queued" if runs else "uploaded"
+        response = JSONResponse({"job_ids": job_ids, "status": status, "model_name": model_name})
+        track_request("/jobs/batch", start, response.status_code)
+        return response
+    except HTTPException as exc:
+        track_request("/jobs/batch", start, exc.status_code)
+        raise
+
+
+@app.post("/jobs/run")
+def batch_run(payload: BatchRunRequest) -> JSONResponse:
+    # Lancement groupé de jobs existants (même sortie, même modèle)
+    start = time.time()
+    job_ids = list(dict.fromkeys(payload.job_ids))
+    if len(job_ids) > BATCH_REQUEST_MAX_JOBS:
+        track_request("/jobs/run", start, 400)
+        raise HTTPException(status_code=400, detail=f"Trop de jobs (max {BATCH_REQUEST_MAX_JOBS})")
+    jobs = {job_id: db.get_job(job_id) for job_id in job_ids}
+    missing = [job_id for job_id, job in jobs.items() if job is None]
+    if missing:
+        track_request("/jobs/run", start, 404)
+        raise HTTPException(status_code=404, detail={"message": "Jobs introuvables", "job_ids": missing})
+    media_seconds = [job.get("media_duration_seconds") for job in jobs.values()]
+    try:
+        # Admission et passage en "queued" dans la même transaction
+        with db.transaction():
+            model_name = admit(payload.model_name or DEFAULT_MODEL, media_seconds, payload.allow_degrade, job_ids)
+            runs = _batch_runs(list(jobs.values()), payload.output_type, model_name, payload.profile)
+            _queue_runs(runs)
+    except AdmissionRejected as exc:
+        track_request("/jobs/run", start, 429)
+        raise _rejected(exc, model_name=exc.model_name)
+    try:
+        _submit_runs(runs)
+    except HTTPException as exc:
+        track_request("/jobs/run", start, exc.status_code)
+        raise
+    response = JSONResponse({"job_ids": job_ids, "status": "queued", "model_name": model_name})
+    track_request("/jobs/run", start, response.status_code)
+    return response
+
+
+def _queue_estimate(job_id: str) -> Dict[str, Any]:
+    # Position (1 = prochain servi) et ETA d'un job en attente : durée média des jobs
+    # servis avant lui puis la sienne, au facteur temps réel historique du modèle,
+    # réparties sur les workers de transcription
+    ahead = db.queue_ahead(job_id)
+    if ahead is None:
+        return {}
+    jobs_ahead, media_ahead = ahead
+    job = db.get_job(job_id)
+    estimate: Dict[str, Any] = {"queue_position": jobs_ahead + 1}
+    if job["media_duration_seconds"]:
+        rtf = realtime_factor(job["model_name"])
+        wait = media_ahead * rtf / transcription_workers()
+        estimate["eta_seconds"] = round(wait + job["media_duration_seconds"] * rtf, 1)
+    return estimate
+
+
 @app.get("/jobs/{job_id}/status", response_model=JobStatus)
-def job_status(job_id: str) -> JobStatus:
+async def job_status(job_id: str, wait: float = 0, since: Optional[str] = None) -> JobStatus:
+    # wait > 0 : long-poll, réponse dès que le statut diffère de `since` (par défaut
+    # le statut courant) ou après `wait` secondes
+    start = time.time()
+    status = status_hub.cached(job_id) or await run_in_threadpool(status_hub.load, job_id)
+    if status and wait > 0:
+        known = since or status["status"]
+        status = await status_hub.wait_for_change(job_id, known, min(wait, LONG_POLL_MAX_SECONDS))
+    if not status:
+        track_request("/jobs/{job_id}/status", start, 404)
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    estimate = await run_in_threadpool(_queue_estimate, job_id) if status["status"] == "queued" else {}
+    response = JobStatus(job_id=job_id, **status, **estimate)
+    track_request("/jobs/{job_id}/status", start, 200)
+    return response
+
+
+async def _push_status(websocket: WebSocket, job_id: str, status: Dict[str, Any]) -> None:
+    while True:
+        await websocket.send_json({"job_id": job_id, **status})
+        if status["status"] in TERMINAL_EVENTS:
+            return
+        known = status["status"]
+        while status is not None and status["status"] == known:
+            status = await status_hub.wait_for_change(job_id, known, LONG_POLL_MAX_SECONDS)
+        if status is None:
+            return
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@app.websocket("/jobs/{job_id}/ws")
+async def job_status_ws(websocket: WebSocket, job_id: str) -> None:
+    # Un message JSON par changement de statut ; fermeture après completed/failed
+    await websocket.accept()
+    status = status_hub.cached(job_id) or await run_in_threadpool(status_hub.load, job_id)
+    if status is None:
+        await websocket.close(code=4404, reason="Job introuvable")
+        return
+    push = asyncio.ensure_future(_push_status(websocket, job_id, status))
+    disconnect = asyncio.ensure_future(_until_disconnect(websocket))
+    done, pending = await asyncio.wait({push, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    if push in done and push.exception() is None:
+        await websocket.close()
+
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _stream_events(job_id: str, last_id: str) -> Iterator[str]:
+    redis_conn = get_redis()
+    block_ms = None
+    while True:
+        entries = read_partials(redis_conn, job_id, last_id, block_ms)
+        for entry_id, event, data in entries:
+            last_id = entry_id
+            yield _sse(event, data, entry_id)
+            if event in TERMINAL_EVENTS:
+                return
+        if not entries:
+            # Flux expiré ou job terminé avant l'abonnement : état final depuis la DB
+            job = db.get_job(job_id)
+            if job["status"] in TERMINAL_EVENTS:
+                yield _sse(job["status"], {"status": job["status"], "error": job.get("error")})
+                return
+            if block_ms is not None:
+                yield ": keep-alive\n\n"
+        block_ms = SSE_BLOCK_MS
+
+
+@app.get("/jobs/{job_id}/stream")
+def job_stream(job_id: str, last_event_id: Optional[str] = Header(None)) -> StreamingResponse:
+    # Server-Sent Events : segments transcrits au fil de l'eau, progression et ETA
     start = time.time()
     job = db.get_job(job_id)
     if not job:
-        track_request("/jobs/{job_id}/status", start, 404)
+        track_request("/jobs/{job_id}/stream", start, 404)
         raise HTTPException(status_code=404, detail="Job introuvable")
-    response = JobStatus(
-        job_id=job_id,
-        status=job["status"],
-        output_type=job.get("output_type"),
-        output_path=job.get("output_path"),
-        result_text=job.get("result_text"),
-        error=job.get("error"),
+    response = StreamingResponse(
+        _stream_events(job_id, last_event_id or "0"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    track_request("/jobs/{job_id}/status", start, 200)
+    track_request("/jobs/{job_id}/stream", start, response.status_code)
     return response
 
 
@@ -120,6 +578,36 @@ def job_result(job_id: str):
     return response
 
 
+@app.get("/jobs/{job_id}/export/{fmt}")
+def job_export(job_id: str, fmt: str):
+    # SRT/VTT/JSON rendus depuis les chunks enregistrés, sans nouvelle inférence ;
+    # pour une vidéo, relancer /run avec le type de sortie voulu (rendu seul)
+    start = time.time()
+    if fmt not in EXPORTERS:
+        track_request("/jobs/{job_id}/export", start, 400)
+        raise HTTPException(status_code=400, detail="Format d'export inconnu")
+    if not db.get_job(job_id):
+        track_request("/jobs/{job_id}/export", start, 404)
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    path = export_path(job_id, fmt)
+    if not path.exists():
+        transcription = load_transcript(job_id)
+        if transcription is None:
+            track_request("/jobs/{job_id}/export", start, 409)
+            raise HTTPException(status_code=409, detail="Transcription non disponible")
+        # Fichier temporaire propre à chaque requête : deux exports simultanés
+        # (même format ou non) ne partagent jamais le même fichier
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+        ) as target:
+            target.write(export_text(transcription, fmt))
+        os.replace(target.name, path)
+    _, media_type = EXPORTERS[fmt]
+    response = FileResponse(path, filename=f"{job_id}.{fmt}", media_type=media_type)
+    track_request("/jobs/{job_id}/export", start, response.status_code)
+    return response
+
+
 @app.get("/jobs/{job_id}/preview", response_class=HTMLResponse)
 def job_preview(job_id: str) -> HTMLResponse:
     start = time.time()
@@ -140,6 +628,28 @@ def job_preview(job_id: str) -> HTMLResponse:
     return response
 
 
+@app.get("/jobs/{job_id}/profile")
+def job_profile(job_id: str, format: str = "pstats"):
+    start = time.time()
+    if not db.get_job(job_id):
+        track_request("/jobs/{job_id}/profile", start, 404)
+        raise HTTPException(status_code=404, detail="Job introuvable")
+    path = profile_path(job_id)
+    if not path.exists():
+        track_request("/jobs/{job_id}/profile", start, 404)
+        raise HTTPException(status_code=404, detail="Pas de profil pour ce job")
+    if format == "text":
+        # Résumé lisible : fonctions triées par temps cumulé
+        buffer = io.StringIO()
+        pstats.Stats(str(path), stream=buffer).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        response = PlainTextResponse(buffer.getvalue())
+    else:
+        # Fichier pstats brut, à ouvrir avec snakeviz ou python -m pstats
+        response = FileResponse(path, filename=path.name, media_type="application/octet-stream")
+    track_request("/jobs/{job_id}/profile", start, response.status_code)
+    return response
+
+
 @app.get("/admin/metrics")
 def admin_metrics() -> JSONResponse:
     start = time.time()
@@ -151,5 +661,7 @@ def admin_metrics() -> JSONResponse:
 
 @app.get("/metrics")
 def prometheus_metrics():
+    # Jauges d'admission recalculées à chaque scrape (la file se vide aussi sans soumission)
+    refresh_gauges()
     data = generate_latest()
     return HTMLResponse(content=data, media_type=CONTENT_TYPE_LATEST)
@@ -1,20 +1,122 @@
+import os
 import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from api.settings import DB_PATH
+from api.settings import DB_PATH, METRICS_CACHE_TTL_SECONDS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS
+
+# Une connexion persistante par thread (et par processus : une connexion
+# SQLite ne doit pas traverser un fork).
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
 
 
 def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=256,
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    _local.conn = conn
+    _local.pid = os.getpid()
+    _local.depth = 0
+    _ensure_schema()
     return conn
 
 
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    # Transaction d'écriture unique ; les appels imbriqués rejoignent la transaction englobante
+    conn = _connect()
+    if _local.depth:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    _local.depth = 1
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _local.depth = 0
+
+
+def _ensure_schema() -> None:
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            _schema_ready = True
+            init_db()
+
+
+# Colonnes ajoutées après la création initiale du schéma
+_JOB_COLUMNS = {
+    "content_hash": "TEXT",
+    "size_bytes": "INTEGER",
+    "started_at": "TEXT",
+    "media_duration_seconds": "REAL",
+    "audio_codec": "TEXT",
+    "video_codec": "TEXT",
+    "priority_key": "REAL",
+    "vad_skipped_ratio": "REAL",
+}
+
+
+def _migrate(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, column_type in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+# Index (filtre, created_at, id) : la pagination par curseur de list_jobs lit
+# l'index dans l'ordre, sans tri ni parcours de table
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_output_type_created ON jobs (output_type, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_model_created ON jobs (model_name, created_at, id)",
+    # Position dans la file d'attente (jobs "queued" par échéance virtuelle)
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_priority ON jobs (status, priority_key)",
+    "CREATE INDEX IF NOT EXISTS idx_job_events_job_id ON job_events (job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_result_cache_last_used ON result_cache (last_used_at)",
+]
+
+# Colonnes renvoyées par les listings (sans les champs volumineux)
+_LIST_COLUMNS = (
+    "id, filename, output_type, output_path, status, error, model_name, "
+    "created_at, updated_at, duration_seconds, substr(result_text, 1, 200) AS result_preview"
+)
+
+PENDING_STATUSES = ("queued", "processing")
+
+
 def init_db() -> None:
-    with _connect() as conn:
+    with transaction() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS jobs (
@@ -29,7 +131,30 @@ def init_db() -> None:
                 model_name TEXT,
                 created_at TEXT NOT NULL,
                 updated_at TEXT NOT NULL,
-                duration_seconds REAL
+                duration_seconds REAL,
+                content_hash TEXT,
+                size_bytes INTEGER,
+                started_at TEXT
+            )
+            """
+        )
+        _migrate(conn, "jobs", _JOB_COLUMNS)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+                key TEXT PRIMARY KEY,
+                size_bytes INTEGER NOT NULL DEFAULT 0,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                last_used_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL DEFAULT 0
             )
             """
         )
@@ -43,23 +168,93 @@ def init_db() -> None:
             )
             """
         )
-        conn.commit()
+        for statement in _INDEXES:
+            conn.execute(statement)
+        if conn.execute("SELECT 1 FROM counters WHERE name = 'jobs:total'").fetchone() is None:
+            _rebuild_job_counters(conn)
 
 
 def _now() -> str:
     return datetime.utcnow().isoformat()
 
 
-def create_job(job_id: str, filename: str, input_path: str) -> None:
-    with _connect() as conn:
+def _job_counters(job: Optional[Dict[str, Any]]) -> Counter:
+    # Contribution d'une ligne de `jobs` aux compteurs agrégés
+    counters: Counter = Counter()
+    if job is None:
+        return counters
+    output_type = job.get("output_type") or "unknown"
+    counters["jobs:total"] += 1
+    counters[f"jobs:status:{job['status']}"] += 1
+    counters[f"jobs:type:{output_type}"] += 1
+    if job["status"] == "failed":
+        counters[f"jobs:failed_type:{output_type}"] += 1
+    if job["status"] in PENDING_STATUSES:
+        counters[f"jobs:pending_type:{output_type}"] += 1
+    if job.get("duration_seconds") is not None:
+        counters["jobs:duration_sum"] += job["duration_seconds"]
+        counters["jobs:duration_count"] += 1
+    return counters
+
+
+def _apply_job_counters(
+    conn: sqlite3.Connection,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+) -> None:
+    delta = _job_counters(after)
+    delta.subtract(_job_counters(before))
+    conn.executemany(
+        """
+        INSERT INTO counters (name, value) VALUES (?, ?)
+        ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        """,
+        [(name, value) for name, value in delta.items() if value],
+    )
+
+
+def _rebuild_job_counters(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM counters WHERE name LIKE 'jobs:%'")
+    conn.execute("INSERT INTO counters (name, value) VALUES ('jobs:total', 0)")
+    rows = conn.execute(
+        "SELECT status, output_type, duration_seconds FROM jobs"
+    ).fetchall()
+    for row in rows:
+        _apply_job_counters(conn, None, dict(row))
+
+
+def create_job(
+    job_id: str,
+    filename: str,
+    input_path: str,
+    content_hash: Optional[str] = None,
+    size_bytes: Optional[int] = None,
+    media_duration_seconds: Optional[float] = None,
+    audio_codec: Optional[str] = None,
+    video_codec: Optional[str] = None,
+) -> None:
+    with transaction() as conn:
         conn.execute(
             """
-            INSERT INTO jobs (id, filename, input_path, status, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT INTO jobs (id, filename, input_path, status, created_at, updated_at,
+                              content_hash, size_bytes, media_duration_seconds, audio_codec, video_codec)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (job_id, filename, input_path, "uploaded", _now(), _now()),
+            (
+                job_id,
+                filename,
+                input_path,
+                "uploaded",
+                _now(),
+                _now(),
+                content_hash,
+                size_bytes,
+                media_duration_seconds,
+                audio_codec,
+                video_codec,
+            ),
         )
-        conn.commit()
+        _apply_job_counters(conn, None, {"status": "uploaded"})
 
 
 def update_job(job_id: str, **fields: Any) -> None:
@@ -68,64 +263,241 @@ def update_job(job_id: str, **fields: Any) -> None:
     fields["updated_at"] = _now()
     columns = ", ".join([f"{key} = ?" for key in fields.keys()])
     values = list(fields.values())
-    with _connect() as conn:
+    with transaction() as conn:
+        before = conn.execute(
+            "SELECT status, output_type, duration_seconds FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if before is None:
+            return
         conn.execute(
             f"UPDATE jobs SET {columns} WHERE id = ?",
             (*values, job_id),
         )
-        conn.commit()
+        before = dict(before)
+        after = {**before, **{key: fields[key] for key in before if key in fields}}
+        _apply_job_counters(conn, before, after)
+
+
+def transition_job(job_id: str, status: str, **fields: Any) -> None:
+    # Changement de statut + événement associé, validés ensemble (un seul commit)
+    with transaction():
+        update_job(job_id, status=status, **fields)
+        add_event(job_id, status)
 
 
 def get_job(job_id: str) -> Optional[Dict[str, Any]]:
-    with _connect() as conn:
-        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn = _connect()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
     return dict(row) if row else None
 
 
-def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
-    with _connect() as conn:
-        rows = conn.execute(
-            "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
-        ).fetchall()
+def list_jobs(
+    limit: int = 50,
+    after: Optional[Tuple[str, str]] = None,
+    status: Optional[str] = None,
+    output_type: Optional[str] = None,
+    model_name: Optional[str] = None,
+    include_text: bool = False,
+) -> List[Dict[str, Any]]:
+    # Jobs du plus récent au plus ancien ; `after` = (created_at, id) du dernier job
+    # de la page précédente (pagination par curseur, sans OFFSET)
+    columns = _LIST_COLUMNS + (", result_text" if include_text else "")
+    clauses: List[str] = []
+    params: List[Any] = []
+    filters = {"status": status, "output_type": output_type, "model_name": model_name}
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if after is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _connect()
+    rows = conn.execute(
+        f"SELECT {columns} FROM jobs {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+        (*params, limit),
+    ).fetchall()
     return [dict(row) for row in rows]
 
 
+def queue_ahead(job_id: str) -> Optional[Tuple[int, float]]:
+    # Jobs "queued" servis avant celui-ci (échéance virtuelle plus petite) : nombre
+    # et durée média cumulée. None si le job n'est pas en attente.
+    conn = _connect()
+    row = conn.execute(
+        "SELECT priority_key FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)
+    ).fetchone()
+    if row is None or row["priority_key"] is None:
+        return None
+    ahead = conn.execute(
+        """
+        SELECT COUNT(*) AS jobs, COALESCE(SUM(media_duration_seconds), 0) AS media_seconds
+        FROM jobs WHERE status = 'queued' AND priority_key < ?
+        """,
+        (row["priority_key"],),
+    ).fetchone()
+    return ahead["jobs"], ahead["media_seconds"]
+
+
+def queued_media_seconds(unknown_seconds: float, exclude: Sequence[str] = ()) -> Dict[str, float]:
+    # Audio en attente ou en cours par modèle (durée inconnue → unknown_seconds),
+    # hors jobs de la requête en cours (une relance ne se compte pas deux fois)
+    conn = _connect()
+    placeholders = ", ".join("?" for _ in exclude)
+    rows = conn.execute(
+        f"""
+        SELECT model_name, SUM(COALESCE(media_duration_seconds, ?)) AS seconds
+        FROM jobs WHERE status IN ('queued', 'processing') AND id NOT IN ({placeholders})
+        GROUP BY model_name
+        """,
+        (unknown_seconds, *exclude),
+    ).fetchall()
+    return {row["model_name"]: row["seconds"] for row in rows}
+
+
+def realtime_factor(model_name: Optional[str], history: int) -> Optional[float]:
+    # Temps de traitement / durée média sur les derniers jobs terminés du modèle
+    conn = _connect()
+    row = conn.execute(
+        """
+        SELECT SUM(duration_seconds) AS spent, SUM(media_duration_seconds) AS media
+        FROM (
+            SELECT duration_seconds, media_duration_seconds FROM jobs
+            WHERE status = 'completed' AND model_name IS ? AND media_duration_seconds > 0
+                AND duration_seconds IS NOT NULL
+            ORDER BY created_at DESC LIMIT ?
+        )
+        """,
+        (model_name, history),
+    ).fetchone()
+    if not row["media"]:
+        return None
+    return row["spent"] / row["media"]
+
+
 def add_event(job_id: str, event: str) -> None:
-    with _connect() as conn:
+    with transaction() as conn:
         conn.execute(
             "INSERT INTO job_events (job_id, event, created_at) VALUES (?, ?, ?)",
             (job_id, event, _now()),
         )
-        conn.commit()
 
 
-def get_metrics() -> Dict[str, Any]:
-    with _connect() as conn:
-        total = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
-        avg_duration = conn.execute(
-            "SELECT AVG(duration_seconds) FROM jobs WHERE duration_seconds IS NOT NULL"
-        ).fetchone()[0]
-        by_type = conn.execute(
-            "SELECT output_type, COUNT(*) as count FROM jobs GROUP BY output_type"
-        ).fetchall()
-        by_status = conn.execute(
-            "SELECT status, COUNT(*) as count FROM jobs GROUP BY status"
-        ).fetchall()
-        failed_by_type = conn.execute(
-            "SELECT output_type, COUNT(*) as count FROM jobs WHERE status = 'failed' GROUP BY output_type"
-        ).fetchall()
-        pending_by_type = conn.execute(
-            "SELECT output_type, COUNT(*) as count FROM jobs WHERE status IN ('queued', 'processing') GROUP BY output_type"
-        ).fetchall()
+def increment_counter(name: str, amount: float = 1) -> None:
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+            """,
+            (name, amount),
+        )
+
+
+def get_counters(prefix: str = "") -> Dict[str, float]:
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT name, value FROM counters WHERE name LIKE ?", (f"{prefix}%",)
+    ).fetchall()
+    return {row["name"]: row["value"] for row in rows}
+
+
+def get_cache_entry(key: str) -> Optional[Dict[str, Any]]:
+    conn = _connect()
+    row = conn.execute("SELECT * FROM result_cache WHERE key = ?", (key,)).fetchone()
+    return dict(row) if row else None
+
+
+def touch_cache_entry(key: str) -> None:
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE result_cache SET hits = hits + 1, last_used_at = ? WHERE key = ?",
+            (_now(), key),
+        )
+
+
+def upsert_cache_entry(key: str, size_bytes: int) -> None:
+    with transaction() as conn:
+        conn.execute(
+            """
+            INSERT INTO result_cache (key, size_bytes, created_at, last_used_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET size_bytes = excluded.size_bytes,
+                                           last_used_at = excluded.last_used_at
+            """,
+            (key, size_bytes, _now(), _now()),
+        )
+
+
+def delete_cache_entry(key: str) -> None:
+    with transaction() as conn:
+        conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+
+
+def list_cache_entries_lru() -> List[Dict[str, Any]]:
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT key, size_bytes FROM result_cache ORDER BY last_used_at ASC"
+    ).fetchall()
+    return [dict(row) for row in rows]
+
 
+def get_result_cache_stats() -> Dict[str, Any]:
+    conn = _connect()
+    entries, total_bytes = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM result_cache"
+    ).fetchone()
+    counters = get_counters("result_cache:")
+    hits = int(counters.get("result_cache:hits", 0))
+    misses = int(counters.get("result_cache:misses", 0))
+    lookups = hits + misses
     return {
-        "total_jobs": total,
-        "average_duration_seconds": avg_duration or 0.0,
-        "by_type": {row[0] or "unknown": row[1] for row in by_type},
-        "by_status": {row[0]: row[1] for row in by_status},
-        "failed_by_type": {row[0] or "unknown": row[1] for row in failed_by_type},
-        "pending_by_type": {row[0] or "unknown": row[1] for row in pending_by_type},
-        "pending_total": sum(row[1] for row in pending_by_type),
-        "failed_total": sum(row[1] for row in failed_by_type),
+        "entries": entries,
+        "bytes": total_bytes,
+        "hits": hits,
+        "misses": misses,
+        "evictions": int(counters.get("result_cache:evictions", 0)),
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+_metrics_snapshot: Dict[str, Any] = {"expires_at": 0.0, "data": None}
+
+
+def get_metrics() -> Dict[str, Any]:
+    # Lecture des compteurs maintenus à chaque transition : coût indépendant du
+    # nombre de jobs. Instantané partagé pendant METRICS_CACHE_TTL_SECONDS.
+    now = time.monotonic()
+    if _metrics_snapshot["data"] is not None and now < _metrics_snapshot["expires_at"]:
+        return _metrics_snapshot["data"]
+
+    counters = get_counters("jobs:")
+
+    def group(prefix: str) -> Dict[str, int]:
+        return {
+            name[len(prefix):]: int(value)
+            for name, value in counters.items()
+            if name.startswith(prefix) and value
+        }
+
+    duration_count = counters.get("jobs:duration_count", 0)
+    pending_by_type = group("jobs:pending_type:")
+    failed_by_type = group("jobs:failed_type:")
+    data = {
+        "total_jobs": int(counters.get("jobs:total", 0)),
+        "average_duration_seconds": (
+            counters.get("jobs:duration_sum", 0.0) / duration_count if duration_count else 0.0
+        ),
+        "by_type": group("jobs:type:"),
+        "by_status": group("jobs:status:"),
+        "failed_by_type": failed_by_type,
+        "pending_by_type": pending_by_type,
+        "pending_total": sum(pending_by_type.values()),
+        "failed_total": sum(failed_by_type.values()),
         "recent_responses": list_jobs(limit=20),
+        "result_cache": get_result_cache_stats(),
     }
+    _metrics_snapshot["data"] = data
+    _metrics_snapshot["expires_at"] = now + METRICS_CACHE_TTL_SECONDS
+    return data
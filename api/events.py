@@ -0,0 +1,53 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from redis import Redis
+
+# Flux Redis des résultats partiels d'un job (borné, expire après la fin du job)
+PARTIALS_MAXLEN = 10000
+PARTIALS_TTL_SECONDS = 24 * 3600
+
+TERMINAL_EVENTS = {"completed", "failed"}
+
+# Canal pub/sub unique des changements de statut (un abonné par processus API)
+STATUS_CHANNEL = "jobs:status"
+
+
+def partials_key(job_id: str) -> str:
+    return f"job:{job_id}:partials"
+
+
+def publish_partial(redis_conn: Redis, job_id: str, event: str, payload: Dict[str, Any]) -> None:
+    key = partials_key(job_id)
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.xadd(
+        key,
+        {"event": event, "data": json.dumps(payload)},
+        maxlen=PARTIALS_MAXLEN,
+        approximate=True,
+    )
+    pipe.expire(key, PARTIALS_TTL_SECONDS)
+    pipe.execute()
+
+
+def publish_status(redis_conn: Redis, job_id: str, status: str) -> None:
+    redis_conn.publish(STATUS_CHANNEL, json.dumps({"job_id": job_id, "status": status}))
+
+
+def read_partials(
+    redis_conn: Redis, job_id: str, last_id: str = "0", block_ms: Optional[int] = None
+) -> List[Tuple[str, str, Dict[str, Any]]]:
+    # Renvoie les événements postérieurs à last_id : (id, type, données)
+    response = redis_conn.xread({partials_key(job_id): last_id}, block=block_ms)
+    events = []
+    for _, entries in response or []:
+        for entry_id, fields in entries:
+            entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            fields = {
+                (key.decode() if isinstance(key, bytes) else key): (
+                    value.decode() if isinstance(value, bytes) else value
+                )
+                for key, value in fields.items()
+            }
+            events.append((entry_id, fields["event"], json.loads(fields["data"])))
+    return events
@@ -0,0 +1,17 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+REQUEST_COUNT = Counter(
+    "api_requests_total", "Total API requests", ["endpoint", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "api_request_latency_seconds", "API request latency", ["endpoint"]
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued_audio_seconds", "Queued audio seconds counted by admission control", ["model"]
+)
+ADMISSION_CAPACITY = Gauge(
+    "admission_capacity_audio_seconds", "Admission capacity in audio seconds (0 = unlimited)", ["model"]
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total", "Admission decisions on job submission", ["model", "decision"]
+)
@@ -1,10 +1,17 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class RunRequest(BaseModel):
     output_type: str
     model_name: Optional[str] = None
+    profile: bool = False
+    # Au-delà de la capacité du modèle, bascule sur un modèle plus rapide plutôt qu'un 429
+    allow_degrade: bool = False
+
+
+class BatchRunRequest(RunRequest):
+    job_ids: List[str]
 
 
 class JobStatus(BaseModel):
@@ -14,3 +21,6 @@ class JobStatus(BaseModel):
     output_path: Optional[str] = None
     result_text: Optional[str] = None
     error: Optional[str] = None
+    vad_skipped_ratio: Optional[float] = None
+    queue_position: Optional[int] = None
+    eta_seconds: Optional[float] = None
@@ -1,9 +1,143 @@
-from rq import Queue
-from redis import Redis
+import bisect
+import os
+from typing import Any, Dict, List, Optional, Tuple
 
-from api.settings import REDIS_URL
+from rq import Queue, Worker
+from rq.job import Job
+from redis import ConnectionPool, Redis
 
+from api.settings import (
+    EXTRACT_QUEUE,
+    PIPELINE_MODE,
+    PRIORITY_AGING_SECONDS,
+    PRIORITY_TIER_SECONDS,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_URL,
+    RENDER_QUEUE,
+    SUBTITLE_QUEUE,
+    TRANSCRIBE_QUEUE,
+)
 
-def get_queue() -> Queue:
-    redis_conn = Redis.from_url(REDIS_URL)
-    return Queue("transcription", connection=redis_conn)
+VIDEO_OUTPUTS = ("embedded_video", "metadata_video")
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+
+
+def get_redis() -> Redis:
+    # Pool de connexions partagé par le processus (recréé après un fork)
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+        _pool_pid = os.getpid()
+    return Redis(connection_pool=_pool)
+
+
+def get_queue(name: str = "transcription") -> Queue:
+    return Queue(name, connection=get_redis())
+
+
+def transcription_workers() -> int:
+    # Workers RQ qui écoutent la file de transcription (au moins 1 pour les estimations)
+    try:
+        return max(1, Worker.count(queue=get_queue(TRANSCRIBE_QUEUE)))
+    except Exception:
+        return 1
+
+
+def priority_tier(media_seconds: Optional[float]) -> int:
+    # Palier 0 = médias les plus courts ; durée inconnue → dernier palier
+    if not media_seconds:
+        return len(PRIORITY_TIER_SECONDS)
+    return bisect.bisect_right(PRIORITY_TIER_SECONDS, media_seconds)
+
+
+def tier_queue(name: str, tier: int) -> str:
+    # Le palier 0 garde le nom de base de la file
+    return name if tier == 0 else f"{name}-{tier}"
+
+
+def tier_queues(name: str) -> List[str]:
+    return [tier_queue(name, tier) for tier in range(len(PRIORITY_TIER_SECONDS) + 1)]
+
+
+def priority_key(tier: int, enqueued_at: float) -> float:
+    # Échéance virtuelle : trier par enqueued_at + palier × PRIORITY_AGING_SECONDS revient
+    # à faire gagner un palier à un job toutes les PRIORITY_AGING_SECONDS d'attente
+    return enqueued_at + tier * PRIORITY_AGING_SECONDS
+
+
+def _stage_plan(output_type: str, transcribed: bool) -> List[Tuple[str, str]]:
+    # Étapes (nom, file) d'un job en PIPELINE_MODE=stages. Si les chunks du job
+    # sont déjà enregistrés, seules les étapes de sortie partent.
+    stages = [] if transcribed else [("extract", EXTRACT_QUEUE), ("transcribe", TRANSCRIBE_QUEUE)]
+    stages.append(("subtitle", SUBTITLE_QUEUE))
+    if output_type in VIDEO_OUTPUTS:
+        stages.append(("render", RENDER_QUEUE))
+    return stages
+
+
+def enqueue_stages(
+    job_id: str,
+    output_type: str,
+    model_name: str,
+    profile: bool = False,
+    transcribed: bool = False,
+    tier: int = 0,
+) -> Optional[Job]:
+    # Chaîne extract → transcribe → subtitle (→ render pour les vidéos) : chaque
+    # étape attend la précédente (depends_on) et part sur sa propre file, au palier du job.
+    redis_conn = get_redis()
+    previous = None
+    for stage, queue_name in _stage_plan(output_type, transcribed):
+        previous = Queue(tier_queue(queue_name, tier), connection=redis_conn).enqueue(
+            f"worker.tasks.{stage}_stage",
+            job_id,
+            output_type,
+            model_name,
+            profile=profile,
+            job_id=f"{job_id}-{stage}",
+            depends_on=previous,
+        )
+    return previous
+
+
+def enqueue_runs(runs: List[Dict[str, Any]]) -> None:
+    # Mise en file groupée : un enqueue_many (un pipeline Redis) par file et par
+    # niveau d'étape, quel que soit le nombre de jobs.
+    # runs : dicts job_id, output_type, model_name, profile, transcribed, tier
+    redis_conn = get_redis()
+    if PIPELINE_MODE != "stages":
+        by_queue: Dict[str, list] = {}
+        for run in runs:
+            by_queue.setdefault(tier_queue("transcription", run["tier"]), []).append(
+                Queue.prepare_data(
+                    "worker.tasks.process_job",
+                    (run["job_id"], run["output_type"], run["model_name"]),
+                    {"profile": run["profile"]},
+                )
+            )
+        for queue_name, job_datas in by_queue.items():
+            Queue(queue_name, connection=redis_conn).enqueue_many(job_datas)
+        return
+    # Les dépendances doivent exister avant leurs dépendants : niveau par niveau
+    levels: List[Dict[str, list]] = []
+    for run in runs:
+        previous = None
+        for level, (stage, queue_name) in enumerate(_stage_plan(run["output_type"], run["transcribed"])):
+            if level == len(levels):
+                levels.append({})
+            stage_job_id = f"{run['job_id']}-{stage}"
+            levels[level].setdefault(tier_queue(queue_name, run["tier"]), []).append(
+                Queue.prepare_data(
+                    f"worker.tasks.{stage}_stage",
+                    (run["job_id"], run["output_type"], run["model_name"]),
+                    {"profile": run["profile"]},
+                    job_id=stage_job_id,
+                    depends_on=previous,
+                )
+            )
+            previous = stage_job_id
+    for level in levels:
+        for queue_name, job_datas in level.items():
+            Queue(queue_name, connection=redis_conn).enqueue_many(job_datas)
@@ -10,7 +10,8 @@ from transcription.models.registry import load_model
 app = FastAPI()
 templates = Jinja2Templates(directory="web/templates")
 
-MODEL = load_model("whisper")
+# Chargé à la première transcription (cache du registre), pas à l'import
+SERVER_MODEL = "whisper"
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -39,7 +40,7 @@ async def transcribe_endpoint(
     video_path = Path("output_video") / f"{base_name}_subtitled.mp4"
 
     extract_audio(input_path, audio_path)
-    transcription = MODEL.transcribe(audio_path)
+    transcription = load_model(SERVER_MODEL).transcribe(audio_path)
     generate_srt(transcription, srt_path)
 
     # 3. Selon output demandé
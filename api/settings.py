@@ -5,9 +5,121 @@ BASE_DIR = Path(os.getenv("APP_BASE_DIR", Path.cwd()))
 STORAGE_DIR = BASE_DIR / "storage"
 UPLOAD_DIR = STORAGE_DIR / "uploads"
 RESULT_DIR = STORAGE_DIR / "results"
+CACHE_DIR = STORAGE_DIR / "cache"
 DB_PATH = STORAGE_DIR / "jobs.db"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# NORMAL en WAL : pas de fsync par commit, durabilité assurée au checkpoint
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+METRICS_CACHE_TTL_SECONDS = float(os.getenv("METRICS_CACHE_TTL_SECONDS", "2"))
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+# Taille max du pool de connexions Redis par processus (vide = illimitée)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS") or 0) or None
 DEFAULT_MODEL = os.getenv("TRANSCRIPTION_MODEL", "whisper")
 
+# "single" : un job à la fois ; "batch" : plusieurs jobs par passe du modèle ;
+# "pool" : modèle chargé une fois puis N processus forkés qui partagent ses poids
+WORKER_MODE = os.getenv("WORKER_MODE", "single")
+# Mode pool : nombre de processus entre POOL_MIN_WORKERS et POOL_MAX_WORKERS, un
+# processus par POOL_JOBS_PER_WORKER jobs en file, réévalué toutes les
+# POOL_SCALE_INTERVAL_SECONDS ; threads torch par processus (0 = CPU / POOL_MAX_WORKERS)
+POOL_MIN_WORKERS = int(os.getenv("POOL_MIN_WORKERS", "1"))
+POOL_MAX_WORKERS = int(os.getenv("POOL_MAX_WORKERS", str(os.cpu_count() or 1)))
+POOL_JOBS_PER_WORKER = int(os.getenv("POOL_JOBS_PER_WORKER", "2"))
+POOL_SCALE_INTERVAL_SECONDS = float(os.getenv("POOL_SCALE_INTERVAL_SECONDS", "5"))
+POOL_THREADS_PER_WORKER = int(os.getenv("POOL_THREADS_PER_WORKER", "0"))
+# Mode pool : fichiers de métriques des enfants (mode multiprocessus de
+# prometheus_client), agrégés sur le seul /metrics du superviseur. Local au conteneur.
+POOL_METRICS_DIR = Path(os.getenv("POOL_METRICS_DIR", "/tmp/pool-metrics"))
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "8"))
+BATCH_WINDOW_SECONDS = float(os.getenv("BATCH_WINDOW_SECONDS", "2"))
+
+# "monolithic" : un seul job RQ par transcription ; "stages" : extract →
+# transcribe → subtitle → render, chaque étape sur sa propre file
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "monolithic")
+EXTRACT_QUEUE = os.getenv("EXTRACT_QUEUE", "extract")
+TRANSCRIBE_QUEUE = os.getenv("TRANSCRIBE_QUEUE", "transcription")
+SUBTITLE_QUEUE = os.getenv("SUBTITLE_QUEUE", "subtitle")
+RENDER_QUEUE = os.getenv("RENDER_QUEUE", "render")
+# Plus court d'abord : chaque file est déclinée en paliers selon la durée du média
+# sondée à l'upload. Bornes en secondes ("120,1200" : < 2 min, < 20 min, au-delà ou
+# durée inconnue) ; vide = une seule file par étape.
+PRIORITY_TIER_SECONDS = sorted(
+    float(bound) for bound in os.getenv("PRIORITY_TIER_SECONDS", "120,1200").split(",") if bound.strip()
+)
+# Vieillissement : un job en attente gagne un palier toutes les PRIORITY_AGING_SECONDS
+PRIORITY_AGING_SECONDS = float(os.getenv("PRIORITY_AGING_SECONDS", "600"))
+# ETA : facteur temps réel moyen des ETA_HISTORY_JOBS derniers jobs terminés du
+# modèle, ETA_DEFAULT_REALTIME_FACTOR tant qu'il n'y a pas d'historique
+ETA_HISTORY_JOBS = int(os.getenv("ETA_HISTORY_JOBS", "200"))
+ETA_DEFAULT_REALTIME_FACTOR = float(os.getenv("ETA_DEFAULT_REALTIME_FACTOR", "1.0"))
+# Contrôle d'admission : secondes d'audio en attente (jobs queued + processing)
+# acceptées par modèle, 0 = illimité. ADMISSION_MODEL_CAPACITY surcharge par
+# modèle ("whisper=3600,whisper-base-int8=14400"). Un média de durée inconnue
+# compte pour ADMISSION_UNKNOWN_MEDIA_SECONDS.
+ADMISSION_CAPACITY_SECONDS = float(os.getenv("ADMISSION_CAPACITY_SECONDS", "0"))
+ADMISSION_MODEL_CAPACITY = {
+    name.strip(): float(value)
+    for name, _, value in (item.partition("=") for item in os.getenv("ADMISSION_MODEL_CAPACITY", "").split(","))
+    if name.strip() and value.strip()
+}
+ADMISSION_UNKNOWN_MEDIA_SECONDS = float(os.getenv("ADMISSION_UNKNOWN_MEDIA_SECONDS", "600"))
+# Modèles du plus lent au plus rapide : avec "allow_degrade", un job refusé bascule
+# sur le premier modèle plus rapide de la liste qui a encore de la capacité
+ADMISSION_DEGRADE_CHAIN = [
+    name.strip()
+    for name in os.getenv(
+        "ADMISSION_DEGRADE_CHAIN",
+        "whisper,whisper-int8,whisper-small,whisper-small-int8,whisper-base,whisper-base-int8",
+    ).split(",")
+    if name.strip()
+]
+# Files écoutées par un worker (séparées par des virgules)
+# Port de l'endpoint Prometheus de chaque worker (0 = désactivé)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+WORKER_QUEUES = [name.strip() for name in os.getenv("WORKER_QUEUES", "transcription").split(",") if name.strip()]
+
+# Conserve le WAV 16 kHz extrait dans storage/results (débogage) ; sinon l'audio
+# est décodé uniquement en mémoire
+KEEP_INTERMEDIATE_AUDIO = os.getenv("KEEP_INTERMEDIATE_AUDIO", "0") == "1"
+
+# Transcription répartie des longs enregistrements sur un pool de répliques
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "1"))
+SHARD_MIN_SECONDS = float(os.getenv("SHARD_MIN_SECONDS", "600"))
+SHARD_SEGMENT_SECONDS = float(os.getenv("SHARD_SEGMENT_SECONDS", "300"))
+SHARD_OVERLAP_SECONDS = float(os.getenv("SHARD_OVERLAP_SECONDS", "10"))
+
+# Au-delà de cette durée, transcription segment par segment avec publication des
+# résultats partiels (0 = désactivé, par défaut). Premiers résultats plus tôt, mais
+# débit moindre (passes séparées, chevauchement retranscrit) et phrases coupées
+# possibles aux frontières : préférer des segments longs (300 s ou plus).
+STREAM_SEGMENT_SECONDS = float(os.getenv("STREAM_SEGMENT_SECONDS", "0"))
+# Détection d'activité vocale (énergie par trame) avant l'inférence : seules les
+# zones de parole sont transcrites, timestamps recalés sur la timeline d'origine
+VAD_ENABLED = os.getenv("VAD_ENABLED", "0") == "1"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+VAD_MIN_SPEECH_MS = float(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+VAD_MIN_SILENCE_MS = float(os.getenv("VAD_MIN_SILENCE_MS", "600"))
+VAD_PADDING_MS = float(os.getenv("VAD_PADDING_MS", "200"))
+# Attente maximale d'un XREAD bloquant côté SSE avant un keep-alive
+SSE_BLOCK_MS = int(os.getenv("SSE_BLOCK_MS", "15000"))
+
+# Notifications de statut (Redis pub/sub) : cache mémoire des statuts côté API,
+# long-poll (?wait=) et WebSocket
+STATUS_PUBSUB = os.getenv("STATUS_PUBSUB", "1") == "1"
+STATUS_CACHE_MAX_ENTRIES = int(os.getenv("STATUS_CACHE_MAX_ENTRIES", "4096"))
+STATUS_CACHE_TTL_SECONDS = float(os.getenv("STATUS_CACHE_TTL_SECONDS", "60"))
+LONG_POLL_MAX_SECONDS = float(os.getenv("LONG_POLL_MAX_SECONDS", "60"))
+
+# Fraction des jobs profilés automatiquement (cProfile), en plus de profile=true
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Nombre de fonctions listées par GET /jobs/{job_id}/profile?format=text
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "50"))
+
 ALLOWED_EXTENSIONS = {".mp4", ".wav"}
+
+# Nombre max de fichiers/jobs par requête groupée (POST /jobs/batch, /jobs/run)
+BATCH_REQUEST_MAX_JOBS = int(os.getenv("BATCH_REQUEST_MAX_JOBS", "500"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(4 * 1024**3)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024**2)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(20 * 1024**3)))
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+from redis import Redis
+
+from api import db
+from api.events import STATUS_CHANNEL
+
+logger = logging.getLogger("transcription_api")
+
+STATUS_FIELDS = ("status", "output_type", "output_path", "result_text", "error", "vad_skipped_ratio")
+
+
+class StatusHub:
+    # Cache mémoire des statuts de jobs, invalidé par les notifications pub/sub des
+    # workers, et réveil des clients en attente (long-poll, WebSocket).
+    # Sans abonnement Redis actif, le cache est contourné : lecture SQLite directe.
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.connected = False
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        # Génération par job, incrémentée à chaque notify : une lecture SQLite
+        # commencée avant une notification n'est pas mise en cache. Les entrées les
+        # plus anciennes sont purgées ; _floor garde la plus haute génération purgée.
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._generation = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Set["asyncio.Future[None]"]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def cached(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not self.connected:
+            return None
+        with self._lock:
+            entry = self._cache.get(job_id)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._cache.move_to_end(job_id)
+            return entry[0]
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            generation = self._generations.get(job_id, self._floor)
+        job = db.get_job(job_id)
+        if job is None:
+            return None
+        status = {field: job.get(field) for field in STATUS_FIELDS}
+        if self.connected:
+            with self._lock:
+                if self._generations.get(job_id, self._floor) != generation:
+                    return status
+                self._cache[job_id] = (status, time.monotonic() + self.ttl_seconds)
+                self._cache.move_to_end(job_id)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.cached(job_id) or self.load(job_id)
+
+    def notify(self, job_id: str) -> None:
+        # Invalidation d'abord : les clients réveillés relisent l'état à jour
+        with self._lock:
+            self._cache.pop(job_id, None)
+            self._generation += 1
+            self._generations[job_id] = self._generation
+            self._generations.move_to_end(job_id)
+            while len(self._generations) > self.max_entries:
+                _, pruned = self._generations.popitem(last=False)
+                self._floor = max(self._floor, pruned)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake, job_id)
+
+    def _wake(self, job_id: str) -> None:
+        for future in self._waiters.pop(job_id, set()):
+            if not future.done():
+                future.set_result(None)
+
+    async def wait_for_change(self, job_id: str, known_status: Optional[str], timeout: float) -> Optional[Dict[str, Any]]:
+        # Rend l'état dès qu'il diffère de known_status, ou à l'expiration du délai
+        self._loop = asyncio.get_running_loop()
+        deadline = self._loop.time() + timeout
+        while True:
+            future = self._loop.create_future()
+            self._waiters.setdefault(job_id, set()).add(future)
+            try:
+                # Abonnement avant lecture : aucun changement ne peut être manqué
+                status = self.cached(job_id) or await asyncio.to_thread(self.load, job_id)
+                remaining = deadline - self._loop.time()
+                if status is None or status["status"] != known_status or remaining <= 0:
+                    return status
+                # Sans pub/sub, repli sur une relecture périodique
+                await asyncio.wait_for(future, remaining if self.connected else min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters = self._waiters.get(job_id)
+                if waiters is not None:
+                    waiters.discard(future)
+                    if not waiters:
+                        self._waiters.pop(job_id, None)
+
+    def start(self, redis_factory: Callable[[], Redis]) -> None:
+        self._loop = asyncio.get_running_loop()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._listen, args=(redis_factory,), daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _listen(self, redis_factory: Callable[[], Redis]) -> None:
+        delay = 1.0
+        while not self._stopped.is_set():
+            try:
+                pubsub = redis_factory().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(STATUS_CHANNEL)
+                self.connected = True
+                delay = 1.0
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    data = json.loads(message["data"])
+                    self.notify(data["job_id"])
+                pubsub.close()
+            except Exception:
+                logger.warning("Abonnement aux statuts indisponible, nouvel essai dans %.0fs", delay)
+            finally:
+                # Notifications potentiellement manquées : le cache n'est plus fiable
+                self.connected = False
+                with self._lock:
+                    self._cache.clear()
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 30.0)
@@ -1,5 +1,24 @@
+import gzip
+import hashlib
+import json
+import os
 from pathlib import Path
-from api.settings import UPLOAD_DIR, RESULT_DIR
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from api.settings import UPLOAD_DIR, RESULT_DIR, MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class UploadFormError(ValueError):
+    pass
 
 
 def ensure_dirs() -> None:
@@ -15,3 +34,219 @@ def upload_path(job_id: str, filename: str) -> Path:
 def result_path(job_id: str, suffix: str) -> Path:
     ensure_dirs()
     return RESULT_DIR / f"{job_id}.{suffix}"
+
+
+def profile_path(job_id: str) -> Path:
+    # Profil cProfile (format pstats) d'un job exécuté avec profile=true
+    return result_path(job_id, "prof")
+
+
+def transcript_path(job_id: str) -> Path:
+    return result_path(job_id, "chunks.json.gz")
+
+
+def save_transcript(
+    job_id: str,
+    transcription: Dict[str, Any],
+    model_name: Optional[str] = None,
+    cache_key: Optional[str] = None,
+) -> None:
+    # Chunks horodatés du job, sous forme compacte : [[début, fin, texte], ...] gzippé.
+    # Le modèle et la clé de cache sont conservés pour ne réutiliser les chunks
+    # qu'avec le même modèle (nom, version, paramètres).
+    payload = {
+        "text": transcription.get("text", ""),
+        "chunks": [[*chunk["timestamp"], chunk["text"]] for chunk in transcription.get("chunks", [])],
+        "model_name": model_name,
+        "cache_key": cache_key,
+    }
+    path = transcript_path(job_id)
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as target:
+        json.dump(payload, target, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    # Les exports rendus depuis l'ancienne transcription ne sont plus valides
+    for stale in RESULT_DIR.glob(f"{job_id}.export.*"):
+        stale.unlink(missing_ok=True)
+
+
+def _read_transcript(job_id: str) -> Optional[Dict[str, Any]]:
+    path = transcript_path(job_id)
+    if not path.exists():
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as source:
+        return json.load(source)
+
+
+def transcript_model(job_id: str) -> Optional[str]:
+    payload = _read_transcript(job_id)
+    return payload.get("model_name") if payload else None
+
+
+def load_transcript(job_id: str, cache_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    # Avec une clé de cache, les chunks produits par un autre modèle sont ignorés
+    payload = _read_transcript(job_id)
+    if payload is None or (cache_key is not None and payload.get("cache_key") != cache_key):
+        return None
+    return _transcription(payload)
+
+
+def load_model_transcript(job_id: str, model_name: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+    # Chunks du job produits par ce modèle, avec la clé de cache sous laquelle ils
+    # ont été calculés (paramètres du processus qui a transcrit, pas du lecteur)
+    payload = _read_transcript(job_id)
+    if payload is None or payload.get("model_name") != model_name:
+        return None
+    return _transcription(payload), payload.get("cache_key")
+
+
+def _transcription(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "text": payload["text"],
+        "chunks": [{"timestamp": (start, end), "text": text} for start, end, text in payload["chunks"]],
+    }
+
+
+def export_path(job_id: str, fmt: str) -> Path:
+    # Exports rendus à la demande depuis les chunks, puis conservés
+    return result_path(job_id, f"export.{fmt}")
+
+
+def _write_chunk(buffer: BinaryIO, hasher: "hashlib._Hash", chunk: bytes) -> None:
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+def hash_file(path: Path, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as source:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+async def save_upload(
+    file: UploadFile,
+    destination: Path,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[int, str]:
+    # Copie par blocs : mémoire constante quelle que soit la taille du fichier,
+    # écriture disque et hash hors de la boucle asyncio.
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = await run_in_threadpool(destination.open, "wb")
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Fichier trop volumineux (max {max_bytes} octets)")
+            await run_in_threadpool(_write_chunk, buffer, hasher, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        destination.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(buffer.close)
+    return size, hasher.hexdigest()
+
+
+class _MultipartEvents:
+    # Callbacks synchrones du parseur multipart : les événements sont accumulés
+    # puis traités (écritures disque asynchrones) après chaque bloc reçu
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def callbacks(self) -> Dict[str, Callable[..., None]]:
+        return {
+            "on_part_begin": self._headers.clear,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": lambda: self.events.append(("end", None)),
+        }
+
+    def _header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self.events.append(("part", options))
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        self.events.append(("data", data[start:end]))
+
+
+async def receive_upload(
+    request: Request,
+    destination_for: Callable[[str], Path],
+    field: str = "file",
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> Tuple[str, Path, int, str]:
+    # Formulaire multipart lu au fil du corps de la requête : le fichier est écrit
+    # directement à destination (pas de copie temporaire préalable par Starlette)
+    # et la limite de taille s'applique pendant la réception, même sans Content-Length.
+    # destination_for reçoit le nom du fichier avant toute écriture (et peut le refuser).
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadFormError("Formulaire multipart/form-data attendu")
+    reader = _MultipartEvents()
+    parser = MultipartParser(boundary, reader.callbacks())
+    hasher = hashlib.sha256()
+    pending = bytearray()
+    size = 0
+    filename: Optional[str] = None
+    destination: Optional[Path] = None
+    buffer: Optional[BinaryIO] = None
+    writing = False
+    try:
+        async for body in request.stream():
+            try:
+                parser.write(body)
+            except FormParserError as exc:
+                raise UploadFormError(f"Formulaire invalide: {exc}")
+            for event, value in reader.events:
+                if event == "part":
+                    writing = filename is None and value.get(b"name") == field.encode() and b"filename" in value
+                    if writing:
+                        filename = value[b"filename"].decode("utf-8", "replace")
+                        destination = destination_for(filename)
+                        buffer = await run_in_threadpool(destination.open, "wb")
+                elif event == "data" and writing:
+                    size += len(value)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(f"Fichier trop volumineux (max {max_bytes} octets)")
+                    pending += value
+                    if len(pending) >= chunk_size:
+                        await run_in_threadpool(_write_chunk, buffer, hasher, bytes(pending))
+                        pending.clear()
+                elif event == "end" and writing:
+                    await run_in_threadpool(_write_chunk, buffer, hasher, bytes(pending))
+                    pending.clear()
+                    writing = False
+            reader.events.clear()
+        if buffer is None or writing:
+            raise UploadFormError(f"Champ fichier '{field}' manquant ou incomplet")
+    except BaseException:
+        if buffer is not None:
+            await run_in_threadpool(buffer.close)
+            destination.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(buffer.close)
+    return filename, destination, size, hasher.hexdigest()
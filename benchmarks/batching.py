@@ -0,0 +1,53 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import write_synthetic_wav, write_report
+from transcription.models.registry import load_model
+
+# Compare le débit d'un appel par job à celui d'un lot de jobs :
+#   python -m benchmarks.batching --model whisper --jobs 8 --seconds 20
+
+
+def run(model_name: str, jobs: int, seconds: float, output: Path = None) -> dict:
+    model = load_model(model_name)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [
+            write_synthetic_wav(Path(tmp) / f"clip_{index}.wav", seconds, seed=index)
+            for index in range(jobs)
+        ]
+        model.transcribe(paths[0])  # échauffement
+
+        start = time.perf_counter()
+        for path in paths:
+            model.transcribe(path)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        model.transcribe_batch(paths)
+        batched = time.perf_counter() - start
+
+    audio_seconds = jobs * seconds
+    report = {
+        "model": model_name,
+        "jobs": jobs,
+        "clip_seconds": seconds,
+        "sequential_seconds": sequential,
+        "batched_seconds": batched,
+        "sequential_audio_per_second": audio_seconds / sequential,
+        "batched_audio_per_second": audio_seconds / batched,
+        "speedup": sequential / batched,
+    }
+    write_report(report, output)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark inférence par lots")
+    parser.add_argument("--model", default="whisper")
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    run(args.model, args.jobs, args.seconds, args.output)
@@ -0,0 +1,51 @@
+import json
+import resource
+import wave
+from pathlib import Path
+from typing import Any, Dict
+
+import ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def write_synthetic_wav(path: Path, seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> Path:
+    # Signal synthétique (tonalités modulées + bruit) pour des mesures reproductibles
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)
+    signal += 0.02 * rng.standard_normal(t.shape)
+    pcm = (np.clip(signal, -1, 1) * 32767).astype("<i2")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "w") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return path
+
+
+def write_synthetic_mp4(path: Path, seconds: float, seed: int = 0) -> Path:
+    # Vidéo noire 320x240 portant la même bande son synthétique
+    wav_path = write_synthetic_wav(path.with_suffix(".src.wav"), seconds, seed=seed)
+    video = ffmpeg.input(f"color=c=black:s=320x240:r=10:d={seconds}", f="lavfi")
+    audio = ffmpeg.input(str(wav_path))
+    stream = ffmpeg.output(
+        video, audio, str(path), vcodec="libx264", pix_fmt="yuv420p", acodec="aac", shortest=None
+    )
+    ffmpeg.run(stream, overwrite_output=True, quiet=True)
+    wav_path.unlink()
+    return path
+
+
+def peak_rss_bytes() -> int:
+    # Pic de mémoire du processus depuis son démarrage (ru_maxrss est en Ko sous Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def write_report(report: Dict[str, Any], output: Path = None) -> None:
+    text = json.dumps(report, indent=2)
+    if output:
+        output.write_text(text, encoding="utf-8")
+    print(text)
@@ -0,0 +1,59 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.common import peak_rss_bytes, write_synthetic_wav, write_report
+from transcription.audio import SAMPLE_RATE, load_audio
+from transcription.models.registry import get_model_class
+
+# Facteur temps réel (RTF = temps de calcul / durée audio) et empreinte mémoire
+# de chaque variante, à lancer sur le type de nœud visé :
+#   python -m benchmarks.models --models whisper whisper-int8 whisper-base-int8 --seconds 60
+
+
+def measure(model_name: str, samples, repeats: int) -> dict:
+    rss_before = peak_rss_bytes()
+    start = time.perf_counter()
+    model = get_model_class(model_name)()
+    load_seconds = time.perf_counter() - start
+    model.transcribe(samples[: SAMPLE_RATE * 5])  # échauffement
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.transcribe(samples)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "model": model_name,
+        "version": model.version,
+        "load_seconds": load_seconds,
+        "transcribe_seconds": best,
+        "rtf": best / (len(samples) / SAMPLE_RATE),
+        "model_bytes": model.memory_bytes(),
+        "peak_rss_increase_bytes": peak_rss_bytes() - rss_before,
+    }
+
+
+def run(model_names: List[str], seconds: float, repeats: int = 3, output: Path = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = load_audio(write_synthetic_wav(Path(tmp) / "clip.wav", seconds))
+    # Le pic RSS ne redescend jamais : les variantes les plus légères d'abord
+    report = {
+        "clip_seconds": seconds,
+        "variants": [measure(name, samples, repeats) for name in model_names],
+    }
+    write_report(report, output)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des variantes de modèle (RTF, mémoire)")
+    parser.add_argument("--models", nargs="+", default=["whisper-base-int8", "whisper-base", "whisper-int8", "whisper"])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    run(args.models, args.seconds, args.repeats, args.output)
@@ -0,0 +1,157 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.common import peak_rss_bytes, write_report, write_synthetic_mp4, write_synthetic_wav
+from transcription.audio import SAMPLE_RATE, extract_audio, load_audio
+from transcription.models.registry import load_model
+from transcription.srt_generator import generate_srt
+from transcription.video_renderer import render_video
+
+# Latence par étape du pipeline (décodage, extraction, transcription, SRT, rendu)
+# sur des entrées synthétiques, avec comparaison à une baseline enregistrée :
+#   python -m benchmarks.pipeline --update-baseline
+#   python -m benchmarks.pipeline            # code de sortie 1 en cas de régression
+#   python -m benchmarks.pipeline --ci       # code de sortie 2 si la baseline manque
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def _timed(func: Callable[..., Any], *args: Any, repeats: int = 1, **kwargs: Any) -> Tuple[float, Any]:
+    # Meilleur temps sur `repeats` exécutions (le moins bruité)
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_input(model: Any, path: Path, seconds: float, repeats: int, embedded: bool, workdir: Path) -> Dict[str, Any]:
+    stages: Dict[str, Dict[str, float]] = {}
+    # ru_maxrss ne mesure que le pic du processus : chaque étape rapporte ce pic
+    # après son exécution et la hausse qu'elle y a causée (0 si elle est restée dessous)
+    previous_peak = peak_rss_bytes()
+
+    def record(stage: str, elapsed: float) -> None:
+        nonlocal previous_peak
+        peak = peak_rss_bytes()
+        stages[stage] = {
+            "seconds": elapsed,
+            "audio_seconds_per_second": seconds / elapsed if elapsed else float("inf"),
+            "process_peak_rss_bytes": peak,
+            "peak_rss_increase_bytes": peak - previous_peak,
+        }
+        previous_peak = peak
+
+    elapsed, samples = _timed(load_audio, path, repeats=repeats)
+    record("decode", elapsed)
+    elapsed, _ = _timed(extract_audio, path, workdir / f"{path.stem}.extract.wav", repeats=repeats)
+    record("extract_audio", elapsed)
+    elapsed, transcription = _timed(model.transcribe, samples, repeats=repeats)
+    record("transcribe", elapsed)
+    srt_path = workdir / f"{path.stem}.srt"
+    elapsed, _ = _timed(generate_srt, transcription, srt_path, repeats=repeats)
+    record("generate_srt", elapsed)
+    if path.suffix == ".mp4":
+        output = workdir / f"{path.stem}.out.mp4"
+        elapsed, _ = _timed(render_video, path, srt_path, output, embedded=embedded, repeats=repeats)
+        record("render_video", elapsed)
+    return {
+        "name": f"{path.suffix[1:]}_{seconds:g}s",
+        "seconds": seconds,
+        "samples": len(samples),
+        "stages": stages,
+    }
+
+
+def run(
+    model_name: str = "dummy",
+    lengths: List[float] = (10.0, 60.0),
+    formats: List[str] = ("wav", "mp4"),
+    repeats: int = 3,
+    embedded: bool = False,
+) -> Dict[str, Any]:
+    model = load_model(model_name)
+    inputs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for seconds in lengths:
+            for fmt in formats:
+                path = workdir / f"clip_{seconds:g}s.{fmt}"
+                if fmt == "mp4":
+                    write_synthetic_mp4(path, seconds)
+                else:
+                    write_synthetic_wav(path, seconds)
+                inputs.append(bench_input(model, path, seconds, repeats, embedded, workdir))
+    return {
+        "model": model_name,
+        "sample_rate": SAMPLE_RATE,
+        "repeats": repeats,
+        "inputs": inputs,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    # Régression : plus lent que la baseline de plus de `tolerance` (relatif) ET de
+    # plus de `min_delta_ms` (absolu, pour ignorer le bruit des étapes très courtes)
+    regressions = []
+    current = {entry["name"]: entry["stages"] for entry in report["inputs"]}
+    for entry in baseline.get("inputs", []):
+        for stage, reference in entry["stages"].items():
+            measured = current.get(entry["name"], {}).get(stage)
+            if measured is None:
+                continue
+            delta = measured["seconds"] - reference["seconds"]
+            if delta > reference["seconds"] * tolerance and delta * 1000 > min_delta_ms:
+                regressions.append(
+                    f"{entry['name']}/{stage}: {measured['seconds']:.4f}s "
+                    f"(baseline {reference['seconds']:.4f}s)"
+                )
+    reference_rss = baseline.get("peak_rss_bytes")
+    if reference_rss and report["peak_rss_bytes"] > reference_rss * (1 + tolerance):
+        regressions.append(
+            f"peak_rss: {report['peak_rss_bytes']} octets (baseline {reference_rss})"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline complet par étape")
+    parser.add_argument("--model", default="dummy")
+    parser.add_argument("--lengths", nargs="+", type=float, default=[10.0, 60.0])
+    parser.add_argument("--formats", nargs="+", choices=["wav", "mp4"], default=["wav", "mp4"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--embedded", action="store_true", help="rendu avec sous-titres incrustés")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=5.0)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--ci", action="store_true", help="échec (code 2) si la baseline est absente")
+    args = parser.parse_args()
+
+    report = run(args.model, args.lengths, args.formats, args.repeats, args.embedded)
+    write_report(report, args.output)
+    baseline_path = args.baseline or BASELINE_DIR / f"pipeline_{args.model}.json"
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Baseline enregistrée: {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(
+            report, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance, args.min_delta_ms
+        )
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+    else:
+        print(f"Pas de baseline ({baseline_path}) : lancer avec --update-baseline", file=sys.stderr)
+        # En CI, une baseline absente ne doit pas passer pour une absence de régression
+        sys.exit(2 if args.ci else 0)
@@ -1,10 +1,15 @@
 import logging
 from pathlib import Path
 
-from fastapi import FastAPI, File, HTTPException, UploadFile, Form
-from fastapi.responses import JSONResponse
+import numpy as np
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
+from inference.batcher import close_batchers, get_batcher
 from inference.registry import load_model
+from transcription.audio import load_audio_bytes
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("inference_server")
@@ -12,13 +17,18 @@ logger = logging.getLogger("inference_server")
 app = FastAPI(title="Inference Server")
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await close_batchers()
+
+
 @app.get("/health")
 def health() -> JSONResponse:
     return JSONResponse({"status": "ok"})
 
 
 @app.post("/infer")
-def infer(
+async def infer(
     file: UploadFile = File(...),
     model_name: str = Form("whisper"),
     model_version: str = Form("v1"),
@@ -26,9 +36,26 @@ def infer(
     suffix = Path(file.filename).suffix.lower()
     if suffix not in {".wav"}:
         raise HTTPException(status_code=400, detail="Seuls les fichiers wav sont acceptés")
-    audio_path = Path("/tmp") / file.filename
-    with audio_path.open("wb") as buffer:
-        buffer.write(file.file.read())
-    model = load_model(model_name, model_version)
-    transcription = model.transcribe(audio_path)
+    # Décodage en mémoire puis passage par le micro-batcher du modèle : les requêtes
+    # concurrentes partagent une même passe du modèle
+    audio = await run_in_threadpool(load_audio_bytes, await file.read())
+    model = await run_in_threadpool(load_model, model_name, model_version)
+    transcription = await get_batcher(model, model_name, model_version).submit(audio)
     return JSONResponse(transcription)
+
+
+@app.post("/infer/pcm")
+async def infer_pcm(request: Request, model_name: str = "whisper", model_version: str = "v1"):
+    # Corps brut : PCM 16 bits little-endian, mono, 16 kHz (pas de multipart ni d'en-tête WAV)
+    body = await request.body()
+    if not body or len(body) % 2:
+        raise HTTPException(status_code=400, detail="Flux PCM 16 bits invalide")
+    audio = np.frombuffer(body, dtype="<i2").astype(np.float32) / 32768.0
+    model = await run_in_threadpool(load_model, model_name, model_version)
+    transcription = await get_batcher(model, model_name, model_version).submit(audio)
+    return JSONResponse(transcription)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
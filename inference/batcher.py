@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from transcription.models.base import AudioInput, BaseTranscriptionModel
+from inference.metrics import BATCH_SIZE, QUEUE_DEPTH, QUEUE_WAIT
+
+logger = logging.getLogger("inference_server")
+
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "20"))
+
+_Pending = Tuple[AudioInput, "asyncio.Future[Dict[str, Any]]", float]
+
+
+class MicroBatcher:
+    # Regroupe les requêtes concurrentes (jusqu'à max_batch_size ou max_wait_ms)
+    # en un seul appel transcribe_batch exécuté hors de la boucle asyncio
+
+    def __init__(
+        self,
+        model: BaseTranscriptionModel,
+        label: str,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ) -> None:
+        self.model = model
+        self.label = label
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: "Optional[asyncio.Queue[_Pending]]" = None
+        self._task: "Optional[asyncio.Task[None]]" = None
+
+    def _ensure_running(self) -> "asyncio.Queue[_Pending]":
+        # File et tâche liées à la boucle courante (une par boucle en test)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, audio: AudioInput) -> Dict[str, Any]:
+        queue = self._ensure_running()
+        QUEUE_DEPTH.labels(self.label).observe(queue.qsize())
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        await queue.put((audio, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self, queue: "asyncio.Queue[_Pending]") -> List[_Pending]:
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Requêtes abandonnées par le client (déconnexion) : rien à calculer
+        return [item for item in batch if not item[1].done()]
+
+    async def _run(self, queue: "asyncio.Queue[_Pending]") -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            if not batch:
+                continue
+            now = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                QUEUE_WAIT.labels(self.label).observe(now - enqueued_at)
+            BATCH_SIZE.labels(self.label).observe(len(batch))
+            try:
+                results = await loop.run_in_executor(
+                    None, self.model.transcribe_batch, [audio for audio, _, _ in batch]
+                )
+            except Exception as exc:
+                logger.exception("Échec du lot d'inférence (%s)", self.label)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_batchers: Dict[Tuple[str, str], MicroBatcher] = {}
+
+
+def get_batcher(model: BaseTranscriptionModel, name: str, version: str) -> MicroBatcher:
+    # Un batcher par modèle chargé : les lots ne mélangent jamais deux modèles
+    key = (name, version)
+    if key not in _batchers or _batchers[key].model is not model:
+        _batchers[key] = MicroBatcher(model, f"{name}:{version}")
+    return _batchers[key]
+
+
+async def close_batchers() -> None:
+    for batcher in _batchers.values():
+        await batcher.close()
@@ -0,0 +1,19 @@
+from prometheus_client import Histogram
+
+BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Requests per batched forward pass",
+    ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+QUEUE_DEPTH = Histogram(
+    "inference_queue_depth",
+    "Pending requests in the batching queue at submission",
+    ["model"],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Time spent waiting for a batch slot",
+    ["model"],
+)
@@ -1,24 +1,22 @@
-from typing import Dict, Tuple, Type
+from typing import Dict, Tuple
 
 from transcription.models.base import BaseTranscriptionModel
-from transcription.models.dummy import DummyModel
-from transcription.models.whisper_model import WhisperModel
+from transcription.models.registry import WHISPER_MODELS, get_model_class
 
 ModelKey = Tuple[str, str]
 
-_REGISTRY: Dict[ModelKey, Type[BaseTranscriptionModel]] = {
-    (WhisperModel.name, "v1"): WhisperModel,
-    (DummyModel.name, "v1"): DummyModel,
-}
+# Modèles servis par le serveur d'inférence → nom dans le registre (classe
+# importée au premier chargement)
+_REGISTRY: Dict[ModelKey, str] = {(name, "v1"): name for name in (*WHISPER_MODELS, "dummy")}
 
 _model_cache: Dict[ModelKey, BaseTranscriptionModel] = {}
 
 
 def load_model(name: str, version: str = "v1") -> BaseTranscriptionModel:
     key = (name, version)
-    model_class = _REGISTRY.get(key)
-    if not model_class:
+    model_name = _REGISTRY.get(key)
+    if not model_name:
         raise ValueError(f"Modèle inconnu: {name}:{version}")
     if key not in _model_cache:
-        _model_cache[key] = model_class()
+        _model_cache[key] = get_model_class(model_name)()
     return _model_cache[key]
@@ -1,6 +1,33 @@
+import importlib
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def worker_modules(tmp_path, monkeypatch):
+    # Modules worker rechargés sur une base et un stockage propres au test
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import db, settings, storage
+    from worker import result_cache, tasks
+
+    for module in (settings, db, storage, result_cache, tasks):
+        importlib.reload(module)
+    db.init_db()
+    return storage, tasks
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # Application rechargée sur une base et un stockage propres au test
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import app, db, settings, storage
+
+    for module in (settings, db, storage, app):
+        importlib.reload(module)
+    return app
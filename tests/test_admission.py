@@ -0,0 +1,57 @@
+import importlib
+
+import pytest
+
+
+def _reload(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import admission, db, settings
+
+    importlib.reload(settings)
+    importlib.reload(db)
+    monkeypatch.setattr(admission, "ADMISSION_CAPACITY_SECONDS", 0)
+    monkeypatch.setattr(admission, "ADMISSION_MODEL_CAPACITY", {"whisper": 600.0, "whisper-base": 600.0})
+    monkeypatch.setattr(admission, "ADMISSION_DEGRADE_CHAIN", ["whisper", "whisper-small", "whisper-base"])
+    monkeypatch.setattr(admission, "ETA_DEFAULT_REALTIME_FACTOR", 0.5)
+    monkeypatch.setattr(admission, "transcription_workers", lambda: 2)
+    return admission, db
+
+
+def _queue(db, job_id, model_name, media_seconds):
+    db.create_job(job_id, "sample.wav", "/tmp/sample.wav", media_duration_seconds=media_seconds)
+    db.transition_job(job_id, "queued", model_name=model_name)
+
+
+def test_admit_rejects_beyond_capacity_with_retry_after(tmp_path, monkeypatch):
+    admission, db = _reload(tmp_path, monkeypatch)
+
+    # File vide : un média plus long que la capacité passe quand même
+    assert admission.admit("whisper", [900.0]) == "whisper"
+    _queue(db, "job-1", "whisper", 500.0)
+    assert admission.admit("whisper", [100.0]) == "whisper"
+
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        admission.admit("whisper", [300.0])
+    # excédent 200 s × RTF 0.5 / 2 workers
+    assert rejected.value.retry_after == 50
+    assert admission.admit("dummy", [10_000.0]) == "dummy"
+
+
+def test_admit_degrades_to_next_model_with_capacity(tmp_path, monkeypatch):
+    admission, db = _reload(tmp_path, monkeypatch)
+    _queue(db, "job-1", "whisper", 600.0)
+
+    assert admission.admit("whisper", [120.0], allow_degrade=True) == "whisper-small"
+    assert admission.admit("whisper-base", [None], allow_degrade=True) == "whisper-base"
+
+
+def test_refresh_gauges_reports_backlog_and_capacity(tmp_path, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    admission, db = _reload(tmp_path, monkeypatch)
+    _queue(db, "job-1", "whisper", 250.0)
+
+    admission.refresh_gauges()
+
+    assert REGISTRY.get_sample_value("admission_queued_audio_seconds", {"model": "whisper"}) == 250.0
+    assert REGISTRY.get_sample_value("admission_capacity_audio_seconds", {"model": "whisper"}) == 600.0
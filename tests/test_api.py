@@ -1,22 +1,12 @@
-import importlib
 from fastapi.testclient import TestClient
 
 
-def test_upload_and_status(tmp_path, monkeypatch):
-    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
-    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
-    from api import settings
-
-    importlib.reload(settings)
-    from api import app as app_module
-
-    importlib.reload(app_module)
-
+def test_upload_and_status(app_module, monkeypatch):
     class DummyQueue:
         def enqueue(self, *args, **kwargs):
             return None
 
-    monkeypatch.setattr(app_module, "get_queue", lambda: DummyQueue())
+    monkeypatch.setattr(app_module, "get_queue", lambda *args: DummyQueue())
 
     client = TestClient(app_module.app)
 
@@ -31,3 +21,269 @@ def test_upload_and_status(tmp_path, monkeypatch):
     status = client.get(f"/jobs/{job_id}/status")
     assert status.status_code == 200
     assert status.json()["status"] == "uploaded"
+
+
+def test_upload_rejects_chunked_body_over_limit(app_module, monkeypatch):
+    from api import settings
+
+    monkeypatch.setattr(app_module, "MAX_UPLOAD_BYTES", 100)
+    body = (
+        b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="sample.wav"\r\n\r\n'
+        + b"x" * 1000
+        + b"\r\n--xyz--\r\n"
+    )
+    client = TestClient(app_module.app)
+
+    response = client.post(
+        "/upload",
+        content=iter([body[:200], body[200:]]),
+        headers={"content-type": "multipart/form-data; boundary=xyz"},
+    )
+    rejected = client.post("/upload", files={"file": ("notes.txt", b"x", "text/plain")})
+
+    assert response.status_code == 413
+    assert rejected.status_code == 400
+    assert list(settings.UPLOAD_DIR.iterdir()) == []
+
+
+def test_stream_delivers_partials_until_completion(app_module, monkeypatch):
+    from api import db
+
+    class FakeRedis:
+        def __init__(self):
+            self.entries = [
+                (b"1-0", {b"event": b"partial", b"data": b'{"chunks": [], "progress": 50.0}'}),
+                (b"2-0", {b"event": b"completed", b"data": b'{"status": "completed"}'}),
+            ]
+
+        def xread(self, streams, block=None):
+            entries, self.entries = self.entries, []
+            return [(b"stream", entries)] if entries else []
+
+    monkeypatch.setattr(app_module, "get_redis", FakeRedis)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+
+    client = TestClient(app_module.app)
+    response = client.get("/jobs/job-1/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: partial" in response.text
+    assert '"progress": 50.0' in response.text
+    assert response.text.rstrip().endswith('data: {"status": "completed"}')
+
+
+def test_run_with_profile_and_profile_endpoint(app_module, monkeypatch):
+    import cProfile
+
+    from api import db, storage
+
+    enqueued = []
+
+    class DummyQueue:
+        def enqueue(self, *args, **kwargs):
+            enqueued.append(kwargs)
+
+    monkeypatch.setattr(app_module, "get_queue", lambda *args: DummyQueue())
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    client = TestClient(app_module.app)
+
+    response = client.post("/jobs/job-1/run", json={"output_type": "text", "profile": True})
+    assert response.status_code == 200
+    assert enqueued == [{"profile": True}]
+    assert client.get("/jobs/job-1/profile").status_code == 404
+
+    profiler = cProfile.Profile()
+    profiler.runcall(sum, [1, 2, 3])
+    profiler.dump_stats(str(storage.profile_path("job-1")))
+
+    raw = client.get("/jobs/job-1/profile")
+    text = client.get("/jobs/job-1/profile", params={"format": "text"})
+    assert raw.status_code == 200
+    assert raw.headers["content-type"] == "application/octet-stream"
+    assert "function calls" in text.text
+
+
+def test_export_renders_formats_from_stored_chunks(app_module, monkeypatch):
+    from api import db, storage
+
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    client = TestClient(app_module.app)
+
+    assert client.get("/jobs/job-1/export/srt").status_code == 409
+    assert client.get("/jobs/job-1/export/docx").status_code == 400
+
+    storage.save_transcript("job-1", {"text": "Salut", "chunks": [{"timestamp": (0.0, 2.0), "text": "Salut"}]})
+    vtt = client.get("/jobs/job-1/export/vtt")
+    srt = client.get("/jobs/job-1/export/srt")
+
+    assert vtt.status_code == 200
+    assert vtt.text.startswith("WEBVTT")
+    assert "00:00:00,000 --> 00:00:02,000" in srt.text
+    assert storage.export_path("job-1", "vtt").exists()
+    assert not list(storage.export_path("job-1", "vtt").parent.glob("*.tmp"))
+
+
+def test_jobs_listing_is_paginated_by_cursor(app_module, monkeypatch):
+    from api import db
+
+    for index in range(3):
+        db.create_job(f"job-{index}", "sample.wav", "/tmp/sample.wav")
+    client = TestClient(app_module.app)
+
+    first = client.get("/jobs", params={"limit": 2}).json()
+    second = client.get("/jobs", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert len(first["jobs"]) == 2
+    assert len(second["jobs"]) == 1
+    assert second["next_cursor"] is None
+    assert {job["id"] for job in first["jobs"] + second["jobs"]} == {"job-0", "job-1", "job-2"}
+    assert client.get("/jobs", params={"status": "failed"}).json()["jobs"] == []
+    assert client.get("/jobs", params={"cursor": "pas-un-curseur"}).status_code == 400
+
+
+def test_status_long_poll_and_websocket(app_module, monkeypatch):
+    from api import db
+
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    db.transition_job("job-1", "completed", output_type="text", result_text="ok")
+    client = TestClient(app_module.app)
+
+    response = client.get("/jobs/job-1/status", params={"wait": 30, "since": "processing"})
+    assert response.json()["status"] == "completed"
+
+    with client.websocket_connect("/jobs/job-1/ws") as websocket:
+        message = websocket.receive_json()
+    assert message["status"] == "completed"
+    assert message["result_text"] == "ok"
+
+
+def test_batch_upload_and_run(app_module, monkeypatch):
+    from api import db
+
+    submitted = []
+    monkeypatch.setattr(app_module, "enqueue_runs", submitted.append)
+    client = TestClient(app_module.app)
+
+    files = [("files", (f"sample-{index}.wav", b"RIFF....WAVEfmt ", "audio/wav")) for index in range(3)]
+    uploaded = client.post("/jobs/batch", files=files, data={"output_type": "text", "model_name": "dummy"})
+    assert uploaded.status_code == 200
+    job_ids = uploaded.json()["job_ids"]
+    assert len(job_ids) == 3
+    assert len(submitted) == 1
+    assert [run["job_id"] for run in submitted[0]] == job_ids
+    assert all(db.get_job(job_id)["status"] == "queued" for job_id in job_ids)
+
+    rerun = client.post("/jobs/run", json={"job_ids": job_ids[:2], "output_type": "subtitle"})
+    assert rerun.status_code == 200
+    assert [run["output_type"] for run in submitted[1]] == ["subtitle", "subtitle"]
+
+    missing = client.post("/jobs/run", json={"job_ids": [job_ids[0], "inconnu"], "output_type": "text"})
+    assert missing.status_code == 404
+    rejected = client.post("/jobs/batch", files=[("files", ("notes.txt", b"x", "text/plain"))])
+    assert rejected.status_code == 400
+
+
+def test_batch_run_marks_jobs_failed_when_queue_is_down(app_module, monkeypatch):
+    from api import db
+
+    def broken(runs):
+        raise ConnectionError("redis indisponible")
+
+    monkeypatch.setattr(app_module, "enqueue_runs", broken)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    client = TestClient(app_module.app)
+
+    response = client.post("/jobs/run", json={"job_ids": ["job-1"], "output_type": "text"})
+    assert response.status_code == 503
+    assert db.get_job("job-1")["status"] == "failed"
+
+
+def test_upload_probes_media_and_status_reports_eta(app_module, monkeypatch):
+    import io
+    import wave
+
+    from api import db, settings
+
+    enqueued = []
+
+    class DummyQueue:
+        def __init__(self, name):
+            self.name = name
+
+        def enqueue(self, *args, **kwargs):
+            enqueued.append(self.name)
+
+    monkeypatch.setattr(app_module, "get_queue", DummyQueue)
+    monkeypatch.setattr(app_module, "transcription_workers", lambda: 1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\0\0" * 16000 * 4)
+    client = TestClient(app_module.app)
+
+    job_id = client.post("/upload", files={"file": ("sample.wav", buffer.getvalue(), "audio/wav")}).json()["job_id"]
+    job = db.get_job(job_id)
+    assert job["media_duration_seconds"] == 4.0
+    assert job["audio_codec"] == "pcm_s16le"
+
+    client.post(f"/jobs/{job_id}/run", json={"output_type": "text", "model_name": "dummy"})
+    assert enqueued == ["transcription"]
+    status = client.get(f"/jobs/{job_id}/status").json()
+    assert status["queue_position"] == 1
+    assert status["eta_seconds"] == 4.0 * settings.ETA_DEFAULT_REALTIME_FACTOR
+
+
+def test_run_returns_429_when_model_is_at_capacity(app_module, monkeypatch):
+    from api import admission, db
+
+    class DummyQueue:
+        def enqueue(self, *args, **kwargs):
+            return None
+
+    monkeypatch.setattr(app_module, "get_queue", lambda *args: DummyQueue())
+    monkeypatch.setattr(admission, "ADMISSION_MODEL_CAPACITY", {"whisper": 60.0})
+    monkeypatch.setattr(admission, "transcription_workers", lambda: 1)
+    for job_id in ("job-1", "job-2"):
+        db.create_job(job_id, "sample.wav", "/tmp/sample.wav", media_duration_seconds=50.0)
+    client = TestClient(app_module.app)
+
+    assert client.post("/jobs/job-1/run", json={"output_type": "text", "model_name": "whisper"}).status_code == 200
+    rejected = client.post("/jobs/job-2/run", json={"output_type": "text", "model_name": "whisper"})
+    degraded = client.post(
+        "/jobs/job-2/run", json={"output_type": "text", "model_name": "whisper", "allow_degrade": True}
+    )
+
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert degraded.status_code == 200
+    assert degraded.json()["model_name"] == "whisper-int8"
+
+
+def test_run_excludes_own_job_from_backlog_and_fails_when_queue_is_down(app_module, monkeypatch):
+    from api import admission, db
+
+    class DummyQueue:
+        def enqueue(self, *args, **kwargs):
+            assert db.get_job("job-1")["status"] == "queued"
+
+    monkeypatch.setattr(app_module, "get_queue", lambda *args: DummyQueue())
+    monkeypatch.setattr(admission, "ADMISSION_MODEL_CAPACITY", {"whisper": 60.0})
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav", media_duration_seconds=50.0)
+    client = TestClient(app_module.app)
+
+    # Relance d'un job déjà en file : sa propre durée n'est pas comptée deux fois
+    for _ in range(2):
+        assert client.post("/jobs/job-1/run", json={"output_type": "text", "model_name": "whisper"}).status_code == 200
+
+    class BrokenQueue:
+        def enqueue(self, *args, **kwargs):
+            raise ConnectionError("redis indisponible")
+
+    monkeypatch.setattr(app_module, "get_queue", lambda *args: BrokenQueue())
+    response = client.post("/jobs/job-1/run", json={"output_type": "text", "model_name": "whisper"})
+    assert response.status_code == 503
+    assert db.get_job("job-1")["status"] == "failed"
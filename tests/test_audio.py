@@ -15,3 +15,35 @@ def test_extract_audio(mock_input, mock_output, mock_run):
     mock_input.assert_called_once_with(str(input_path))
     mock_output.assert_called_once()
     mock_run.assert_called_once()
+
+
+@patch("ffmpeg.run")
+def test_load_audio_reads_16k_mono_wav_directly(mock_run, tmp_path):
+    import wave
+    from transcription.audio import load_audio
+
+    wav_path = tmp_path / "audio.wav"
+    with wave.open(str(wav_path), "w") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x40" * 1600)
+
+    samples = load_audio(wav_path)
+
+    assert samples.shape == (1600,)
+    assert samples[0] == 0.5
+    mock_run.assert_not_called()
+
+
+@patch("ffmpeg.run")
+def test_load_audio_decodes_through_pipe(mock_run):
+    import numpy as np
+    from transcription.audio import load_audio
+
+    mock_run.return_value = (np.ones(320, dtype="<f4").tobytes(), b"")
+
+    samples = load_audio(Path("video.mp4"))
+
+    assert samples.shape == (320,)
+    assert mock_run.call_args.kwargs["capture_stdout"] is True
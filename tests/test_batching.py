@@ -0,0 +1,94 @@
+import wave
+
+from api import db
+from transcription.models.dummy import DummyModel
+
+
+class _FakeQueue:
+    def __init__(self, job_ids):
+        self.job_ids = list(job_ids)
+        self.connection = None
+
+    def get_job_ids(self, offset, length):
+        return self.job_ids[offset:offset + length]
+
+    def remove(self, job_id):
+        if job_id in self.job_ids:
+            self.job_ids.remove(job_id)
+            return 1
+        return 0
+
+
+def test_collect_batch_stops_at_max_jobs(monkeypatch):
+    from worker import batching
+
+    monkeypatch.setattr(batching.Job, "fetch", staticmethod(lambda job_id, connection: job_id))
+    queue = _FakeQueue(["a", "b", "c"])
+
+    batch = batching.collect_batch(queue, max_jobs=2, window_seconds=0)
+
+    assert batch == ["a", "b"]
+    assert queue.job_ids == ["c"]
+
+
+def test_process_batch_runs_one_forward_pass(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    calls = []
+
+    class BatchModel(DummyModel):
+        def transcribe_batch(self, audio_paths):
+            calls.append(list(audio_paths))
+            return super().transcribe_batch(audio_paths)
+
+    monkeypatch.setattr(tasks, "load_model", lambda name: BatchModel())
+
+    jobs = []
+    for index in range(3):
+        job_id = f"job-{index}"
+        wav_path = storage.upload_path(job_id, "sample.wav")
+        with wave.open(str(wav_path), "w") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(16000)
+            wav_file.writeframes(bytes([index]) * 3200)
+        db.create_job(job_id, "sample.wav", str(wav_path))
+        jobs.append((job_id, "text", "dummy"))
+
+    tasks.process_batch(jobs)
+
+    assert len(calls) == 1
+    assert len(calls[0]) == 3
+    assert all(db.get_job(job_id)["status"] == "completed" for job_id, _, _ in jobs)
+
+
+def test_batch_worker_records_outcomes_and_enqueues_dependents(monkeypatch):
+    import fakeredis
+    from rq import Queue, Worker
+    from rq.job import JobStatus
+
+    from worker import batching
+
+    redis_conn = fakeredis.FakeStrictRedis()
+    queue = Queue("transcription", connection=redis_conn)
+    ok = queue.enqueue(batching.BATCHABLE_FUNC, "job-ok", "text", "dummy")
+    ko = queue.enqueue(batching.BATCHABLE_FUNC, "job-ko", "text", "dummy")
+    dependent = queue.enqueue("worker.tasks.render_stage", "job-ok", "video", "dummy", depends_on=ok)
+    started = []
+
+    def fake_batch(jobs):
+        started.extend(queue.started_job_registry.get_job_ids())
+        return {"job-ko": "échec"}
+
+    monkeypatch.setattr(batching, "process_batch", fake_batch)
+    worker = batching.BatchWorker([queue], connection=redis_conn)
+    worker.register_birth()
+    assert Worker.count(connection=redis_conn) == 1
+
+    worker.run_batch(batching.collect_batch(queue, max_jobs=2, window_seconds=0))
+
+    assert sorted(started) == sorted([ok.id, ko.id])
+    assert ok.get_status(refresh=True) == JobStatus.FINISHED
+    assert ko.get_status(refresh=True) == JobStatus.FAILED
+    assert queue.get_job_ids() == [dependent.id]
+    assert queue.started_job_registry.get_job_ids() == []
@@ -0,0 +1,36 @@
+from benchmarks import pipeline
+
+
+def _report(seconds, rss=100):
+    return {
+        "inputs": [{"name": "wav_10s", "stages": {"transcribe": {"seconds": seconds}}}],
+        "peak_rss_bytes": rss,
+    }
+
+
+def test_compare_flags_slower_stages_beyond_tolerance():
+    baseline = _report(1.0)
+
+    assert pipeline.compare(_report(1.2), baseline, tolerance=0.25, min_delta_ms=5) == []
+    assert pipeline.compare(_report(1.5), baseline, tolerance=0.25, min_delta_ms=5) == [
+        "wav_10s/transcribe: 1.5000s (baseline 1.0000s)"
+    ]
+
+
+def test_compare_ignores_noise_on_short_stages_and_checks_memory():
+    baseline = _report(0.001)
+
+    assert pipeline.compare(_report(0.003), baseline, tolerance=0.25, min_delta_ms=5) == []
+    assert pipeline.compare(_report(0.001, rss=200), baseline, tolerance=0.25, min_delta_ms=5) == [
+        "peak_rss: 200 octets (baseline 100)"
+    ]
+
+
+def test_run_records_every_stage_for_wav_input():
+    report = pipeline.run("dummy", lengths=[1.0], formats=["wav"], repeats=1)
+
+    (entry,) = report["inputs"]
+    assert entry["name"] == "wav_1s"
+    assert set(entry["stages"]) == {"decode", "extract_audio", "transcribe", "generate_srt"}
+    assert report["peak_rss_bytes"] > 0
+    assert all(stage["peak_rss_increase_bytes"] >= 0 for stage in entry["stages"].values())
@@ -0,0 +1,132 @@
+import importlib
+
+import pytest
+
+
+def _reload_db(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import settings, db
+
+    importlib.reload(settings)
+    importlib.reload(db)
+    return db
+
+
+def test_connection_uses_wal_and_is_reused(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+
+    conn = db._connect()
+
+    assert conn is db._connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_transition_job_updates_status_and_event(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+
+    db.transition_job("job-1", "queued", output_type="text")
+
+    assert db.get_job("job-1")["status"] == "queued"
+    events = db._connect().execute(
+        "SELECT event FROM job_events WHERE job_id = ?", ("job-1",)
+    ).fetchall()
+    assert [row["event"] for row in events] == ["queued"]
+
+
+def test_transaction_rolls_back_all_writes(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.update_job("job-1", status="processing")
+            db.add_event("job-1", "processing")
+            raise RuntimeError("boom")
+
+    assert db.get_job("job-1")["status"] == "uploaded"
+    count = db._connect().execute("SELECT COUNT(*) FROM job_events").fetchone()[0]
+    assert count == 0
+
+
+def test_metrics_follow_status_transitions(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(db, "METRICS_CACHE_TTL_SECONDS", 0)
+    for job_id in ("job-1", "job-2", "job-3"):
+        db.create_job(job_id, "sample.wav", "/tmp/sample.wav")
+    db.transition_job("job-1", "queued", output_type="text")
+    db.transition_job("job-2", "queued", output_type="subtitle")
+    db.transition_job("job-1", "processing")
+    db.transition_job("job-1", "completed", duration_seconds=2.0, result_text="x" * 1000)
+    db.transition_job("job-2", "processing")
+    db.transition_job("job-2", "failed", duration_seconds=4.0)
+
+    metrics = db.get_metrics()
+
+    assert metrics["total_jobs"] == 3
+    assert metrics["by_status"] == {"uploaded": 1, "completed": 1, "failed": 1}
+    assert metrics["by_type"] == {"unknown": 1, "text": 1, "subtitle": 1}
+    assert metrics["failed_by_type"] == {"subtitle": 1}
+    assert metrics["pending_total"] == 0
+    assert metrics["average_duration_seconds"] == 3.0
+    assert "result_text" not in metrics["recent_responses"][0]
+
+
+def test_job_counters_are_rebuilt_for_existing_databases(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(db, "METRICS_CACHE_TTL_SECONDS", 0)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    db.transition_job("job-1", "queued", output_type="text")
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM counters")
+        db.init_db()
+
+    metrics = db.get_metrics()
+
+    assert metrics["total_jobs"] == 1
+    assert metrics["pending_by_type"] == {"text": 1}
+
+
+def test_list_jobs_keyset_pagination_with_ties_and_filters(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    for index in range(5):
+        db.create_job(f"job-{index}", "sample.wav", "/tmp/sample.wav")
+        db.update_job(f"job-{index}", output_type="text" if index % 2 else "subtitle")
+    db._connect().execute("UPDATE jobs SET created_at = '2024-01-01T00:00:00'")
+
+    first = db.list_jobs(limit=2)
+    second = db.list_jobs(limit=2, after=(first[-1]["created_at"], first[-1]["id"]))
+    third = db.list_jobs(limit=2, after=(second[-1]["created_at"], second[-1]["id"]))
+
+    assert [job["id"] for job in first + second + third] == [f"job-{index}" for index in (4, 3, 2, 1, 0)]
+    assert [job["id"] for job in db.list_jobs(output_type="text")] == ["job-3", "job-1"]
+    assert "result_text" not in first[0]
+    assert "result_text" in db.list_jobs(limit=1, include_text=True)[0]
+
+
+def test_list_jobs_filters_use_an_index(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+
+    plan = db._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE status = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT 50",
+        ("queued", "2024", "job"),
+    ).fetchall()
+
+    details = " ".join(row["detail"] for row in plan)
+    assert "idx_jobs_status_created" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_queue_ahead_and_realtime_factor(tmp_path, monkeypatch):
+    db = _reload_db(tmp_path, monkeypatch)
+    for job_id, media_seconds, key in (("long", 3600.0, 1000.0), ("short", 30.0, 500.0), ("mine", 60.0, 900.0)):
+        db.create_job(job_id, "sample.wav", "/tmp/sample.wav", media_duration_seconds=media_seconds)
+        db.transition_job(job_id, "queued", model_name="dummy", priority_key=key)
+    db.create_job("done", "sample.wav", "/tmp/sample.wav", media_duration_seconds=100.0)
+    db.transition_job("done", "completed", model_name="dummy", duration_seconds=25.0)
+
+    assert db.queue_ahead("mine") == (1, 30.0)
+    assert db.queue_ahead("done") is None
+    assert db.realtime_factor("dummy", 10) == pytest.approx(0.25)
+    assert db.realtime_factor("whisper", 10) is None
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from transcription.exports import export_text
+
+TRANSCRIPTION = {
+    "text": "Hello world How are you",
+    "chunks": [
+        {"timestamp": (0.0, 1.5), "text": " Hello world"},
+        {"timestamp": (1.5, 3.25), "text": " How are you"},
+    ],
+}
+
+
+def test_export_vtt():
+    content = export_text(TRANSCRIPTION, "vtt")
+
+    assert content.startswith("WEBVTT\n")
+    assert "00:00:00.000 --> 00:00:01.500\nHello world" in content
+    assert "00:00:01.500 --> 00:00:03.250\nHow are you" in content
+
+
+def test_export_json_and_srt_share_cues():
+    payload = json.loads(export_text(TRANSCRIPTION, "json"))
+    srt = export_text(TRANSCRIPTION, "srt")
+
+    assert payload["segments"][1] == {"start": 1.5, "end": 3.25, "text": "How are you"}
+    assert "2\n00:00:01,500 --> 00:00:03,250\nHow are you" in srt
+
+
+def test_export_unknown_format():
+    with pytest.raises(ValueError):
+        export_text(TRANSCRIPTION, "docx")
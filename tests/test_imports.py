@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Budget d'import à froid (API + worker + package transcription), très au-dessus
+# du temps mesuré sans torch/transformers (< 1 s) mais très en dessous d'un import de torch
+IMPORT_BUDGET_SECONDS = 5.0
+
+MODULES = [
+    "transcription",
+    "transcription.models.registry",
+    "api.app",
+    "api.server",
+    "worker.tasks",
+    "worker.worker",
+    "worker.supervisor",
+    "inference.app",
+]
+
+SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+heavy = [name for name in ("torch", "transformers") if name in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+def test_cold_import_skips_model_backends():
+    root = Path(__file__).resolve().parents[1]
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *MODULES], cwd=root, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result["heavy"] == []
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,70 @@
+import asyncio
+import io
+import wave
+
+from fastapi.testclient import TestClient
+
+from inference.app import app
+from inference.batcher import MicroBatcher
+
+
+class _CountingModel:
+    def __init__(self):
+        self.batches = []
+
+    def transcribe_batch(self, audios):
+        self.batches.append(len(audios))
+        return [{"text": str(audio), "chunks": []} for audio in audios]
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    model = _CountingModel()
+    batcher = MicroBatcher(model, "fake:v1", max_batch_size=4, max_wait_ms=200)
+
+    async def scenario():
+        results = await asyncio.gather(*(batcher.submit(index) for index in range(6)))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert [result["text"] for result in results] == [str(index) for index in range(6)]
+    assert model.batches == [4, 2]
+
+
+def test_micro_batcher_propagates_model_errors():
+    class _FailingModel:
+        def transcribe_batch(self, audios):
+            raise RuntimeError("boom")
+
+    batcher = MicroBatcher(_FailingModel(), "fail:v1", max_batch_size=2, max_wait_ms=10)
+
+    async def scenario():
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_infer_endpoint_with_dummy_model():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "w") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * 1600)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/infer",
+            files={"file": ("sample.wav", buffer.getvalue(), "audio/wav")},
+            data={"model_name": "dummy"},
+        )
+        metrics = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.json()["text"]
+    assert "inference_batch_size" in metrics.text
@@ -0,0 +1,72 @@
+import pytest
+
+from transcription.models import registry
+from transcription.models.base import BaseTranscriptionModel
+
+
+class _SizedModel(BaseTranscriptionModel):
+    size = 0
+
+    def transcribe(self, audio_path):
+        return {"text": "", "chunks": []}
+
+    def memory_bytes(self) -> int:
+        return self.size
+
+
+def _make_model(name, size):
+    return type(f"Model_{name}", (_SizedModel,), {"name": name, "size": size})
+
+
+def test_model_cache_hits_and_misses(monkeypatch):
+    monkeypatch.setitem(registry._REGISTRY, "small", _make_model("small", 10))
+    cache = registry.ModelCache(max_bytes=100)
+
+    first = cache.get("small")
+    second = cache.get("small")
+
+    assert first is second
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_model_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setitem(registry._REGISTRY, "a", _make_model("a", 60))
+    monkeypatch.setitem(registry._REGISTRY, "b", _make_model("b", 30))
+    monkeypatch.setitem(registry._REGISTRY, "c", _make_model("c", 40))
+    cache = registry.ModelCache(max_bytes=100)
+
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 100
+    cache.get("a")
+    assert cache.stats()["hits"] == 2
+
+
+def test_model_cache_unknown_model():
+    cache = registry.ModelCache(max_bytes=100)
+    with pytest.raises(ValueError):
+        cache.get("inexistant")
+
+
+def test_string_references_are_imported_on_first_use(monkeypatch):
+    monkeypatch.setitem(registry._REGISTRY, "lazy", "transcription.models.dummy:DummyModel")
+
+    from transcription.models.dummy import DummyModel
+
+    assert registry.get_model_class("lazy") is DummyModel
+    assert registry._REGISTRY["lazy"] is DummyModel
+    assert "lazy" in registry.model_names()
+
+
+def test_model_version_is_read_without_importing_backend(monkeypatch):
+    monkeypatch.setitem(registry._REGISTRY, "absent", "module.inexistant:Modele")
+    monkeypatch.setitem(registry._VERSIONS, "absent", "v9")
+
+    assert registry.model_version("absent") == "v9"
+    assert registry.model_version("dummy") == "v1"
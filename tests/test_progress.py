@@ -0,0 +1,54 @@
+import json
+
+from worker import progress
+
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+
+    def xadd(self, key, fields, **kwargs):
+        self.store.append((key, fields))
+
+    def expire(self, key, ttl):
+        pass
+
+    def execute(self):
+        pass
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = []
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self.store)
+
+
+def test_progress_publisher_reports_percent_and_eta(monkeypatch):
+    fake = _FakeRedis()
+    monkeypatch.setattr(progress, "get_redis", lambda: fake)
+    publisher = progress.ProgressPublisher("job-1", total_seconds=120.0)
+    publisher.start_time -= 10
+
+    publisher.partial([{"timestamp": (0.0, 1.0), "text": "Bonjour"}], processed_seconds=30.0)
+
+    key, fields = fake.store[0]
+    data = json.loads(fields["data"])
+    assert key == "job:job-1:partials"
+    assert fields["event"] == "partial"
+    assert data["progress"] == 25.0
+    assert 29 <= data["eta_seconds"] <= 31
+
+
+def test_progress_publisher_survives_redis_errors(monkeypatch):
+    def broken():
+        raise ConnectionError("redis indisponible")
+
+    monkeypatch.setattr(progress, "get_redis", broken)
+    publisher = progress.ProgressPublisher("job-1", total_seconds=10.0)
+
+    publisher.partial([], processed_seconds=5.0)
+    publisher.finish("completed")
+
+    assert publisher.enabled is False
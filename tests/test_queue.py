@@ -0,0 +1,87 @@
+import fakeredis
+from rq import Queue
+from rq.job import Job, JobStatus
+
+from api import queue as queue_module
+
+
+def _runs(count, output_type="subtitle", transcribed=False, tier=0):
+    return [
+        {
+            "job_id": f"job-{index}",
+            "output_type": output_type,
+            "model_name": "dummy",
+            "profile": False,
+            "transcribed": transcribed,
+            "tier": tier,
+        }
+        for index in range(count)
+    ]
+
+
+def test_get_redis_shares_one_pool(monkeypatch):
+    monkeypatch.setattr(queue_module, "_pool", None)
+
+    first = queue_module.get_redis()
+    second = queue_module.get_redis()
+
+    assert first.connection_pool is second.connection_pool
+
+
+def test_enqueue_runs_monolithic(monkeypatch):
+    redis_conn = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(queue_module, "get_redis", lambda: redis_conn)
+    monkeypatch.setattr(queue_module, "PIPELINE_MODE", "monolithic")
+
+    queue_module.enqueue_runs(_runs(3))
+
+    queue = Queue("transcription", connection=redis_conn)
+    jobs = queue.get_jobs()
+    assert [job.args[0] for job in jobs] == ["job-0", "job-1", "job-2"]
+    assert all(job.func_name == "worker.tasks.process_job" for job in jobs)
+
+
+def test_enqueue_runs_stages_defers_dependents(monkeypatch):
+    redis_conn = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(queue_module, "get_redis", lambda: redis_conn)
+    monkeypatch.setattr(queue_module, "PIPELINE_MODE", "stages")
+
+    queue_module.enqueue_runs(_runs(2, output_type="embedded_video"))
+
+    assert Queue(queue_module.EXTRACT_QUEUE, connection=redis_conn).job_ids == ["job-0-extract", "job-1-extract"]
+    assert Queue(queue_module.TRANSCRIBE_QUEUE, connection=redis_conn).job_ids == []
+    render = Job.fetch("job-0-render", connection=redis_conn)
+    assert render.get_status() == JobStatus.DEFERRED
+    assert render.dependency_ids == ["job-0-subtitle"]
+
+
+def test_enqueue_runs_skips_inference_for_transcribed_jobs(monkeypatch):
+    redis_conn = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(queue_module, "get_redis", lambda: redis_conn)
+    monkeypatch.setattr(queue_module, "PIPELINE_MODE", "stages")
+
+    queue_module.enqueue_runs(_runs(2, transcribed=True))
+
+    assert Queue(queue_module.SUBTITLE_QUEUE, connection=redis_conn).job_ids == ["job-0-subtitle", "job-1-subtitle"]
+    assert Queue(queue_module.EXTRACT_QUEUE, connection=redis_conn).job_ids == []
+
+
+def test_priority_tier_and_queue_names(monkeypatch):
+    monkeypatch.setattr(queue_module, "PRIORITY_TIER_SECONDS", [120.0, 1200.0])
+
+    assert queue_module.priority_tier(10.0) == 0
+    assert queue_module.priority_tier(600.0) == 1
+    assert queue_module.priority_tier(7200.0) == 2
+    assert queue_module.priority_tier(None) == 2
+    assert queue_module.tier_queues("transcription") == ["transcription", "transcription-1", "transcription-2"]
+
+
+def test_enqueue_runs_routes_by_tier(monkeypatch):
+    redis_conn = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(queue_module, "get_redis", lambda: redis_conn)
+    monkeypatch.setattr(queue_module, "PIPELINE_MODE", "monolithic")
+
+    queue_module.enqueue_runs(_runs(1, tier=2))
+
+    assert Queue("transcription", connection=redis_conn).count == 0
+    assert Queue("transcription-2", connection=redis_conn).count == 1
@@ -0,0 +1,62 @@
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from inference.app import app
+from transcription.models import remote
+from transcription.models.remote import RemoteModel, encode_pcm16
+
+
+def test_remote_model_against_local_inference_app(monkeypatch):
+    monkeypatch.setattr(remote, "REMOTE_MODEL_NAME", "dummy")
+    samples = np.zeros(1600, dtype=np.float32)
+
+    with TestClient(app) as client:
+        model = RemoteModel(client=client)
+        single = model.transcribe(samples)
+        batch = model.transcribe_batch([samples, samples, samples])
+
+    assert single["text"]
+    assert [result["text"] for result in batch] == [single["text"]] * 3
+
+
+def test_encode_pcm16_clips_and_halves_payload():
+    samples = np.array([0.0, 0.5, 2.0, -2.0], dtype=np.float32)
+
+    payload = encode_pcm16(samples)
+
+    assert len(payload) == samples.nbytes // 2
+    assert np.frombuffer(payload, dtype="<i2").tolist() == [0, 16383, 32767, -32767]
+
+
+def test_remote_model_retries_unavailable_server(monkeypatch):
+    monkeypatch.setattr(remote, "INFERENCE_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"text": "ok", "chunks": []})
+
+    client = httpx.Client(base_url="http://inference", transport=httpx.MockTransport(handler))
+    result = RemoteModel(client=client).transcribe(np.zeros(160, dtype=np.float32))
+
+    assert result["text"] == "ok"
+    assert len(calls) == 3
+    assert calls[0].headers["content-type"] == "application/octet-stream"
+
+
+def test_remote_model_does_not_retry_client_errors(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400)
+
+    client = httpx.Client(base_url="http://inference", transport=httpx.MockTransport(handler))
+    with pytest.raises(httpx.HTTPStatusError):
+        RemoteModel(client=client).transcribe(np.zeros(160, dtype=np.float32))
+
+    assert len(calls) == 1
@@ -0,0 +1,29 @@
+import importlib
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import settings, db
+    from worker import result_cache
+
+    for module in (settings, db, result_cache):
+        importlib.reload(module)
+    db.init_db()
+
+    first = result_cache.cache_key("hash-1", "dummy", "v1", {})
+    second = result_cache.cache_key("hash-2", "dummy", "v1", {})
+    result_cache.put_transcription(first, {"text": "a" * 100, "chunks": []})
+    result_cache.put_transcription(second, {"text": "b" * 100, "chunks": []})
+
+    result_cache.evict(max_bytes=150)
+
+    assert result_cache.get_transcription(first) is None
+    assert result_cache.get_transcription(second)["text"] == "b" * 100
+    assert db.get_result_cache_stats()["evictions"] == 1
+
+
+def test_cache_key_depends_on_pipeline_params():
+    from worker.result_cache import cache_key
+
+    assert cache_key("h", "whisper", "v1", {"a": 1}) != cache_key("h", "whisper", "v1", {"a": 2})
+    assert cache_key("h", "whisper", "v1", {"a": 1}) == cache_key("h", "whisper", "v1", {"a": 1})
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+from rq import Queue
+
+from worker import scheduling
+
+
+def _enqueue(queue, job_id, seconds_ago):
+    job = queue.enqueue("worker.tasks.process_job", job_id, "text", "dummy", job_id=job_id)
+    job.enqueued_at = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+    job.save()
+
+
+def test_order_queues_prefers_short_jobs_then_ages(monkeypatch):
+    monkeypatch.setattr(scheduling, "priority_key", lambda tier, enqueued_at: enqueued_at + tier * 600)
+    redis_conn = fakeredis.FakeStrictRedis()
+    tiers = {"transcription": 0, "transcription-1": 1, "transcription-2": 2}
+    short, medium, long = (Queue(name, connection=redis_conn) for name in tiers)
+
+    _enqueue(long, "long", seconds_ago=100)
+    _enqueue(short, "short", seconds_ago=10)
+    assert [queue.name for queue in scheduling.order_queues([short, medium, long], tiers)] == [
+        "transcription",
+        "transcription-2",
+        "transcription-1",
+    ]
+
+    # Après plus de deux paliers de vieillissement, le job long passe devant
+    long.remove("long")
+    _enqueue(long, "very-old", seconds_ago=1300)
+    assert scheduling.order_queues([short, medium, long], tiers)[0].name == "transcription-2"
+
+def test_tiered_queue_names(monkeypatch):
+    monkeypatch.setattr(scheduling, "tier_queues", lambda name: [name, f"{name}-1"])
+
+    assert scheduling.tiered_queue_names(["transcription", "extract"]) == {
+        "transcription": 0,
+        "transcription-1": 1,
+        "extract": 0,
+        "extract-1": 1,
+    }
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from transcription import sharding
+from transcription.audio import SAMPLE_RATE
+
+
+class _ClockModel:
+    # Un chunk par seconde, dont le texte est la seconde absolue encodée dans le signal
+    def transcribe(self, samples):
+        seconds = len(samples) // SAMPLE_RATE
+        return {
+            "text": "",
+            "chunks": [
+                {"timestamp": (float(i), float(i + 1)), "text": str(int(samples[i * SAMPLE_RATE]))}
+                for i in range(seconds)
+            ],
+        }
+
+
+def test_plan_segments_overlap_and_cover():
+    segments = sharding.plan_segments(100, 30, 5)
+
+    assert segments == [(0.0, 30), (25.0, 55.0), (50.0, 80.0), (75.0, 100)]
+    assert sharding.plan_segments(20, 30, 5) == [(0.0, 20)]
+    with pytest.raises(ValueError):
+        sharding.plan_segments(100, 10, 10)
+
+
+def test_sharded_transcription_restores_absolute_timeline(monkeypatch):
+    monkeypatch.setattr(sharding, "_replica", _ClockModel())
+    total = 95
+    samples = (np.arange(total * SAMPLE_RATE) // SAMPLE_RATE).astype("float32")
+    transcriber = sharding.ShardedTranscriber(
+        "dummy", workers=2, segment_seconds=30, overlap_seconds=6,
+        executor=ThreadPoolExecutor(max_workers=2),
+    )
+
+    result = transcriber.transcribe(samples)
+    transcriber.shutdown()
+
+    starts = [chunk["timestamp"][0] for chunk in result["chunks"]]
+    assert starts == [float(second) for second in range(total)]
+    assert all(chunk["text"] == str(int(chunk["timestamp"][0])) for chunk in result["chunks"])
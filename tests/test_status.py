@@ -0,0 +1,85 @@
+import asyncio
+import importlib
+import threading
+import time
+
+
+def _reload(tmp_path, monkeypatch):
+    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
+    from api import db, settings, status
+
+    importlib.reload(settings)
+    importlib.reload(db)
+    importlib.reload(status)
+    db.create_job("job-1", "sample.wav", "/tmp/sample.wav")
+    return db, status
+
+
+def test_cache_is_used_only_while_subscribed_and_invalidated_by_notify(tmp_path, monkeypatch):
+    db, status = _reload(tmp_path, monkeypatch)
+    hub = status.StatusHub()
+
+    hub.load("job-1")
+    assert hub.cached("job-1") is None
+
+    hub.connected = True
+    hub.load("job-1")
+    db.transition_job("job-1", "queued")
+    assert hub.cached("job-1")["status"] == "uploaded"
+
+    hub.notify("job-1")
+    assert hub.cached("job-1") is None
+    assert hub.get("job-1")["status"] == "queued"
+
+
+def test_load_racing_with_notify_is_not_cached(tmp_path, monkeypatch):
+    db, status = _reload(tmp_path, monkeypatch)
+    hub = status.StatusHub()
+    hub.connected = True
+    get_job = db.get_job
+
+    def stale_read(job_id):
+        # Le worker change le statut et notifie pendant la lecture
+        job = get_job(job_id)
+        db.transition_job(job_id, "queued")
+        hub.notify(job_id)
+        return job
+
+    monkeypatch.setattr(status.db, "get_job", stale_read)
+    assert hub.load("job-1")["status"] == "uploaded"
+    assert hub.cached("job-1") is None
+
+    monkeypatch.setattr(status.db, "get_job", get_job)
+    assert hub.load("job-1")["status"] == "queued"
+    assert hub.cached("job-1")["status"] == "queued"
+
+
+def test_wait_for_change_wakes_on_notification(tmp_path, monkeypatch):
+    db, status = _reload(tmp_path, monkeypatch)
+    hub = status.StatusHub()
+    hub.connected = True
+
+    def worker():
+        time.sleep(0.2)
+        db.transition_job("job-1", "processing")
+        hub.notify("job-1")
+
+    async def scenario():
+        threading.Thread(target=worker).start()
+        start = time.monotonic()
+        result = await hub.wait_for_change("job-1", "uploaded", timeout=10)
+        return result, time.monotonic() - start
+
+    result, elapsed = asyncio.run(scenario())
+
+    assert result["status"] == "processing"
+    assert elapsed < 5
+
+
+def test_wait_for_change_returns_immediately_when_already_different(tmp_path, monkeypatch):
+    _, status = _reload(tmp_path, monkeypatch)
+    hub = status.StatusHub()
+
+    result = asyncio.run(hub.wait_for_change("job-1", "queued", timeout=10))
+
+    assert result["status"] == "uploaded"
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from api import storage
+
+
+def test_save_upload_streams_and_hashes(tmp_path):
+    content = b"abcdefghij" * 100
+    upload = UploadFile(file=io.BytesIO(content), filename="sample.wav")
+    destination = tmp_path / "sample.wav"
+
+    size, digest = asyncio.run(storage.save_upload(upload, destination, max_bytes=10_000, chunk_size=64))
+
+    assert size == len(content)
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert destination.read_bytes() == content
+
+
+def test_save_upload_rejects_oversized_file(tmp_path):
+    upload = UploadFile(file=io.BytesIO(b"x" * 1000), filename="big.wav")
+    destination = tmp_path / "big.wav"
+
+    with pytest.raises(storage.UploadTooLargeError):
+        asyncio.run(storage.save_upload(upload, destination, max_bytes=500, chunk_size=64))
+
+    assert not destination.exists()
+
+
+def _multipart_request(content, filename="sample.wav", piece=7):
+    from starlette.requests import Request
+
+    body = (
+        b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="' + filename.encode() + b'"\r\n'
+        b"Content-Type: audio/wav\r\n\r\n" + content + b"\r\n--xyz--\r\n"
+    )
+    # Corps découpé en petits morceaux, sans Content-Length (envoi chunked)
+    messages = [
+        {"type": "http.request", "body": body[index:index + piece], "more_body": index + piece < len(body)}
+        for index in range(0, len(body), piece)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "headers": [(b"content-type", b"multipart/form-data; boundary=xyz")]}
+    return Request(scope, receive)
+
+
+def test_receive_upload_streams_part_straight_to_destination(tmp_path):
+    content = b"abcdefghij" * 100
+    destination = tmp_path / "sample.wav"
+    request = _multipart_request(content)
+
+    filename, path, size, digest = asyncio.run(
+        storage.receive_upload(request, lambda name: destination, max_bytes=10_000, chunk_size=64)
+    )
+
+    assert (filename, path, size) == ("sample.wav", destination, len(content))
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert destination.read_bytes() == content
+
+
+def test_receive_upload_enforces_limit_while_receiving(tmp_path):
+    destination = tmp_path / "big.wav"
+    request = _multipart_request(b"x" * 1000)
+
+    with pytest.raises(storage.UploadTooLargeError):
+        asyncio.run(storage.receive_upload(request, lambda name: destination, max_bytes=500, chunk_size=64))
+
+    assert not destination.exists()
+
+
+def test_transcript_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "RESULT_DIR", tmp_path)
+    transcription = {
+        "text": "Bonjour le monde",
+        "chunks": [
+            {"timestamp": (0.0, 1.5), "text": "Bonjour"},
+            {"timestamp": (1.5, 3.0), "text": " le monde"},
+        ],
+    }
+
+    storage.save_transcript("job-1", transcription)
+
+    assert storage.load_transcript("job-1") == transcription
+    assert storage.load_transcript("job-2") is None
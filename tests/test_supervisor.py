@@ -0,0 +1,87 @@
+import os
+import time
+
+from worker.supervisor import Supervisor
+
+
+def _wait_reap(supervisor, remaining, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    crashed = []
+    while len(supervisor.children) > remaining and time.monotonic() < deadline:
+        crashed += supervisor.reap()
+        time.sleep(0.05)
+    return crashed
+
+
+def test_desired_workers_follows_queue_depth_within_bounds():
+    supervisor = Supervisor(lambda slot: None, min_workers=1, max_workers=4, jobs_per_worker=2)
+
+    assert supervisor.desired_workers(0) == 1
+    assert supervisor.desired_workers(5) == 3
+    assert supervisor.desired_workers(100) == 4
+    assert supervisor.desired_workers(None) == 1
+
+
+def test_crashed_child_is_restarted():
+    def crash(slot):
+        raise RuntimeError("boom")
+
+    supervisor = Supervisor(crash, min_workers=1, max_workers=1, jobs_per_worker=1)
+    supervisor.scale(0)
+    assert len(supervisor.children) == 1
+
+    assert _wait_reap(supervisor, remaining=0) == [0]
+    supervisor.child_main = lambda slot: time.sleep(30)
+    supervisor.scale(0)
+    assert list(supervisor.children.values()) == [0]
+    supervisor.shutdown(timeout=5)
+    assert supervisor.children == {}
+
+
+def test_scale_down_retires_one_child_without_restart():
+    supervisor = Supervisor(lambda slot: time.sleep(30), min_workers=1, max_workers=3, jobs_per_worker=1)
+    supervisor.scale(3)
+    assert sorted(supervisor.children.values()) == [0, 1, 2]
+
+    supervisor.scale(0)
+    assert supervisor.active() == 2
+    assert _wait_reap(supervisor, remaining=2) == []
+    assert len(supervisor.children) == 2
+    assert all(os.kill(pid, 0) is None for pid in supervisor.children)
+    supervisor.shutdown(timeout=5)
+
+
+POOL_METRICS_SCRIPT = """
+import os, sys, time
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = sys.argv[1]
+from prometheus_client import CollectorRegistry, multiprocess
+from worker import metrics
+from worker.supervisor import Supervisor
+
+supervisor = Supervisor(lambda slot: metrics.JOBS.labels("completed").inc(), 2, 2, 1)
+supervisor.scale(0)
+while supervisor.children:
+    supervisor.reap()
+    time.sleep(0.05)
+registry = CollectorRegistry()
+multiprocess.MultiProcessCollector(registry)
+print(registry.get_sample_value("worker_jobs_total", {"status": "completed"}))
+"""
+
+
+def test_pool_children_metrics_are_aggregated(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    root = Path(__file__).resolve().parents[1]
+    output = subprocess.run(
+        [sys.executable, "-c", POOL_METRICS_SCRIPT, str(tmp_path)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    ).stdout
+
+    assert float(output.strip().splitlines()[-1]) == 2.0
@@ -0,0 +1,64 @@
+import numpy as np
+
+from transcription.audio import SAMPLE_RATE
+from transcription.vad import SpeechTimeline, detect_speech, speech_regions
+
+
+def _signal(*parts):
+    # parts : (secondes, parole ?) mis bout à bout
+    rng = np.random.default_rng(0)
+    return np.concatenate(
+        [
+            (0.1 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+            if speech
+            else np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+            for seconds, speech in parts
+        ]
+    )
+
+
+def test_speech_regions_skip_silence_and_bridge_short_pauses():
+    samples = _signal((5, False), (2, True), (0.3, False), (1, True), (5, False), (0.1, True), (2, False))
+
+    regions = speech_regions(samples, padding_ms=0)
+
+    # La pause de 0,3 s est comblée, le bruit de 0,1 s est écarté
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert abs(start / SAMPLE_RATE - 5.0) < 0.05
+    assert abs(end / SAMPLE_RATE - 8.3) < 0.05
+    assert speech_regions(np.zeros(SAMPLE_RATE, dtype=np.float32)) == []
+
+
+def test_timestamps_are_mapped_back_to_original_timeline():
+    samples = _signal((4, False), (2, True), (6, False), (2, True), (1, False))
+
+    speech, timeline = detect_speech(samples, padding_ms=0)
+
+    assert abs(len(speech) / SAMPLE_RATE - 4.0) < 0.1
+    assert timeline.skipped_ratio > 0.7
+    chunks = timeline.remap_chunks(
+        [
+            {"timestamp": (0.5, 1.5), "text": "un"},
+            {"timestamp": (2.5, None), "text": "deux"},
+        ]
+    )
+    first, second = (chunk["timestamp"] for chunk in chunks)
+    assert abs(first[0] - 4.5) < 0.05 and abs(first[1] - 5.5) < 0.05
+    assert abs(second[0] - 12.5) < 0.05 and abs(second[1] - 14.0) < 0.05
+
+
+def test_boundary_end_stays_in_previous_region():
+    timeline = SpeechTimeline([(SAMPLE_RATE, 2 * SAMPLE_RATE), (5 * SAMPLE_RATE, 6 * SAMPLE_RATE)], 7 * SAMPLE_RATE)
+
+    assert timeline.to_original(1.0, end=True) == 2.0
+    assert timeline.to_original(1.0) == 5.0
+
+
+def test_detect_speech_without_silence_keeps_audio():
+    samples = _signal((3, True))
+
+    speech, timeline = detect_speech(samples)
+
+    assert timeline is None
+    assert speech is samples
@@ -0,0 +1,38 @@
+import torch
+
+from inference import registry as inference_registry
+from transcription.models import registry, whisper_model
+
+
+class _FakePipeline:
+    def __init__(self, task, checkpoint, torch_dtype, device):
+        self.checkpoint = checkpoint
+        self.device = device
+        self.model = torch.nn.Sequential(torch.nn.Linear(64, 64), torch.nn.LayerNorm(64))
+
+
+def test_int8_variant_quantizes_linear_layers_on_cpu(monkeypatch):
+    monkeypatch.setattr(whisper_model, "pipeline", _FakePipeline)
+    monkeypatch.setattr(whisper_model, "NUM_THREADS", 2)
+    threads = []
+    monkeypatch.setattr(torch, "set_num_threads", threads.append)
+
+    full = whisper_model.WhisperSmallModel()
+    quantized = whisper_model.WhisperSmallInt8Model()
+
+    assert quantized._model.checkpoint == "openai/whisper-small.en"
+    assert quantized._model.device == -1
+    assert not isinstance(quantized._model.model[0], torch.nn.Linear)
+    assert quantized.memory_bytes() < full.memory_bytes()
+    assert threads == [2, 2]
+
+
+def test_variants_are_registered_with_distinct_versions():
+    names = {variant.name for variant in whisper_model.WHISPER_VARIANTS}
+    versions = {variant.version for variant in whisper_model.WHISPER_VARIANTS}
+
+    assert len(versions) == len(whisper_model.WHISPER_VARIANTS)
+    assert names == set(registry.WHISPER_MODELS)
+    assert all(registry.get_model_class(name) for name in names)
+    assert all(registry._VERSIONS[variant.name] == variant.version for variant in whisper_model.WHISPER_VARIANTS)
+    assert ("whisper-int8", "v1") in inference_registry._REGISTRY
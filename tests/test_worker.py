@@ -1,22 +1,14 @@
-import importlib
 import wave
+from pathlib import Path
 
 from api import db
-from api.storage import upload_path
-from worker.tasks import process_job
 
 
-def test_process_job_dummy(tmp_path, monkeypatch):
-    monkeypatch.setenv("APP_BASE_DIR", str(tmp_path))
-    from api import settings
-
-    importlib.reload(settings)
-    importlib.reload(db)
-
-    db.init_db()
+def test_process_job_dummy(worker_modules):
+    storage, tasks = worker_modules
 
     job_id = "job-test"
-    wav_path = upload_path(job_id, "sample.wav")
+    wav_path = storage.upload_path(job_id, "sample.wav")
     wav_path.parent.mkdir(parents=True, exist_ok=True)
 
     with wave.open(str(wav_path), "w") as wav_file:
@@ -27,8 +19,308 @@ def test_process_job_dummy(tmp_path, monkeypatch):
 
     db.create_job(job_id, "sample.wav", str(wav_path))
 
-    process_job(job_id, "text", "dummy")
+    tasks.process_job(job_id, "text", "dummy")
 
     job = db.get_job(job_id)
     assert job["status"] == "completed"
     assert job["result_text"]
+
+
+def _write_wav(path):
+    with wave.open(str(path), "w") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * 16000)
+
+
+def test_process_job_reuses_cached_transcription(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    for job_id in ("job-a", "job-b"):
+        wav_path = storage.upload_path(job_id, "sample.wav")
+        _write_wav(wav_path)
+        db.create_job(job_id, "sample.wav", str(wav_path), content_hash=storage.hash_file(wav_path))
+
+    tasks.process_job("job-a", "subtitle", "dummy")
+
+    def fail_load(name):
+        raise AssertionError("le modèle ne doit pas être rechargé")
+
+    monkeypatch.setattr(tasks, "load_model", fail_load)
+    tasks.process_job("job-b", "subtitle", "dummy")
+
+    job = db.get_job("job-b")
+    assert job["status"] == "completed"
+    assert Path(job["output_path"]).read_text() == Path(db.get_job("job-a")["output_path"]).read_text()
+    stats = db.get_result_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_rerun_does_not_rewrite_outputs_shared_through_the_cache(worker_modules, monkeypatch):
+    from transcription.models import registry
+    from transcription.models.dummy import DummyModel
+
+    storage, tasks = worker_modules
+
+    class OtherModel(DummyModel):
+        name = "dummy-other"
+
+        def transcribe(self, audio):
+            return {"text": "Autre modèle", "chunks": [{"timestamp": (0.0, 1.0), "text": "Autre modèle"}]}
+
+    monkeypatch.setitem(registry._REGISTRY, "dummy-other", OtherModel)
+    for job_id in ("job-a", "job-b"):
+        wav_path = storage.upload_path(job_id, "sample.wav")
+        _write_wav(wav_path)
+        db.create_job(job_id, "sample.wav", str(wav_path), content_hash=storage.hash_file(wav_path))
+
+    tasks.process_job("job-a", "subtitle", "dummy")
+    tasks.process_job("job-b", "subtitle", "dummy")
+    shared = Path(db.get_job("job-b")["output_path"]).read_text()
+    tasks.process_job("job-a", "subtitle", "dummy-other")
+
+    assert "Autre modèle" in Path(db.get_job("job-a")["output_path"]).read_text()
+    assert Path(db.get_job("job-b")["output_path"]).read_text() == shared
+    tasks.process_job("job-b", "subtitle", "dummy")
+    assert Path(db.get_job("job-b")["output_path"]).read_text() == shared
+
+
+def test_pipeline_stages_chain(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    job_id = "job-stages"
+    wav_path = storage.upload_path(job_id, "sample.wav")
+    _write_wav(wav_path)
+    db.create_job(job_id, "sample.wav", str(wav_path))
+
+    for stage in (tasks.extract_stage, tasks.transcribe_stage, tasks.subtitle_stage):
+        stage(job_id, "subtitle", "dummy")
+
+    job = db.get_job(job_id)
+    assert job["status"] == "completed"
+    assert job["started_at"]
+    assert Path(job["output_path"]).exists()
+    assert not storage.result_path(job_id, "npy").exists()
+    events = db._connect().execute(
+        "SELECT event FROM job_events WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    assert [row["event"] for row in events] == [
+        "extract:started", "processing", "extract:completed",
+        "transcribe:started", "transcribe:completed",
+        "subtitle:started", "completed", "subtitle:completed",
+    ]
+
+
+def test_stages_count_each_cache_lookup_once(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    for job_id in ("job-a", "job-b"):
+        wav_path = storage.upload_path(job_id, "sample.wav")
+        _write_wav(wav_path)
+        db.create_job(job_id, "sample.wav", str(wav_path), content_hash=storage.hash_file(wav_path))
+        for stage in (tasks.extract_stage, tasks.transcribe_stage, tasks.subtitle_stage):
+            stage(job_id, "text", "dummy")
+
+    stats = db.get_result_cache_stats()
+    assert db.get_job("job-b")["status"] == "completed"
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_output_stages_reuse_chunks_keyed_by_the_transcribing_worker(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    job_id = "job-stages-vad"
+    wav_path = storage.upload_path(job_id, "sample.wav")
+    _write_wav(wav_path)
+    db.create_job(job_id, "sample.wav", str(wav_path))
+
+    tasks.extract_stage(job_id, "subtitle", "dummy")
+    monkeypatch.setattr(tasks, "VAD_ENABLED", True)
+    tasks.transcribe_stage(job_id, "subtitle", "dummy")
+    key = storage.load_model_transcript(job_id, "dummy")[1]
+
+    # Worker média sans VAD : clé différente, mais aucune nouvelle transcription
+    def fail(*args, **kwargs):
+        raise AssertionError("le worker média ne doit pas transcrire")
+
+    monkeypatch.setattr(tasks, "VAD_ENABLED", False)
+    monkeypatch.setattr(tasks, "load_model", fail)
+    monkeypatch.setattr(tasks, "load_audio", fail)
+    tasks.subtitle_stage(job_id, "subtitle", "dummy")
+
+    assert db.get_job(job_id)["status"] == "completed"
+    assert (tasks.result_cache.entry_dir(key) / "subtitle.srt").exists()
+
+
+def test_process_job_records_stage_metrics(worker_modules, monkeypatch):
+    from prometheus_client import REGISTRY
+
+    storage, tasks = worker_modules
+
+    def sample(name, labels=None):
+        return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+    before = {
+        stage: sample("worker_stage_seconds_count", {"stage": stage})
+        for stage in ("extract", "model_load", "inference", "srt")
+    }
+    rtf_before = sample("worker_realtime_factor_count", {"model": "dummy"})
+    completed_before = sample("worker_jobs_total", {"status": "completed"})
+
+    wav_path = storage.upload_path("job-metrics", "sample.wav")
+    _write_wav(wav_path)
+    db.create_job("job-metrics", "sample.wav", str(wav_path))
+    tasks.process_job("job-metrics", "subtitle", "dummy")
+
+    for stage, count in before.items():
+        assert sample("worker_stage_seconds_count", {"stage": stage}) == count + 1
+    assert sample("worker_realtime_factor_count", {"model": "dummy"}) == rtf_before + 1
+    assert sample("worker_jobs_total", {"status": "completed"}) == completed_before + 1
+    assert sample("worker_model_cache_requests_total", {"result": "hit"}) + sample(
+        "worker_model_cache_requests_total", {"result": "miss"}
+    ) > 0
+
+
+def test_process_job_with_profile_stores_pstats(worker_modules, monkeypatch):
+    import pstats
+
+    storage, tasks = worker_modules
+
+    wav_path = storage.upload_path("job-profiled", "sample.wav")
+    _write_wav(wav_path)
+    db.create_job("job-profiled", "sample.wav", str(wav_path))
+    tasks.process_job("job-profiled", "text", "dummy", profile=True)
+    tasks.process_job("job-profiled", "text", "dummy", profile=True)
+
+    assert db.get_job("job-profiled")["status"] == "completed"
+    stats = pstats.Stats(str(storage.profile_path("job-profiled")))
+    # Le profil ne couvre que la dernière exécution
+    assert [stats.stats[key][1] for key in stats.stats if key[2] == "_prepare"] == [1]
+
+
+def test_changing_output_type_reuses_stored_chunks(worker_modules, monkeypatch):
+    storage, tasks = worker_modules
+
+    wav_path = storage.upload_path("job-chunks", "sample.wav")
+    _write_wav(wav_path)
+    db.create_job("job-chunks", "sample.wav", str(wav_path))
+    tasks.process_job("job-chunks", "text", "dummy")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("aucune inférence ne doit être relancée")
+
+    monkeypatch.setattr(tasks, "load_model", fail)
+    monkeypatch.setattr(tasks, "load_audio", fail)
+    monkeypatch.setattr(tasks.result_cache, "get_transcription", fail)
+    tasks.process_job("job-chunks", "subtitle", "dummy")
+
+    job = db.get_job("job-chunks")
+    assert job["status"] == "completed"
+    assert Path(job["output_path"]).read_text().startswith("1\n")
+    events = db._connect().execute(
+        "SELECT event FROM job_events WHERE job_id = ?", ("job-chunks",)
+    ).fetchall()
+    assert "transcript_reused" in [row["event"] for row in events]
+
+
+def test_changing_model_runs_inference_again(worker_modules, monkeypatch):
+    from transcription.models import registry
+    from transcription.models.dummy import DummyModel
+
+    storage, tasks = worker_modules
+
+    class OtherModel(DummyModel):
+        name = "dummy-other"
+
+        def transcribe(self, audio):
+            return {"text": "Autre modèle", "chunks": [{"timestamp": (0.0, 1.0), "text": "Autre modèle"}]}
+
+    monkeypatch.setitem(registry._REGISTRY, "dummy-other", OtherModel)
+    wav_path = storage.upload_path("job-models", "sample.wav")
+    _write_wav(wav_path)
+    db.create_job("job-models", "sample.wav", str(wav_path))
+    storage.export_path("job-models", "srt").write_text("ancien export")
+    tasks.process_job("job-models", "text", "dummy")
+    tasks.process_job("job-models", "text", "dummy-other")
+
+    job = db.get_job("job-models")
+    assert job["status"] == "completed"
+    assert job["result_text"] == "Autre modèle"
+    assert storage.transcript_model("job-models") == "dummy-other"
+    assert not storage.export_path("job-models", "srt").exists()
+    events = db._connect().execute(
+        "SELECT event FROM job_events WHERE job_id = ?", ("job-models",)
+    ).fetchall()
+    assert "transcript_reused" not in [row["event"] for row in events]
+
+
+def test_process_job_skips_silence_and_remaps_timestamps(worker_modules, monkeypatch):
+    import numpy as np
+
+    storage, tasks = worker_modules
+    monkeypatch.setattr(tasks, "VAD_ENABLED", True)
+    heard = []
+
+    class RecordingModel:
+        name = "dummy"
+
+        def transcribe(self, audio):
+            heard.append(len(audio))
+            return {"text": "Bonjour", "chunks": [{"timestamp": (0.0, 1.0), "text": "Bonjour"}]}
+
+    monkeypatch.setattr(tasks, "load_model", lambda name: RecordingModel())
+    wav_path = storage.upload_path("job-vad", "sample.wav")
+    wav_path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    speech = (3000 * rng.standard_normal(16000 * 2)).astype("<i2")
+    pcm = np.concatenate([np.zeros(16000 * 6, dtype="<i2"), speech, np.zeros(16000 * 2, dtype="<i2")])
+    with wave.open(str(wav_path), "w") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(pcm.tobytes())
+    db.create_job("job-vad", "sample.wav", str(wav_path))
+
+    tasks.process_job("job-vad", "subtitle", "dummy")
+
+    job = db.get_job("job-vad")
+    assert job["status"] == "completed"
+    assert heard and heard[0] < 16000 * 3
+    assert job["vad_skipped_ratio"] > 0.7
+    start, _ = storage.load_transcript("job-vad")["chunks"][0]["timestamp"]
+    assert 5.5 < start < 6.0
+
+
+def test_worker_entrypoint_starts_metrics_and_works(monkeypatch):
+    import runpy
+
+    import fakeredis
+    from redis import Redis
+
+    from api import settings
+    from transcription.models import registry
+    from worker import metrics, scheduling
+
+    calls = []
+
+    class RecordingWorker:
+        def __init__(self, queues, connection=None, tiers=None):
+            calls.append(("worker", tiers))
+
+        def work(self):
+            calls.append(("work",))
+
+    monkeypatch.setattr(settings, "WORKER_MODE", "single")
+    monkeypatch.setattr(settings, "WORKER_QUEUES", ["transcription"])
+    monkeypatch.setattr(metrics, "start_metrics_server", lambda port: calls.append(("metrics", port)))
+    monkeypatch.setattr(registry, "preload_model", lambda name: calls.append(("preload", name)))
+    monkeypatch.setattr(scheduling, "PriorityWorker", RecordingWorker)
+    monkeypatch.setattr(Redis, "from_url", classmethod(lambda cls, url: fakeredis.FakeRedis()))
+
+    runpy.run_module("worker.worker", run_name="__main__")
+
+    assert calls[0] == ("metrics", settings.WORKER_METRICS_PORT)
+    assert calls[1] == ("preload", settings.DEFAULT_MODEL)
+    assert calls[-1] == ("work",)
@@ -1,9 +1,91 @@
+import io
+import wave
 from pathlib import Path
+from typing import Any, BinaryIO, Dict, Union
+
 import ffmpeg
+import numpy as np
+
+# Fréquence attendue par Whisper
+SAMPLE_RATE = 16000
 
 
 def extract_audio(input_path: Path, output_path: Path) -> None:
-    # extrait l'audio d'une vidéo et le save en wav
+    # extrait l'audio d'une vidéo et le save en wav (16 kHz mono, déjà au format du modèle)
+    stream = ffmpeg.input(str(input_path))
+    stream = ffmpeg.output(stream, str(output_path), vn=None, ac=1, ar=SAMPLE_RATE)
+    ffmpeg.run(stream, overwrite_output=True)
+
+
+def _read_pcm16_wav(source: Union[Path, BinaryIO], sample_rate: int):
+    # WAV déjà au bon format (PCM 16 bits mono) : lecture directe, sans ffmpeg
+    try:
+        with wave.open(str(source) if isinstance(source, Path) else source) as wav_file:
+            if (
+                wav_file.getframerate() != sample_rate
+                or wav_file.getnchannels() != 1
+                or wav_file.getsampwidth() != 2
+            ):
+                return None
+            frames = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def load_audio(input_path: Path, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # Décode l'audio en PCM float32 mono via un pipe ffmpeg, sans fichier intermédiaire
+    if input_path.suffix.lower() == ".wav":
+        samples = _read_pcm16_wav(input_path, sample_rate)
+        if samples is not None:
+            return samples
     stream = ffmpeg.input(str(input_path))
-    stream = ffmpeg.output(stream, str(output_path))
-    ffmpeg.run(stream, overwrite_output=True)
\ No newline at end of file
+    stream = ffmpeg.output(stream, "pipe:", vn=None, format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+    out, _ = ffmpeg.run(stream, capture_stdout=True, capture_stderr=True)
+    return np.frombuffer(out, dtype="<f4")
+
+
+def load_audio_bytes(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # Même décodage que load_audio, pour un fichier reçu en mémoire (ffmpeg lit stdin)
+    samples = _read_pcm16_wav(io.BytesIO(data), sample_rate)
+    if samples is not None:
+        return samples
+    stream = ffmpeg.input("pipe:")
+    stream = ffmpeg.output(stream, "pipe:", vn=None, format="f32le", acodec="pcm_f32le", ac=1, ar=sample_rate)
+    out, _ = ffmpeg.run(stream, input=data, capture_stdout=True, capture_stderr=True)
+    return np.frombuffer(out, dtype="<f4")
+
+
+def probe_duration(input_path: Path) -> float:
+    if input_path.suffix.lower() == ".wav":
+        # En-tête WAV lu directement, sans lancer ffprobe
+        try:
+            with wave.open(str(input_path)) as wav_file:
+                return wav_file.getnframes() / wav_file.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    info = ffmpeg.probe(str(input_path))
+    return float(info["format"].get("duration") or 0.0)
+
+
+def probe_media(input_path: Path) -> Dict[str, Any]:
+    # Durée et codecs (premier flux audio / vidéo) d'un fichier reçu
+    if input_path.suffix.lower() == ".wav":
+        try:
+            with wave.open(str(input_path)) as wav_file:
+                return {
+                    "duration": wav_file.getnframes() / wav_file.getframerate(),
+                    "audio_codec": f"pcm_s{8 * wav_file.getsampwidth()}le",
+                    "video_codec": None,
+                }
+        except (wave.Error, EOFError):
+            pass
+    info = ffmpeg.probe(str(input_path))
+    codecs: Dict[str, str] = {}
+    for stream in info.get("streams", []):
+        codecs.setdefault(stream.get("codec_type"), stream.get("codec_name"))
+    return {
+        "duration": float(info["format"].get("duration") or 0.0) or None,
+        "audio_codec": codecs.get("audio"),
+        "video_codec": codecs.get("video"),
+    }
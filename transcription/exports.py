@@ -0,0 +1,38 @@
+import json
+from typing import Callable, Dict, Tuple
+
+from .srt_generator import iter_cues, srt_text
+from .utils import format_time
+
+
+def vtt_text(transcription: dict) -> str:
+    # WebVTT : mêmes cues que le SRT, millisecondes séparées par un point
+    lines = ["WEBVTT", ""]
+    for _, start, end, text in iter_cues(transcription):
+        lines.append(f"{format_time(start).replace(',', '.')} --> {format_time(end).replace(',', '.')}")
+        lines.append(text)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def json_text(transcription: dict) -> str:
+    segments = [
+        {"start": start, "end": end, "text": text}
+        for _, start, end, text in iter_cues(transcription)
+    ]
+    return json.dumps({"text": transcription.get("text", ""), "segments": segments}, ensure_ascii=False)
+
+
+# Format → (rendu depuis les chunks, type MIME)
+EXPORTERS: Dict[str, Tuple[Callable[[dict], str], str]] = {
+    "srt": (srt_text, "application/x-subrip"),
+    "vtt": (vtt_text, "text/vtt"),
+    "json": (json_text, "application/json"),
+}
+
+
+def export_text(transcription: dict, fmt: str) -> str:
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Format d'export inconnu: {fmt}")
+    render, _ = EXPORTERS[fmt]
+    return render(transcription)
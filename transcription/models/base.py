@@ -1,11 +1,25 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+
+import numpy as np
+
+# Fichier audio, ou PCM float32 mono 16 kHz déjà décodé (voir transcription.audio.load_audio)
+AudioInput = Union[Path, np.ndarray]
 
 
 class BaseTranscriptionModel(ABC):
     name: str
+    version: str = "v1"
 
     @abstractmethod
-    def transcribe(self, audio_path: Path) -> Dict[str, Any]:
+    def transcribe(self, audio: AudioInput) -> Dict[str, Any]:
         raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[AudioInput]) -> List[Dict[str, Any]]:
+        # Par défaut un appel par fichier ; les modèles batchables surchargent
+        return [self.transcribe(audio) for audio in audios]
+
+    def memory_bytes(self) -> int:
+        # Empreinte mémoire estimée, utilisée par le cache de modèles
+        return 0
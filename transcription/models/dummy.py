@@ -1,11 +1,10 @@
-from pathlib import Path
-from transcription.models.base import BaseTranscriptionModel
+from transcription.models.base import AudioInput, BaseTranscriptionModel
 
 
 class DummyModel(BaseTranscriptionModel):
     name = "dummy"
 
-    def transcribe(self, audio_path: Path):
+    def transcribe(self, audio: AudioInput):
         return {
             "text": "Transcription factice pour tests.",
             "chunks": [
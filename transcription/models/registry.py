@@ -1,18 +1,169 @@
-from typing import Dict, Type
+import importlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Type, Union
 
 from transcription.models.base import BaseTranscriptionModel
-from transcription.models.whisper_model import WhisperModel
-from transcription.models.dummy import DummyModel
 
+logger = logging.getLogger("transcription_models")
 
-_REGISTRY: Dict[str, Type[BaseTranscriptionModel]] = {
-    WhisperModel.name: WhisperModel,
-    DummyModel.name: DummyModel,
+# Modèles référencés par "module:Classe" : le backend (torch, transformers, httpx)
+# n'est importé qu'à la première utilisation du modèle, pas au chargement du registre.
+# Une classe peut aussi être enregistrée directement (register_model).
+WHISPER_MODELS = (
+    "whisper",
+    "whisper-int8",
+    "whisper-small",
+    "whisper-small-int8",
+    "whisper-base",
+    "whisper-base-int8",
+)
+_WHISPER_CLASSES = (
+    "WhisperModel",
+    "WhisperInt8Model",
+    "WhisperSmallModel",
+    "WhisperSmallInt8Model",
+    "WhisperBaseModel",
+    "WhisperBaseInt8Model",
+)
+
+_REGISTRY: Dict[str, Union[str, Type[BaseTranscriptionModel]]] = {
+    **{
+        name: f"transcription.models.whisper_model:{class_name}"
+        for name, class_name in zip(WHISPER_MODELS, _WHISPER_CLASSES)
+    },
+    "dummy": "transcription.models.dummy:DummyModel",
+    "remote": "transcription.models.remote:RemoteModel",
+}
+
+# Versions des modèles référencés par chaîne (doivent suivre l'attribut version de
+# la classe) : la clé du cache de résultats se calcule sans importer torch.
+# "remote" n'y figure pas : sa version dépend de l'environnement et son import est léger.
+_VERSIONS: Dict[str, str] = {
+    "whisper": "openai/whisper-medium.en",
+    "whisper-int8": "openai/whisper-medium.en:int8",
+    "whisper-small": "openai/whisper-small.en",
+    "whisper-small-int8": "openai/whisper-small.en:int8",
+    "whisper-base": "openai/whisper-base.en",
+    "whisper-base-int8": "openai/whisper-base.en:int8",
+    "dummy": "v1",
 }
 
+# Plugins externes : entry points de ce groupe, nom = nom du modèle
+ENTRY_POINT_GROUP = "transcription.models"
 
-def load_model(name: str) -> BaseTranscriptionModel:
-    model_class = _REGISTRY.get(name)
-    if not model_class:
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(6 * 1024**3)))
+
+
+class ModelCache:
+    # Cache LRU des modèles chargés, borné par leur empreinte mémoire
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[str, BaseTranscriptionModel]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, name: str) -> BaseTranscriptionModel:
+        model_class = get_model_class(name)
+        with self._lock:
+            if name in self._models:
+                self.hits += 1
+                self._models.move_to_end(name)
+                return self._models[name]
+            self.misses += 1
+            model = model_class()
+            self._models[name] = model
+            self._sizes[name] = model.memory_bytes()
+            self._evict(keep=name)
+            return model
+
+    def _evict(self, keep: str) -> None:
+        # Le modèle demandé reste toujours en cache, même s'il dépasse la limite
+        while self.total_bytes() > self.max_bytes and len(self._models) > 1:
+            name = next(iter(self._models))
+            if name == keep:
+                break
+            del self._models[name]
+            del self._sizes[name]
+            self.evictions += 1
+            logger.info("Modèle évincé du cache: %s", name)
+
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "models": len(self._models),
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+
+def register_model(
+    name: str, target: Union[str, Type[BaseTranscriptionModel]], version: Optional[str] = None
+) -> None:
+    _REGISTRY[name] = target
+    if version is not None:
+        _VERSIONS[name] = version
+    else:
+        _VERSIONS.pop(name, None)
+
+
+def _plugins() -> Dict[str, str]:
+    return {entry_point.name: entry_point.value for entry_point in entry_points(group=ENTRY_POINT_GROUP)}
+
+
+def model_names() -> List[str]:
+    return sorted(set(_REGISTRY) | set(_plugins()))
+
+
+def get_model_class(name: str) -> Type[BaseTranscriptionModel]:
+    target = _REGISTRY.get(name) or _plugins().get(name)
+    if not target:
         raise ValueError(f"Modèle inconnu: {name}")
-    return model_class()
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(":")
+        logger.info("Import du backend %s pour le modèle %s", module_name, name)
+        target = getattr(importlib.import_module(module_name), class_name)
+        _REGISTRY[name] = target
+    return target
+
+
+def model_version(name: str) -> str:
+    # Version connue du registre si le backend n'est pas encore importé
+    target = _REGISTRY.get(name)
+    if isinstance(target, str) and name in _VERSIONS:
+        return _VERSIONS[name]
+    return get_model_class(name).version
+
+
+_cache = ModelCache(MODEL_CACHE_MAX_BYTES)
+
+
+def load_model(name: str) -> BaseTranscriptionModel:
+    return _cache.get(name)
+
+
+def preload_model(name: str) -> BaseTranscriptionModel:
+    logger.info("Préchargement du modèle %s", name)
+    return _cache.get(name)
+
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
@@ -0,0 +1,87 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from transcription.audio import load_audio
+from transcription.models.base import AudioInput, BaseTranscriptionModel
+
+logger = logging.getLogger("transcription_models")
+
+INFERENCE_URL = os.getenv("INFERENCE_URL", "http://inference:8001")
+REMOTE_MODEL_NAME = os.getenv("REMOTE_MODEL_NAME", "whisper")
+REMOTE_MODEL_VERSION = os.getenv("REMOTE_MODEL_VERSION", "v1")
+# Requêtes simultanées par worker (= connexions keep-alive du pool)
+INFERENCE_MAX_CONCURRENCY = int(os.getenv("INFERENCE_MAX_CONCURRENCY", "4"))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", "600"))
+INFERENCE_RETRIES = int(os.getenv("INFERENCE_RETRIES", "3"))
+INFERENCE_BACKOFF_SECONDS = float(os.getenv("INFERENCE_BACKOFF_SECONDS", "0.5"))
+
+# Réponses du serveur qui justifient un nouvel essai (surcharge, redémarrage)
+RETRY_STATUSES = {502, 503, 504}
+
+
+def encode_pcm16(samples: np.ndarray) -> bytes:
+    # float32 [-1, 1] → PCM 16 bits little-endian : deux fois plus compact que le float32
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+class RemoteModel(BaseTranscriptionModel):
+    # Délègue la transcription au serveur d'inférence (inference/app.py) : les
+    # workers ne chargent pas de modèle et partagent les répliques du serveur
+    name = "remote"
+    version = f"{REMOTE_MODEL_NAME}:{REMOTE_MODEL_VERSION}"
+
+    def __init__(self, client: Optional[httpx.Client] = None) -> None:
+        self._client = client or httpx.Client(
+            base_url=INFERENCE_URL,
+            timeout=INFERENCE_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=INFERENCE_MAX_CONCURRENCY,
+                max_keepalive_connections=INFERENCE_MAX_CONCURRENCY,
+            ),
+        )
+        self._slots = threading.BoundedSemaphore(INFERENCE_MAX_CONCURRENCY)
+
+    def _post(self, payload: bytes) -> Dict[str, Any]:
+        params = {"model_name": REMOTE_MODEL_NAME, "model_version": REMOTE_MODEL_VERSION}
+        headers = {"Content-Type": "application/octet-stream"}
+        attempt = 0
+        while True:
+            try:
+                with self._slots:
+                    response = self._client.post("/infer/pcm", content=payload, params=params, headers=headers)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = httpx.HTTPStatusError(
+                    f"Serveur d'inférence indisponible ({response.status_code})",
+                    request=response.request,
+                    response=response,
+                )
+            except httpx.TransportError as exc:
+                error = exc
+            if attempt >= INFERENCE_RETRIES:
+                raise error
+            delay = INFERENCE_BACKOFF_SECONDS * 2**attempt
+            logger.warning("Inférence distante en échec (%s), nouvel essai dans %.1fs", error, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def transcribe(self, audio: AudioInput) -> Dict[str, Any]:
+        samples = load_audio(audio) if isinstance(audio, Path) else audio
+        return self._post(encode_pcm16(samples))
+
+    def transcribe_batch(self, audios: List[AudioInput]) -> List[Dict[str, Any]]:
+        # Requêtes en parallèle : le micro-batcher du serveur les regroupe
+        with ThreadPoolExecutor(max_workers=INFERENCE_MAX_CONCURRENCY) as executor:
+            return list(executor.map(self.transcribe, audios))
+
+    def close(self) -> None:
+        self._client.close()
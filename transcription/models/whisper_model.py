@@ -1,26 +1,121 @@
-from pathlib import Path
+import os
+from typing import List
+
+import numpy as np
 import torch
 from transformers import pipeline
 
-from transcription.models.base import BaseTranscriptionModel
+from transcription.audio import SAMPLE_RATE
+from transcription.models.base import AudioInput, BaseTranscriptionModel
+
+CHUNK_LENGTH = 28
+# Nombre de segments de 28 s passés ensemble dans le modèle
+BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+# Budget de threads intra-op de torch par processus (0 = valeur par défaut de torch)
+NUM_THREADS = int(os.getenv("WHISPER_NUM_THREADS", "0"))
+
+
+def _state_bytes(module: torch.nn.Module) -> int:
+    # Les poids int8 des Linear quantifiés sont dans des paramètres "packés",
+    # absents de parameters() : on compte tout le state_dict
+    total = 0
+    for value in module.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        total += sum(t.numel() * t.element_size() for t in tensors if isinstance(t, torch.Tensor))
+    return total
 
 
 class WhisperModel(BaseTranscriptionModel):
     name = "whisper"
+    checkpoint = "openai/whisper-medium.en"
+    version = checkpoint
+    # Quantification dynamique int8 des couches Linear (CPU uniquement)
+    quantize = False
 
     def __init__(self) -> None:
-        device = 0 if torch.cuda.is_available() else -1
-        dtype = torch.float16 if torch.cuda.is_available() else torch.float32
+        if NUM_THREADS > 0:
+            torch.set_num_threads(NUM_THREADS)
+        use_cuda = torch.cuda.is_available() and not self.quantize
         self._model = pipeline(
             "automatic-speech-recognition",
-            "openai/whisper-medium.en",
-            torch_dtype=dtype,
-            device=device,
+            self.checkpoint,
+            torch_dtype=torch.float16 if use_cuda else torch.float32,
+            device=0 if use_cuda else -1,
+        )
+        if self.quantize:
+            self._model.model = torch.ao.quantization.quantize_dynamic(
+                self._model.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    @staticmethod
+    def _inputs(audio: AudioInput):
+        # Chemin de fichier, ou PCM float32 mono 16 kHz déjà décodé
+        if isinstance(audio, np.ndarray):
+            return {"raw": audio, "sampling_rate": SAMPLE_RATE}
+        return str(audio)
+
+    def transcribe(self, audio: AudioInput):
+        return self._model(
+            self._inputs(audio),
+            chunk_length_s=CHUNK_LENGTH,
+            batch_size=BATCH_SIZE,
+            return_timestamps=True,
         )
 
-    def transcribe(self, audio_path: Path):
+    def transcribe_batch(self, audios: List[AudioInput]):
+        # Les segments de tous les fichiers sont regroupés dans les mêmes passes
         return self._model(
-            str(audio_path),
-            chunk_length_s=28,
+            [self._inputs(audio) for audio in audios],
+            chunk_length_s=CHUNK_LENGTH,
+            batch_size=BATCH_SIZE,
             return_timestamps=True,
         )
+
+    def memory_bytes(self) -> int:
+        return _state_bytes(self._model.model)
+
+
+# Variantes pour les nœuds CPU : checkpoints plus petits et/ou poids int8.
+# La version inclut la quantification pour ne pas partager le cache de résultats.
+
+
+class WhisperInt8Model(WhisperModel):
+    name = "whisper-int8"
+    version = f"{WhisperModel.checkpoint}:int8"
+    quantize = True
+
+
+class WhisperSmallModel(WhisperModel):
+    name = "whisper-small"
+    checkpoint = "openai/whisper-small.en"
+    version = checkpoint
+
+
+class WhisperSmallInt8Model(WhisperModel):
+    name = "whisper-small-int8"
+    checkpoint = "openai/whisper-small.en"
+    version = f"{checkpoint}:int8"
+    quantize = True
+
+
+class WhisperBaseModel(WhisperModel):
+    name = "whisper-base"
+    checkpoint = "openai/whisper-base.en"
+    version = checkpoint
+
+
+class WhisperBaseInt8Model(WhisperModel):
+    name = "whisper-base-int8"
+    checkpoint = "openai/whisper-base.en"
+    version = f"{checkpoint}:int8"
+    quantize = True
+
+
+WHISPER_VARIANTS = [
+    WhisperModel,
+    WhisperInt8Model,
+    WhisperSmallModel,
+    WhisperSmallInt8Model,
+    WhisperBaseModel,
+    WhisperBaseInt8Model,
+]
@@ -0,0 +1,182 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from transcription.audio import SAMPLE_RATE
+
+logger = logging.getLogger("transcription_sharding")
+
+Segment = Tuple[float, float]
+SegmentResult = Tuple[List[Segment], int, Dict[str, Any]]
+
+# Modèle chargé une fois par processus du pool
+_replica = None
+
+
+def plan_segments(total_seconds: float, segment_seconds: float, overlap_seconds: float) -> List[Segment]:
+    # Découpe [0, total] en segments de segment_seconds qui se chevauchent de overlap_seconds
+    if overlap_seconds >= segment_seconds:
+        raise ValueError(
+            f"Chevauchement ({overlap_seconds} s) supérieur ou égal à la durée des segments ({segment_seconds} s)"
+        )
+    if total_seconds <= segment_seconds:
+        return [(0.0, total_seconds)]
+    step = segment_seconds - overlap_seconds
+    segments = []
+    start = 0.0
+    while start + overlap_seconds < total_seconds:
+        end = min(start + segment_seconds, total_seconds)
+        segments.append((start, end))
+        if end >= total_seconds:
+            break
+        start += step
+    return segments
+
+
+def shift_chunks(
+    transcription: Dict[str, Any],
+    segment: Segment,
+    lower: float,
+    upper: float,
+) -> List[Dict[str, Any]]:
+    # Recale les timestamps d'un segment sur la timeline absolue et ne garde que
+    # les chunks dont le milieu tombe dans la zone [lower, upper) du segment.
+    offset, end_of_segment = segment
+    chunks = []
+    for chunk in transcription.get("chunks", []):
+        start, end = chunk["timestamp"]
+        start = start or 0.0
+        if end is None or end < start:
+            end = end_of_segment - offset
+        middle = offset + (start + end) / 2
+        if not lower <= middle < upper:
+            continue
+        chunks.append({"timestamp": (offset + start, offset + end), "text": chunk["text"]})
+    return chunks
+
+
+def segment_bounds(segments: List[Segment], index: int) -> Tuple[float, float]:
+    # Chaque segment "possède" la moitié de chaque zone de chevauchement
+    start, end = segments[index]
+    lower = (segments[index - 1][1] + start) / 2 if index > 0 else float("-inf")
+    upper = (end + segments[index + 1][0]) / 2 if index + 1 < len(segments) else float("inf")
+    return lower, upper
+
+
+def build_transcription(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"text": " ".join(chunk["text"].strip() for chunk in chunks), "chunks": chunks}
+
+
+def iter_merged(results: Iterator[SegmentResult]) -> Iterator[Tuple[Segment, List[Dict[str, Any]]]]:
+    # Version incrémentale de merge_transcriptions : chunks définitifs segment par segment
+    for segments, index, transcription in results:
+        lower, upper = segment_bounds(segments, index)
+        yield segments[index], shift_chunks(transcription, segments[index], lower, upper)
+
+
+def merge_transcriptions(segments: List[Segment], transcriptions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results = ((segments, index, transcription) for index, transcription in enumerate(transcriptions))
+    chunks = []
+    for _, segment_chunks in iter_merged(results):
+        chunks.extend(segment_chunks)
+    return build_transcription(chunks)
+
+
+def iter_transcribe(
+    model: Any, samples: np.ndarray, segment_seconds: float, overlap_seconds: float
+) -> Iterator[SegmentResult]:
+    # Transcription séquentielle, segment par segment, dans le processus courant
+    segments = plan_segments(len(samples) / SAMPLE_RATE, segment_seconds, overlap_seconds)
+    for index, (start, end) in enumerate(segments):
+        yield segments, index, model.transcribe(
+            samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        )
+
+
+def _init_replica(model_name: str, threads: int) -> None:
+    global _replica
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from transcription.models.registry import load_model
+
+    _replica = load_model(model_name)
+
+
+def _transcribe_segment(samples: np.ndarray) -> Dict[str, Any]:
+    return _replica.transcribe(samples)
+
+
+class ShardedTranscriber:
+    # Transcrit un long enregistrement sur un pool de répliques du modèle
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        segment_seconds: float,
+        overlap_seconds: float,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.workers = workers
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self._executor = executor
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            # spawn : un fork après l'initialisation de torch peut bloquer
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_replica,
+                initargs=(self.model_name, threads),
+            )
+        return self._executor
+
+    def iter_segments(self, samples: np.ndarray) -> Iterator[SegmentResult]:
+        # Soumet tous les segments puis les rend dans l'ordre, dès qu'ils sont prêts
+        segments = plan_segments(len(samples) / SAMPLE_RATE, self.segment_seconds, self.overlap_seconds)
+        futures = [
+            self.executor.submit(
+                _transcribe_segment,
+                samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)],
+            )
+            for start, end in segments
+        ]
+        for index, future in enumerate(futures):
+            yield segments, index, future.result()
+
+    def transcribe(self, samples: np.ndarray) -> Dict[str, Any]:
+        chunks = []
+        for _, segment_chunks in iter_merged(self.iter_segments(samples)):
+            chunks.extend(segment_chunks)
+        return build_transcription(chunks)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+_transcribers: Dict[Tuple[str, int, float, float], ShardedTranscriber] = {}
+
+
+def get_transcriber(
+    model_name: str, workers: int, segment_seconds: float, overlap_seconds: float
+) -> ShardedTranscriber:
+    # Le pool (et ses répliques chargées) est conservé d'un job à l'autre
+    key = (model_name, workers, segment_seconds, overlap_seconds)
+    if key not in _transcribers:
+        _transcribers[key] = ShardedTranscriber(model_name, workers, segment_seconds, overlap_seconds)
+    return _transcribers[key]
@@ -1,12 +1,13 @@
 from pathlib import Path
+from typing import Iterator, Tuple
+
 from .utils import format_time
 
 CHUNK_LENGTH = 28
 
 
-def generate_srt(transcription: dict, srt_path: Path) -> None:
-    # Conversion de la transcription Whisper en fichier SRT
-    lines = []
+def iter_cues(transcription: dict) -> Iterator[Tuple[int, float, float, str]]:
+    # Chunks Whisper → (index, début, fin, texte) sur la timeline absolue
     offset = 0
 
     for index, chunk in enumerate(transcription["chunks"]):
@@ -16,15 +17,19 @@ def generate_srt(transcription: dict, srt_path: Path) -> None:
             offset += CHUNK_LENGTH
             continue
 
-        start += offset
-        end += offset
+        yield index + 1, start + offset, end + offset, chunk["text"].strip()
 
-        start_str = format_time(start)
-        end_str = format_time(end)
 
-        lines.append(str(index + 1))
-        lines.append(f"{start_str} --> {end_str}")
-        lines.append(chunk["text"].strip())
+def srt_text(transcription: dict) -> str:
+    lines = []
+    for index, start, end, text in iter_cues(transcription):
+        lines.append(str(index))
+        lines.append(f"{format_time(start)} --> {format_time(end)}")
+        lines.append(text)
         lines.append("")
+    return "\n".join(lines)
+
 
-    srt_path.write_text("\n".join(lines), encoding="utf-8")
+def generate_srt(transcription: dict, srt_path: Path) -> None:
+    # Conversion de la transcription Whisper en fichier SRT
+    srt_path.write_text(srt_text(transcription), encoding="utf-8")
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from transcription.audio import SAMPLE_RATE
+
+Region = Tuple[int, int]
+
+
+def frame_energy_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    # Énergie RMS (dBFS) de trames contiguës ; la dernière trame incomplète est complétée de zéros
+    frames = -(-len(samples) // frame_length)
+    padded = np.zeros(frames * frame_length, dtype=np.float32)
+    padded[:len(samples)] = samples
+    power = np.einsum("ij,ij->i", padded.reshape(frames, frame_length), padded.reshape(frames, frame_length))
+    return 10 * np.log10(power / frame_length + 1e-12)
+
+
+def speech_regions(
+    samples: np.ndarray,
+    threshold_db: float = -45.0,
+    frame_ms: float = 30.0,
+    min_speech_ms: float = 250.0,
+    min_silence_ms: float = 600.0,
+    padding_ms: float = 200.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> List[Region]:
+    # Zones de parole [début, fin) en échantillons : trames au-dessus du seuil, pauses
+    # plus courtes que min_silence_ms comblées, zones de moins de min_speech_ms
+    # écartées, puis marge de padding_ms de chaque côté
+    if len(samples) == 0:
+        return []
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    active = frame_energy_db(samples, frame_length) > threshold_db
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    keep_gap = (starts[1:] - ends[:-1]) * frame_ms >= min_silence_ms
+    starts = starts[np.concatenate(([True], keep_gap))]
+    ends = ends[np.concatenate((keep_gap, [True]))]
+    long_enough = (ends - starts) * frame_ms >= min_speech_ms
+    starts, ends = starts[long_enough], ends[long_enough]
+    padding = int(sample_rate * padding_ms / 1000)
+    starts = np.maximum(starts * frame_length - padding, 0)
+    ends = np.minimum(ends * frame_length + padding, len(samples))
+    regions: List[Region] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+class SpeechTimeline:
+    # Correspondance entre l'audio condensé (zones de parole mises bout à bout)
+    # et la timeline d'origine, pour recaler les timestamps du modèle
+
+    def __init__(self, regions: List[Region], total_samples: int, sample_rate: int = SAMPLE_RATE) -> None:
+        self.sample_rate = sample_rate
+        self.total_samples = total_samples
+        bounds = np.asarray(regions, dtype=np.int64).reshape(-1, 2)
+        lengths = bounds[:, 1] - bounds[:, 0]
+        self.bounds = bounds
+        self.original_starts = bounds[:, 0] / sample_rate
+        self.original_ends = bounds[:, 1] / sample_rate
+        self.condensed_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) / sample_rate
+        self.speech_samples = int(lengths.sum())
+
+    @property
+    def skipped_ratio(self) -> float:
+        if not self.total_samples:
+            return 0.0
+        return 1 - self.speech_samples / self.total_samples
+
+    def condense(self, samples: np.ndarray) -> np.ndarray:
+        parts = [samples[start:end] for start, end in self.bounds.tolist()]
+        return np.concatenate(parts) if parts else samples[:0]
+
+    def to_original(self, seconds: float, end: bool = False) -> float:
+        # Une fin qui tombe pile à une jointure reste dans la zone précédente
+        index = int(np.searchsorted(self.condensed_starts, seconds, side="left" if end else "right")) - 1
+        index = min(max(index, 0), len(self.condensed_starts) - 1)
+        original = self.original_starts[index] + seconds - self.condensed_starts[index]
+        return float(min(original, self.original_ends[index]))
+
+    def remap_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        remapped = []
+        for chunk in chunks:
+            start, end = chunk["timestamp"]
+            start = self.to_original(start or 0.0)
+            if end is None:
+                # Fin inconnue : fin de la zone de parole du début
+                index = int(np.searchsorted(self.original_starts, start, side="right")) - 1
+                end = float(self.original_ends[max(index, 0)])
+            else:
+                end = self.to_original(end, end=True)
+            remapped.append({**chunk, "timestamp": (start, end)})
+        return remapped
+
+    def remap(self, transcription: Dict[str, Any]) -> Dict[str, Any]:
+        return {**transcription, "chunks": self.remap_chunks(transcription.get("chunks", []))}
+
+
+def detect_speech(samples: np.ndarray, **params: Any) -> Tuple[np.ndarray, Optional[SpeechTimeline]]:
+    # Audio condensé à transcrire + timeline (None si aucun silence à retirer)
+    regions = speech_regions(samples, **params)
+    if regions == [(0, len(samples))]:
+        return samples, None
+    timeline = SpeechTimeline(regions, len(samples))
+    return timeline.condense(samples), timeline
@@ -0,0 +1,118 @@
+import logging
+import time
+import traceback
+from typing import Dict, List, Optional, Sequence, Union
+
+from rq import Queue, SimpleWorker
+from rq.job import Job, JobStatus
+from rq.utils import now
+from rq.worker import WorkerStatus
+
+from worker.scheduling import order_queues
+from worker.tasks import process_batch
+
+logger = logging.getLogger("transcription_worker")
+
+BATCHABLE_FUNC = "worker.tasks.process_job"
+
+
+def claim_jobs(queue: Queue, limit: int) -> List[Job]:
+    # LREM est atomique : un job n'est réclamé que par un seul worker
+    jobs = []
+    for job_id in queue.get_job_ids(0, limit):
+        if queue.remove(job_id):
+            try:
+                jobs.append(Job.fetch(job_id, connection=queue.connection))
+            except Exception:
+                logger.warning("Job RQ introuvable: %s", job_id)
+    return jobs
+
+
+def collect_batch(
+    queue: Union[Queue, Sequence[Queue]],
+    max_jobs: int,
+    window_seconds: float,
+    poll_seconds: float = 0.2,
+    tiers: Optional[Dict[str, int]] = None,
+    idle_seconds: Optional[float] = None,
+) -> List[Job]:
+    # Attend le premier job, puis complète le lot jusqu'à max_jobs ou la fin de la fenêtre.
+    # Plusieurs files (paliers de durée) : réclamées par ordre d'échéance virtuelle.
+    # Sans job après idle_seconds, rend un lot vide (le worker entretient son heartbeat).
+    queues = list(queue) if isinstance(queue, (list, tuple)) else [queue]
+    batch: List[Job] = []
+    deadline = None
+    idle_deadline = time.monotonic() + idle_seconds if idle_seconds is not None else None
+    while len(batch) < max_jobs:
+        for current in order_queues(queues, tiers or {}):
+            if len(batch) >= max_jobs:
+                break
+            batch.extend(claim_jobs(current, max_jobs - len(batch)))
+        if batch and deadline is None:
+            deadline = time.monotonic() + window_seconds
+        if len(batch) >= max_jobs or (deadline is not None and time.monotonic() >= deadline):
+            break
+        if not batch and idle_deadline is not None and time.monotonic() >= idle_deadline:
+            break
+        time.sleep(poll_seconds)
+    return batch
+
+
+def _batchable(job: Job) -> bool:
+    # Un job profilé s'exécute seul pour que son profil ne mélange pas tout le lot
+    return job.func_name == BATCHABLE_FUNC and not job.kwargs.get("profile")
+
+
+class BatchWorker(SimpleWorker):
+    # Worker RQ enregistré (visible de Worker.count) qui réclame ses jobs par lots.
+    # Les jobs non groupables suivent le chemin d'exécution normal de RQ ; les jobs
+    # du lot passent par StartedJobRegistry puis handle_job_success / handle_job_failure,
+    # qui posent le statut final et mettent en file les jobs dépendants.
+
+    def run_batch(self, jobs: List[Job]) -> None:
+        batchable = [job for job in jobs if _batchable(job)]
+        for job in jobs:
+            if not _batchable(job):
+                self.execute_job(job, self._origin(job))
+        if not batchable:
+            return
+        executions = {}
+        for job in batchable:
+            executions[job.id] = self.prepare_execution(job)
+            self.prepare_job_execution(job)
+        logger.info("Lot de %s jobs", len(batchable))
+        try:
+            failed = process_batch([tuple(job.args) for job in batchable])
+        except Exception:
+            error = traceback.format_exc()
+            failed = {job.args[0]: error for job in batchable}
+        for job in batchable:
+            # handle_job_* nettoient l'exécution courante du worker : une par job du lot
+            self.execution = executions[job.id]
+            job.ended_at = now()
+            queue = self._origin(job)
+            if job.args[0] in failed:
+                job._status = JobStatus.FAILED
+                self.handle_job_failure(job, queue, queue.started_job_registry, exc_string=failed[job.args[0]])
+            else:
+                job._status = JobStatus.FINISHED
+                self.handle_job_success(job, queue, queue.started_job_registry)
+        self.set_state(WorkerStatus.IDLE)
+
+    def _origin(self, job: Job) -> Queue:
+        return Queue(job.origin, connection=self.connection)
+
+
+def work(
+    queues: Sequence[Queue], max_jobs: int, window_seconds: float, tiers: Optional[Dict[str, int]] = None
+) -> None:
+    worker = BatchWorker(queues, connection=queues[0].connection)
+    worker.register_birth()
+    try:
+        while True:
+            worker.heartbeat()
+            jobs = collect_batch(queues, max_jobs, window_seconds, tiers=tiers, idle_seconds=worker.worker_ttl / 2)
+            if jobs:
+                worker.run_batch(jobs)
+    finally:
+        worker.register_death()
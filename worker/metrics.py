@@ -0,0 +1,77 @@
+import os
+from typing import Iterator
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from transcription.models import registry
+
+STAGE_SECONDS = Histogram(
+    "worker_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+AUDIO_DURATION = Histogram(
+    "worker_audio_duration_seconds",
+    "Duration of the transcribed input audio",
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+)
+REALTIME_FACTOR = Histogram(
+    "worker_realtime_factor",
+    "Inference time divided by audio duration",
+    ["model"],
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5),
+)
+VAD_SKIPPED_RATIO = Histogram(
+    "worker_vad_skipped_ratio",
+    "Share of the audio skipped as non-speech before inference",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1),
+)
+JOBS = Counter("worker_jobs_total", "Jobs finished by the worker", ["status"])
+
+
+class ModelCacheCollector(Collector):
+    # Expose les compteurs du cache de modèles du processus (registry.cache_stats)
+    def collect(self) -> Iterator:
+        stats = registry.cache_stats()
+        requests = CounterMetricFamily(
+            "worker_model_cache_requests", "Model cache lookups", labels=["result"]
+        )
+        requests.add_metric(["hit"], stats["hits"])
+        requests.add_metric(["miss"], stats["misses"])
+        yield requests
+        yield CounterMetricFamily("worker_model_cache_evictions", "Models evicted", value=stats["evictions"])
+        yield GaugeMetricFamily("worker_model_cache_bytes", "Memory held by cached models", value=stats["bytes"])
+
+
+REGISTRY.register(ModelCacheCollector())
+
+
+def observe_inference(model_name: str, seconds: float, audio_seconds: float) -> None:
+    STAGE_SECONDS.labels("inference").observe(seconds)
+    if audio_seconds > 0:
+        REALTIME_FACTOR.labels(model_name).observe(seconds / audio_seconds)
+
+
+def start_metrics_server(port: int) -> None:
+    # Endpoint /metrics propre au worker (un par conteneur, 0 = désactivé)
+    if port:
+        start_http_server(port)
+
+
+def start_pool_metrics_server(port: int) -> None:
+    # Mode pool : un seul /metrics, servi par le superviseur, qui agrège les fichiers
+    # de tous les processus (PROMETHEUS_MULTIPROC_DIR). Les compteurs du cache de
+    # modèles, propres à chaque processus, n'y figurent pas.
+    if port:
+        pool_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(pool_registry)
+        start_http_server(port, registry=pool_registry)
+
+
+def mark_process_dead(pid: int) -> None:
+    # Fichiers de métriques d'un enfant du pool terminé
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,34 @@
+import cProfile
+import logging
+import pstats
+from contextlib import contextmanager
+from typing import Iterator
+
+from api.storage import profile_path
+
+logger = logging.getLogger("transcription_worker")
+
+
+@contextmanager
+def profiled(job_id: str, enabled: bool, reset: bool = False) -> Iterator[None]:
+    # cProfile autour de l'exécution du job ; aucun coût si le job n'est pas profilé.
+    # Les étapes d'une même exécution (PIPELINE_MODE=stages) sont cumulées dans un seul
+    # profil ; reset=True (début d'exécution) écarte le profil d'une exécution précédente.
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = profile_path(job_id)
+        try:
+            stats = pstats.Stats(profiler)
+            if path.exists() and not reset:
+                stats.add(str(path))
+            stats.dump_stats(str(path))
+        except Exception:
+            # Un profil illisible ne doit pas faire échouer le job
+            logger.exception("Impossible d'enregistrer le profil", extra={"job_id": job_id})
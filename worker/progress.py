@@ -0,0 +1,55 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from api.events import publish_partial, publish_status
+from api.queue import get_redis
+
+logger = logging.getLogger("transcription_worker")
+
+
+class ProgressPublisher:
+    # Publie les chunks transcrits, la progression et l'ETA d'un job en cours.
+    # Une indisponibilité de Redis ne doit jamais faire échouer le job.
+
+    def __init__(self, job_id: str, total_seconds: float) -> None:
+        self.job_id = job_id
+        self.total_seconds = total_seconds
+        self.start_time = time.time()
+        self.enabled = True
+        self._redis = None
+
+    def _publish(self, event: str, payload: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        try:
+            if self._redis is None:
+                self._redis = get_redis()
+            publish_partial(self._redis, self.job_id, event, payload)
+        except Exception:
+            logger.warning("Publication des résultats partiels impossible", extra={"job_id": self.job_id})
+            self.enabled = False
+
+    def partial(self, chunks: List[Dict[str, Any]], processed_seconds: float) -> None:
+        progress = min(processed_seconds / self.total_seconds, 1.0) if self.total_seconds else 1.0
+        elapsed = time.time() - self.start_time
+        eta: Optional[float] = elapsed * (1 - progress) / progress if progress > 0 else None
+        self._publish(
+            "partial",
+            {
+                "chunks": chunks,
+                "progress": round(progress * 100, 1),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+            },
+        )
+
+    def finish(self, status: str, **payload: Any) -> None:
+        self._publish(status, {"status": status, **payload})
+
+
+def notify_status(job_id: str, status: str) -> None:
+    # Prévient les processus API (cache de statuts, long-poll, WebSocket)
+    try:
+        publish_status(get_redis(), job_id, status)
+    except Exception:
+        logger.warning("Notification de statut impossible", extra={"job_id": job_id})
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from api import db
+from api.settings import CACHE_DIR, RESULT_CACHE_MAX_BYTES
+
+logger = logging.getLogger("transcription_worker")
+
+TRANSCRIPTION_FILE = "transcription.json"
+
+
+def cache_key(content_hash: str, model_name: str, model_version: str, params: Dict[str, Any]) -> str:
+    # Clé de cache : contenu du fichier + modèle + paramètres du pipeline
+    payload = json.dumps(
+        {
+            "content_hash": content_hash,
+            "model_name": model_name,
+            "model_version": model_version,
+            "params": params,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def entry_dir(key: str) -> Path:
+    return CACHE_DIR / key[:2] / key
+
+
+def get_transcription(key: str) -> Optional[Dict[str, Any]]:
+    path = entry_dir(key) / TRANSCRIPTION_FILE
+    if db.get_cache_entry(key) is None or not path.exists():
+        db.increment_counter("result_cache:misses")
+        return None
+    with db.transaction():
+        db.increment_counter("result_cache:hits")
+        db.touch_cache_entry(key)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def has_transcription(key: str) -> bool:
+    # Test de présence sans effet de bord : ni compteur hits/misses, ni mise à jour LRU
+    return db.get_cache_entry(key) is not None and (entry_dir(key) / TRANSCRIPTION_FILE).exists()
+
+
+def put_transcription(key: str, transcription: Dict[str, Any]) -> None:
+    directory = entry_dir(key)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / TRANSCRIPTION_FILE
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(transcription), encoding="utf-8")
+    os.replace(tmp_path, path)
+    _record(key)
+
+
+def link_artifact(key: str, name: str, destination: Path) -> bool:
+    # Réutilise un artefact déjà produit (lien physique, copie si impossible)
+    source = entry_dir(key) / name
+    if not source.exists():
+        return False
+    _link(source, destination)
+    return True
+
+
+def put_artifact(key: str, name: str, source: Path) -> None:
+    directory = entry_dir(key)
+    if not directory.exists():
+        return
+    _link(source, directory / name)
+    _record(key)
+
+
+def _link(source: Path, destination: Path) -> None:
+    if source.resolve() == destination.resolve():
+        return
+    destination.unlink(missing_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _entry_size(key: str) -> int:
+    directory = entry_dir(key)
+    if not directory.exists():
+        return 0
+    return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+
+def _record(key: str) -> None:
+    db.upsert_cache_entry(key, _entry_size(key))
+    evict()
+
+
+def evict(max_bytes: int = RESULT_CACHE_MAX_BYTES) -> None:
+    # Éviction LRU : supprime les entrées les moins récemment utilisées
+    entries = db.list_cache_entries_lru()
+    total = sum(entry["size_bytes"] for entry in entries)
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir(entry["key"]), ignore_errors=True)
+        with db.transaction():
+            db.delete_cache_entry(entry["key"])
+            db.increment_counter("result_cache:evictions")
+        total -= entry["size_bytes"]
+        logger.info("Entrée de cache évincée: %s", entry["key"])
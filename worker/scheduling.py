@@ -0,0 +1,47 @@
+import math
+from typing import Dict, List, Optional, Sequence
+
+from rq import Queue, SimpleWorker
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+
+from api.queue import priority_key, tier_queues
+
+
+def tiered_queue_names(names: Sequence[str]) -> Dict[str, int]:
+    # Files réelles d'un worker : chaque file de base déclinée en paliers de durée
+    return {name: tier for base in names for tier, name in enumerate(tier_queues(base))}
+
+
+def head_deadline(queue: Queue, tier: int) -> float:
+    # Échéance virtuelle du job en tête de file (inf si la file est vide)
+    job_ids = queue.get_job_ids(0, 0)
+    if not job_ids:
+        return math.inf
+    try:
+        job = Job.fetch(job_ids[0], connection=queue.connection)
+    except NoSuchJobError:
+        return math.inf
+    if job.enqueued_at is None:
+        return math.inf
+    return priority_key(tier, job.enqueued_at.timestamp())
+
+
+def order_queues(queues: Sequence[Queue], tiers: Dict[str, int]) -> List[Queue]:
+    # Plus courte échéance d'abord ; tri stable, les files vides gardent leur ordre
+    if len(queues) < 2:
+        return list(queues)
+    return sorted(queues, key=lambda queue: head_deadline(queue, tiers.get(queue.name, 0)))
+
+
+class PriorityWorker(SimpleWorker):
+    # SimpleWorker qui, avant chaque dequeue, réordonne ses files par palier de
+    # durée avec vieillissement : un job long finit par passer devant les courts
+
+    def __init__(self, queues, *args, tiers: Optional[Dict[str, int]] = None, **kwargs) -> None:
+        super().__init__(queues, *args, **kwargs)
+        self.tiers = tiers or {}
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        self._ordered_queues = order_queues(self._ordered_queues, self.tiers)
+        return super().dequeue_job_and_maintain_ttl(timeout, max_idle_time)
@@ -0,0 +1,185 @@
+import gc
+import logging
+import math
+import os
+import signal
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from redis import Redis
+from rq import Queue
+
+from api.settings import (
+    DEFAULT_MODEL,
+    POOL_JOBS_PER_WORKER,
+    POOL_MAX_WORKERS,
+    POOL_MIN_WORKERS,
+    POOL_SCALE_INTERVAL_SECONDS,
+    POOL_THREADS_PER_WORKER,
+    REDIS_URL,
+    TRANSCRIBE_QUEUE,
+    WORKER_METRICS_PORT,
+)
+from worker.metrics import mark_process_dead, start_pool_metrics_server
+from worker.scheduling import PriorityWorker, tiered_queue_names
+
+logger = logging.getLogger("transcription_worker")
+
+
+def _set_torch_threads(threads: int) -> None:
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+class Supervisor:
+    # Processus parent du mode pool : forke les workers, relance ceux qui meurent et
+    # ajuste leur nombre à la profondeur de file. Les enfants partagent en
+    # copie-sur-écriture tout ce que le parent a chargé avant le fork (poids du modèle).
+
+    def __init__(
+        self,
+        child_main: Callable[[int], None],
+        min_workers: int,
+        max_workers: int,
+        jobs_per_worker: int,
+    ) -> None:
+        self.child_main = child_main
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.jobs_per_worker = max(1, jobs_per_worker)
+        # pid → slot (un enfant relancé reprend le plus petit slot libre)
+        self.children: Dict[int, int] = {}
+        # Enfants à qui l'arrêt a été demandé (réduction) : pas de relance
+        self.retiring: Dict[int, int] = {}
+        self.stopping = False
+
+    def desired_workers(self, depth: Optional[int]) -> int:
+        if depth is None:
+            # File illisible (Redis indisponible) : on garde l'effectif actuel
+            return min(max(self.active(), self.min_workers), self.max_workers)
+        return min(max(math.ceil(depth / self.jobs_per_worker), self.min_workers), self.max_workers)
+
+    def active(self) -> int:
+        return len(self.children) - len(self.retiring)
+
+    def spawn(self) -> int:
+        used = set(self.children.values())
+        slot = next(index for index in range(len(used) + 1) if index not in used)
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                self.child_main(slot)
+            except BaseException:
+                logger.exception("Worker du pool (slot %s) arrêté sur erreur", slot)
+                code = 1
+            finally:
+                # Pas de nettoyage hérité du parent (atexit, finaliseurs)
+                os._exit(code)
+        self.children[pid] = slot
+        logger.info("Worker du pool démarré (slot %s, pid %s)", slot, pid)
+        return pid
+
+    def reap(self) -> List[int]:
+        # Retire les enfants terminés ; renvoie les slots de ceux qui ont planté
+        crashed = []
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is None:
+                continue
+            mark_process_dead(pid)
+            if self.retiring.pop(pid, None) is None and not self.stopping:
+                logger.warning(
+                    "Worker du pool terminé (slot %s, pid %s, code %s) : relance",
+                    slot,
+                    pid,
+                    os.waitstatus_to_exitcode(status),
+                )
+                crashed.append(slot)
+        return crashed
+
+    def scale(self, depth: Optional[int]) -> None:
+        target = self.desired_workers(depth)
+        while self.active() < target:
+            self.spawn()
+        if self.active() > target:
+            # Un seul retrait par intervalle : arrêt à chaud (le job en cours se termine)
+            pid = max(pid for pid in self.children if pid not in self.retiring)
+            self.retiring[pid] = self.children[pid]
+            os.kill(pid, signal.SIGTERM)
+            logger.info("Réduction du pool : arrêt du worker %s", pid)
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.children:
+            os.kill(pid, signal.SIGKILL)
+        self.reap()
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def run(self, queue_depth: Callable[[], Optional[int]], interval: float) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        while not self.stopping:
+            self.reap()
+            if not self.stopping:
+                self.scale(queue_depth())
+            time.sleep(interval)
+        self.shutdown()
+
+
+def run_pool(queue_names: Sequence[str]) -> None:
+    from transcription.models.registry import preload_model
+
+    tiers = tiered_queue_names(queue_names)
+    threads = POOL_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // max(1, POOL_MAX_WORKERS))
+    if TRANSCRIBE_QUEUE in queue_names:
+        # Un seul thread dans le parent : un pool OpenMP actif au moment du fork
+        # peut bloquer les enfants
+        _set_torch_threads(1)
+        preload_model(DEFAULT_MODEL)
+    # Objets chargés déplacés hors du GC : ses passes n'écrivent plus dans leurs
+    # pages, qui restent partagées entre les enfants
+    gc.freeze()
+    start_pool_metrics_server(WORKER_METRICS_PORT)
+
+    def child_main(slot: int) -> None:
+        _set_torch_threads(threads)
+        redis_conn = Redis.from_url(REDIS_URL)
+        queues = [Queue(name, connection=redis_conn) for name in tiers]
+        PriorityWorker(queues, connection=redis_conn, tiers=tiers).work()
+
+    redis_conn = Redis.from_url(REDIS_URL)
+    queues = [Queue(name, connection=redis_conn) for name in tiers]
+
+    def queue_depth() -> Optional[int]:
+        try:
+            return sum(queue.count for queue in queues)
+        except Exception:
+            logger.warning("Profondeur de file illisible")
+            return None
+
+    supervisor = Supervisor(child_main, POOL_MIN_WORKERS, POOL_MAX_WORKERS, POOL_JOBS_PER_WORKER)
+    supervisor.run(queue_depth, POOL_SCALE_INTERVAL_SECONDS)
@@ -1,13 +1,37 @@
+import functools
 import logging
 import time
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from api import db
-from api.storage import result_path
-from transcription.audio import extract_audio
-from transcription.srt_generator import generate_srt
+from api.queue import VIDEO_OUTPUTS
+from api.settings import (
+    KEEP_INTERMEDIATE_AUDIO,
+    SHARD_MIN_SECONDS,
+    SHARD_OVERLAP_SECONDS,
+    SHARD_SEGMENT_SECONDS,
+    SHARD_WORKERS,
+    STREAM_SEGMENT_SECONDS,
+    VAD_ENABLED,
+    VAD_MIN_SILENCE_MS,
+    VAD_MIN_SPEECH_MS,
+    VAD_PADDING_MS,
+    VAD_THRESHOLD_DB,
+)
+from api.storage import hash_file, load_model_transcript, load_transcript, result_path, save_transcript
+from transcription.audio import SAMPLE_RATE, extract_audio, load_audio
+from transcription.srt_generator import CHUNK_LENGTH, generate_srt
 from transcription.video_renderer import render_video
-from transcription.models.registry import load_model
+from transcription.models.registry import load_model, cache_stats, model_version
+from transcription.sharding import build_transcription, get_transcriber, iter_merged, iter_transcribe
+from transcription.vad import detect_speech
+from worker import metrics, result_cache
+from worker.profiling import profiled
+from worker.progress import ProgressPublisher, notify_status
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,60 +39,433 @@ logging.basicConfig(
 )
 logger = logging.getLogger("transcription_worker")
 
+# Nom de l'artefact mis en cache pour chaque type de sortie fichier
+ARTIFACTS = {
+    "subtitle": "subtitle.srt",
+    "embedded_video": "embedded_video.mp4",
+    "metadata_video": "metadata_video.mp4",
+}
+
+
+def pipeline_params() -> dict:
+    # Paramètres qui influencent la transcription, inclus dans la clé de cache
+    # (VAD seulement si activée : les clés existantes restent valides sans elle)
+    params = {
+        "chunk_length_s": CHUNK_LENGTH,
+        "shard_min_s": SHARD_MIN_SECONDS if SHARD_WORKERS > 1 else None,
+        "shard_segment_s": SHARD_SEGMENT_SECONDS,
+        "shard_overlap_s": SHARD_OVERLAP_SECONDS,
+        "stream_segment_s": STREAM_SEGMENT_SECONDS,
+    }
+    if VAD_ENABLED:
+        params["vad"] = vad_params()
+    return params
+
 
-def process_job(job_id: str, output_type: str, model_name: str) -> None:
+def vad_params() -> dict:
+    return {
+        "threshold_db": VAD_THRESHOLD_DB,
+        "min_speech_ms": VAD_MIN_SPEECH_MS,
+        "min_silence_ms": VAD_MIN_SILENCE_MS,
+        "padding_ms": VAD_PADDING_MS,
+    }
+
+
+def _context(job_id: str, output_type: str, model_name: str) -> Optional[Dict[str, Any]]:
+    # Contexte commun à toutes les étapes d'un job (clé de cache incluse)
     job = db.get_job(job_id)
     if not job:
         logger.error("Job introuvable", extra={"job_id": job_id})
-        return
+        return None
 
     start_time = time.time()
-    db.update_job(job_id, status="processing")
-    db.add_event(job_id, "processing")
+    if job.get("started_at"):
+        start_time = datetime.fromisoformat(job["started_at"]).timestamp()
+    ctx: Dict[str, Any] = {
+        "job_id": job_id,
+        "status": job["status"],
+        "output_type": output_type,
+        "model_name": model_name,
+        "input_path": Path(job["input_path"]),
+        "start_time": start_time,
+        "transcription": None,
+        "progress": ProgressPublisher(job_id, 0.0),
+    }
+    if output_type not in ARTIFACTS and output_type != "text":
+        raise ValueError("Type de sortie inconnu")
 
-    try:
-        input_path = Path(job["input_path"])
-        base_name = input_path.stem
-        audio_path = result_path(job_id, "wav")
-        srt_path = result_path(job_id, "srt")
-        video_path = result_path(job_id, "mp4")
-
-        if input_path.suffix.lower() == ".mp4":
-            extract_audio(input_path, audio_path)
-        else:
-            audio_path = input_path
-
-        model = load_model(model_name)
-        transcription = model.transcribe(audio_path)
-        generate_srt(transcription, srt_path)
-
-        output_path = None
-        result_text = transcription.get("text")
-
-        if output_type == "embedded_video":
-            render_video(input_path, srt_path, video_path, embedded=True)
-            output_path = str(video_path)
-        elif output_type == "metadata_video":
-            render_video(input_path, srt_path, video_path, embedded=False)
-            output_path = str(video_path)
-        elif output_type == "subtitle":
-            output_path = str(srt_path)
-        elif output_type == "text":
-            output_path = None
+    content_hash = job.get("content_hash")
+    if not content_hash:
+        content_hash = hash_file(ctx["input_path"])
+        db.update_job(job_id, content_hash=content_hash)
+    # Version lue dans le registre : le worker média n'importe pas le backend du modèle
+    ctx["cache_key"] = result_cache.cache_key(
+        content_hash, model_name, model_version(model_name), pipeline_params()
+    )
+    return ctx
+
+
+def _transition(job_id: str, status: str, **fields: Any) -> None:
+    db.transition_job(job_id, status, **fields)
+    notify_status(job_id, status)
+
+
+def _start(ctx: Dict[str, Any]) -> None:
+    ctx["start_time"] = time.time()
+    _transition(
+        ctx["job_id"],
+        "processing",
+        started_at=datetime.fromtimestamp(ctx["start_time"]).isoformat(),
+    )
+
+
+def _lookup_cache(ctx: Dict[str, Any]) -> bool:
+    # Chunks déjà enregistrés pour ce job (changement de type de sortie) : aucune
+    # inférence ; sinon cache de résultats partagé entre jobs
+    ctx["transcription"] = load_transcript(ctx["job_id"], ctx["cache_key"])
+    if ctx["transcription"] is not None:
+        db.add_event(ctx["job_id"], "transcript_reused")
+        return True
+    ctx["transcription"] = result_cache.get_transcription(ctx["cache_key"])
+    if ctx["transcription"] is not None:
+        db.add_event(ctx["job_id"], "cache_hit")
+        _save_transcript(ctx)
+        return True
+    return False
+
+
+def _store(ctx: Dict[str, Any]) -> None:
+    result_cache.put_transcription(ctx["cache_key"], ctx["transcription"])
+    _save_transcript(ctx)
+
+
+def _save_transcript(ctx: Dict[str, Any]) -> None:
+    save_transcript(ctx["job_id"], ctx["transcription"], ctx["model_name"], ctx["cache_key"])
+
+
+def _decode(ctx: Dict[str, Any]) -> np.ndarray:
+    # Décodage direct en PCM 16 kHz mono en mémoire : pas de WAV intermédiaire
+    # sauf si KEEP_INTERMEDIATE_AUDIO le demande
+    with metrics.STAGE_SECONDS.labels("extract").time():
+        samples = load_audio(ctx["input_path"])
+        if KEEP_INTERMEDIATE_AUDIO:
+            extract_audio(ctx["input_path"], result_path(ctx["job_id"], "wav"))
+    return samples
+
+
+def _skip_silence(ctx: Dict[str, Any], samples: np.ndarray) -> np.ndarray:
+    # Seules les zones de parole partent à l'inférence ; la timeline sert à recaler
+    # les timestamps avant les sous-titres
+    speech, ctx["timeline"] = detect_speech(samples, **vad_params())
+    skipped = 1 - len(speech) / len(samples) if len(samples) else 0.0
+    metrics.VAD_SKIPPED_RATIO.observe(skipped)
+    db.update_job(ctx["job_id"], vad_skipped_ratio=round(skipped, 4))
+    logger.info("VAD: %.0f %% de l'audio ignoré", skipped * 100, extra={"job_id": ctx["job_id"]})
+    return speech
+
+
+def _remap(ctx: Dict[str, Any], chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    timeline = ctx.get("timeline")
+    return timeline.remap_chunks(chunks) if timeline is not None else chunks
+
+
+def _set_audio(ctx: Dict[str, Any], samples: np.ndarray) -> None:
+    # Les longs enregistrements sont transcrits par segments (répartis sur le
+    # pool, ou à la suite) avec publication des résultats partiels
+    ctx["progress"].total_seconds = len(samples) / SAMPLE_RATE
+    metrics.AUDIO_DURATION.observe(len(samples) / SAMPLE_RATE)
+    if VAD_ENABLED:
+        samples = _skip_silence(ctx, samples)
+    ctx["audio"] = samples
+    duration = len(samples) / SAMPLE_RATE
+    if not len(samples):
+        ctx["mode"] = "silent"
+    elif SHARD_WORKERS > 1 and duration >= SHARD_MIN_SECONDS:
+        ctx["mode"] = "sharded"
+    elif STREAM_SEGMENT_SECONDS and duration > STREAM_SEGMENT_SECONDS:
+        ctx["mode"] = "streamed"
+    else:
+        ctx["mode"] = "single"
+
+
+def _prepare(job_id: str, output_type: str, model_name: str) -> Optional[Dict[str, Any]]:
+    # Passe le job en "processing" et résout le cache ; renvoie le contexte du job
+    ctx = _context(job_id, output_type, model_name)
+    if ctx is None:
+        return None
+    _start(ctx)
+    if not _lookup_cache(ctx):
+        _set_audio(ctx, _decode(ctx))
+    return ctx
+
+
+def _load_model(model_name: str):
+    with metrics.STAGE_SECONDS.labels("model_load").time():
+        return load_model(model_name)
+
+
+def _transcribe(ctx: Dict[str, Any]) -> None:
+    progress = ctx["progress"]
+    if ctx["mode"] == "silent":
+        # Aucune parole détectée : pas d'inférence
+        ctx.pop("audio")
+        ctx["transcription"] = build_transcription([])
+    elif ctx["mode"] == "single":
+        model = _load_model(ctx["model_name"])
+        logger.info("Cache modèles: %s", cache_stats(), extra={"job_id": ctx["job_id"]})
+        start = time.perf_counter()
+        transcription = model.transcribe(ctx.pop("audio"))
+        metrics.observe_inference(ctx["model_name"], time.perf_counter() - start, progress.total_seconds)
+        ctx["transcription"] = {**transcription, "chunks": _remap(ctx, transcription["chunks"])}
+        progress.partial(ctx["transcription"]["chunks"], progress.total_seconds)
+    else:
+        samples = ctx.pop("audio")
+        if ctx["mode"] == "sharded":
+            transcriber = get_transcriber(
+                ctx["model_name"], SHARD_WORKERS, SHARD_SEGMENT_SECONDS, SHARD_OVERLAP_SECONDS
+            )
+            results = transcriber.iter_segments(samples)
         else:
-            raise ValueError("Type de sortie inconnu")
-
-        duration = time.time() - start_time
-        db.update_job(
-            job_id,
-            status="completed",
-            output_path=output_path,
-            result_text=result_text,
-            duration_seconds=duration,
+            model = _load_model(ctx["model_name"])
+            results = iter_transcribe(model, samples, STREAM_SEGMENT_SECONDS, SHARD_OVERLAP_SECONDS)
+        start = time.perf_counter()
+        chunks = []
+        timeline = ctx.get("timeline")
+        for (_, segment_end), segment_chunks in iter_merged(results):
+            segment_chunks = _remap(ctx, segment_chunks)
+            if timeline is not None:
+                segment_end = timeline.to_original(segment_end, end=True)
+            chunks.extend(segment_chunks)
+            progress.partial(segment_chunks, segment_end)
+        metrics.observe_inference(ctx["model_name"], time.perf_counter() - start, progress.total_seconds)
+        ctx["transcription"] = build_transcription(chunks)
+    _store(ctx)
+
+
+def _output_path(ctx: Dict[str, Any]) -> Optional[str]:
+    if ctx["output_type"] == "subtitle":
+        return str(result_path(ctx["job_id"], "srt"))
+    if ctx["output_type"] in VIDEO_OUTPUTS:
+        return str(result_path(ctx["job_id"], "mp4"))
+    return None
+
+
+def _write_subtitles(ctx: Dict[str, Any]) -> None:
+    srt_path = _fresh_result_path(ctx["job_id"], "srt")
+    with metrics.STAGE_SECONDS.labels("srt").time():
+        generate_srt(ctx["transcription"], srt_path)
+
+
+def _render(ctx: Dict[str, Any]) -> None:
+    video_path = _fresh_result_path(ctx["job_id"], "mp4")
+    with metrics.STAGE_SECONDS.labels("render").time():
+        render_video(
+            ctx["input_path"],
+            result_path(ctx["job_id"], "srt"),
+            video_path,
+            embedded=ctx["output_type"] == "embedded_video",
         )
-        db.add_event(job_id, "completed")
+
+
+def _fresh_result_path(job_id: str, suffix: str) -> Path:
+    # Le résultat peut être un lien physique vers le cache, partagé avec d'autres
+    # jobs : on le détache avant d'écrire pour ne jamais modifier l'inode commun
+    path = result_path(job_id, suffix)
+    path.unlink(missing_ok=True)
+    return path
+
+
+def _complete(ctx: Dict[str, Any]) -> None:
+    output_path = _output_path(ctx)
+    duration = time.time() - ctx["start_time"]
+    _transition(
+        ctx["job_id"],
+        "completed",
+        output_path=output_path,
+        result_text=ctx["transcription"].get("text"),
+        duration_seconds=duration,
+    )
+    ctx["progress"].finish("completed", output_type=ctx["output_type"], output_path=output_path)
+    metrics.JOBS.labels("completed").inc()
+
+
+def _finalize(ctx: Dict[str, Any]) -> None:
+    output_type = ctx["output_type"]
+    artifact = ARTIFACTS.get(output_type)
+    output_path = _output_path(ctx)
+    if artifact and not result_cache.link_artifact(ctx["cache_key"], artifact, Path(output_path)):
+        _write_subtitles(ctx)
+        if output_type in VIDEO_OUTPUTS:
+            _render(ctx)
+        result_cache.put_artifact(ctx["cache_key"], artifact, Path(output_path))
+    _complete(ctx)
+
+
+def _fail(job_id: str, start_time: float, exc: Exception) -> str:
+    duration = time.time() - start_time
+    _transition(job_id, "failed", error=str(exc), duration_seconds=duration)
+    ProgressPublisher(job_id, 0.0).finish("failed", error=str(exc))
+    metrics.JOBS.labels("failed").inc()
+    logger.exception("Erreur traitement job", extra={"job_id": job_id})
+    return str(exc)
+
+
+def process_job(job_id: str, output_type: str, model_name: str, profile: bool = False) -> None:
+    start_time = time.time()
+    try:
+        with profiled(job_id, profile, reset=True):
+            ctx = _prepare(job_id, output_type, model_name)
+            if ctx is None:
+                return
+            if ctx["transcription"] is None:
+                _transcribe(ctx)
+            _finalize(ctx)
     except Exception as exc:
-        duration = time.time() - start_time
-        db.update_job(job_id, status="failed", error=str(exc), duration_seconds=duration)
-        db.add_event(job_id, "failed")
-        logger.exception("Erreur traitement job", extra={"job_id": job_id})
+        _fail(job_id, start_time, exc)
+
+
+def process_batch(jobs: List[Tuple[str, str, str]]) -> Dict[str, str]:
+    # Traite plusieurs jobs ensemble : les transcriptions manquantes d'un même
+    # modèle passent dans un seul appel transcribe_batch. Renvoie l'erreur de
+    # chaque job en échec (le worker marque le job RQ correspondant).
+    failed: Dict[str, str] = {}
+    contexts = []
+    for job_id, output_type, model_name in jobs:
+        start_time = time.time()
+        try:
+            ctx = _prepare(job_id, output_type, model_name)
+        except Exception as exc:
+            failed[job_id] = _fail(job_id, start_time, exc)
+            continue
+        if ctx is not None:
+            contexts.append(ctx)
+
+    pending: Dict[str, List[Dict[str, Any]]] = {}
+    for ctx in contexts:
+        if ctx["transcription"] is not None:
+            continue
+        if ctx["mode"] != "single":
+            try:
+                _transcribe(ctx)
+            except Exception as exc:
+                failed[ctx["job_id"]] = _fail(ctx["job_id"], ctx["start_time"], exc)
+            continue
+        pending.setdefault(ctx["model_name"], []).append(ctx)
+
+    for model_name, group in pending.items():
+        try:
+            model = _load_model(model_name)
+            start = time.perf_counter()
+            transcriptions = model.transcribe_batch([ctx["audio"] for ctx in group])
+            metrics.observe_inference(
+                model_name,
+                time.perf_counter() - start,
+                sum(ctx["progress"].total_seconds for ctx in group),
+            )
+        except Exception:
+            # Un fichier en erreur ne doit pas faire échouer tout le lot
+            logger.exception("Échec du lot, repli job par job", extra={"model_name": model_name})
+            transcriptions = [None] * len(group)
+        for ctx, transcription in zip(group, transcriptions):
+            try:
+                if transcription is None:
+                    _transcribe(ctx)
+                else:
+                    ctx.pop("audio", None)
+                    ctx["transcription"] = {**transcription, "chunks": _remap(ctx, transcription["chunks"])}
+                    ctx["progress"].partial(ctx["transcription"]["chunks"], ctx["progress"].total_seconds)
+                    _store(ctx)
+            except Exception as exc:
+                failed[ctx["job_id"]] = _fail(ctx["job_id"], ctx["start_time"], exc)
+
+    for ctx in contexts:
+        if ctx["transcription"] is None:
+            continue
+        try:
+            _finalize(ctx)
+        except Exception as exc:
+            failed[ctx["job_id"]] = _fail(ctx["job_id"], ctx["start_time"], exc)
+    return failed
+
+
+# Pipeline par étapes : extract → transcribe → subtitle → render.
+# Chaque étape est un job RQ distinct sur sa propre file ; les données passent
+# par storage/results (audio décodé en .npy, chunks du job en .chunks.json.gz).
+
+
+def _stage(stage: str) -> Callable:
+    def decorator(func: Callable[[Dict[str, Any]], None]) -> Callable[..., None]:
+        @functools.wraps(func)
+        def wrapper(job_id: str, output_type: str, model_name: str, profile: bool = False) -> None:
+            start_time = time.time()
+            ctx = None
+            try:
+                ctx = _context(job_id, output_type, model_name)
+                if ctx is None or ctx["status"] == "failed":
+                    return
+                db.add_event(job_id, f"{stage}:started")
+                # Première étape de l'exécution : le job n'est pas encore "processing"
+                with profiled(job_id, profile, reset=ctx["status"] != "processing"):
+                    func(ctx)
+                db.add_event(job_id, f"{stage}:completed")
+            except Exception as exc:
+                db.add_event(job_id, f"{stage}:failed")
+                _fail(job_id, ctx["start_time"] if ctx else start_time, exc)
+                # L'échec doit remonter à RQ pour que les étapes suivantes ne partent pas
+                raise
+
+        return wrapper
+
+    return decorator
+
+
+def _audio_path(job_id: str) -> Path:
+    return result_path(job_id, "npy")
+
+
+def _load_transcription(ctx: Dict[str, Any]) -> None:
+    # Étapes de sortie (worker média) : les chunks du job sont repris tels quels
+    # avec leur clé, calculée par le worker qui a transcrit. La clé du worker média,
+    # avec sa propre configuration (VAD...), peut différer et ne sert pas.
+    stored = load_model_transcript(ctx["job_id"], ctx["model_name"])
+    if stored is not None:
+        ctx["transcription"], ctx["cache_key"] = stored[0], stored[1] or ctx["cache_key"]
+    elif not _lookup_cache(ctx):
+        _set_audio(ctx, _decode(ctx))
+        _transcribe(ctx)
+
+
+@_stage("extract")
+def extract_stage(ctx: Dict[str, Any]) -> None:
+    _start(ctx)
+    # Le hit est compté (et l'entrée rafraîchie) par l'étape de transcription seule
+    if (
+        load_transcript(ctx["job_id"], ctx["cache_key"]) is None
+        and not result_cache.has_transcription(ctx["cache_key"])
+    ):
+        np.save(_audio_path(ctx["job_id"]), _decode(ctx))
+
+
+@_stage("transcribe")
+def transcribe_stage(ctx: Dict[str, Any]) -> None:
+    audio_path = _audio_path(ctx["job_id"])
+    if not _lookup_cache(ctx):
+        _set_audio(ctx, np.load(audio_path, mmap_mode="r"))
+        _transcribe(ctx)
+    audio_path.unlink(missing_ok=True)
+
+
+@_stage("subtitle")
+def subtitle_stage(ctx: Dict[str, Any]) -> None:
+    _load_transcription(ctx)
+    if ctx["output_type"] in VIDEO_OUTPUTS:
+        # Le rendu a lieu à l'étape suivante, sur une file ffmpeg dédiée
+        _write_subtitles(ctx)
+        return
+    _finalize(ctx)
+
+
+@_stage("render")
+def render_stage(ctx: Dict[str, Any]) -> None:
+    _load_transcription(ctx)
+    _finalize(ctx)
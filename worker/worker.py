@@ -1,12 +1,56 @@
 import os
+import shutil
+
 from redis import Redis
-from rq import Worker, Queue, Connection
+from rq import Queue
 
-from api.settings import REDIS_URL
+from api.settings import (
+    BATCH_MAX_JOBS,
+    BATCH_WINDOW_SECONDS,
+    DEFAULT_MODEL,
+    POOL_METRICS_DIR,
+    REDIS_URL,
+    TRANSCRIBE_QUEUE,
+    WORKER_METRICS_PORT,
+    WORKER_MODE,
+    WORKER_QUEUES,
+)
+from transcription.models.registry import preload_model
+from worker.scheduling import PriorityWorker, tiered_queue_names
 
 
 if __name__ == "__main__":
-    redis_conn = Redis.from_url(REDIS_URL)
-    with Connection(redis_conn):
-        worker = Worker([Queue("transcription")])
-        worker.work()
+    # Le modèle par défaut est chargé une seule fois, puis réutilisé par tous les jobs.
+    # SimpleWorker exécute les jobs dans ce processus : le cache de modèles survit
+    # d'un job à l'autre (un Worker classique forke un processus par job).
+    # Un worker dédié aux étapes ffmpeg (extract, subtitle, render) ne charge pas de modèle.
+    if WORKER_MODE == "pool":
+        # Métriques en mode multiprocessus : le répertoire, vidé des fichiers d'un
+        # lancement précédent, doit être connu avant l'import de prometheus_client
+        shutil.rmtree(POOL_METRICS_DIR, ignore_errors=True)
+        POOL_METRICS_DIR.mkdir(parents=True)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(POOL_METRICS_DIR)
+        from worker.supervisor import run_pool
+
+        # Le superviseur charge le modèle, sert /metrics pour tout le pool puis forke les workers
+        run_pool(WORKER_QUEUES)
+    else:
+        from worker.metrics import start_metrics_server
+
+        start_metrics_server(WORKER_METRICS_PORT)
+        if TRANSCRIBE_QUEUE in WORKER_QUEUES:
+            preload_model(DEFAULT_MODEL)
+        # Chaque file est déclinée en paliers de durée (PRIORITY_TIER_SECONDS)
+        redis_conn = Redis.from_url(REDIS_URL)
+        tiers = tiered_queue_names(WORKER_QUEUES)
+        queues = [Queue(name, connection=redis_conn) for name in tiers]
+        if WORKER_MODE == "batch":
+            from worker import batching
+
+            # Les lots sont pris sur les paliers de la première file uniquement
+            batch_tiers = tiered_queue_names(WORKER_QUEUES[:1])
+            batch_queues = [Queue(name, connection=redis_conn) for name in batch_tiers]
+            batching.work(batch_queues, BATCH_MAX_JOBS, BATCH_WINDOW_SECONDS, batch_tiers)
+        else:
+            worker = PriorityWorker(queues, connection=redis_conn, tiers=tiers)
+            worker.work()